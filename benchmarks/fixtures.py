@@ -0,0 +1,133 @@
+"""Local stand-ins for AWS, GitHub and npm used by the benchmark suite
+
+Nothing here touches the network: AWS is a moto server on localhost
+(reached through AWS_ENDPOINT_URL), repositories are bare git repos on
+disk, and npm is a script that fabricates a build of a chosen size.
+"""
+import os
+import socket
+import stat
+import subprocess
+import sys
+from pathlib import Path
+from typing import Dict
+
+FAKE_NPM = '''#!{python}
+"""Fake npm: install creates a tiny node_modules, run <script> a build/"""
+import os
+import sys
+from pathlib import Path
+
+command = sys.argv[1] if len(sys.argv) > 1 else ""
+
+if command in ("install", "ci"):
+    Path("node_modules/dep").mkdir(parents=True, exist_ok=True)
+    Path("node_modules/dep/index.js").write_text("module.exports = 1\\n")
+elif command == "run":
+    files = int(os.environ.get("FAKE_BUILD_FILES", "100"))
+    size = int(os.environ.get("FAKE_BUILD_FILE_BYTES", "2048"))
+    build = Path("build")
+    (build / "static" / "js").mkdir(parents=True, exist_ok=True)
+    (build / "index.html").write_text("<html><body>bench</body></html>")
+    for i in range(files - 1):
+        # Content hash in the name, like a real bundler
+        body = (f"console.log({{i}});" * (size // 16 + 1))[:size]
+        (build / "static" / "js" / f"chunk.{{i:08x}}.js").write_text(body)
+'''
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_moto():
+    """Start a moto server and point boto3 at it; returns the server"""
+
+    from moto.server import ThreadedMotoServer
+
+    port = free_port()
+    server = ThreadedMotoServer(ip_address="127.0.0.1", port=port, verbose=False)
+    server.start()
+
+    os.environ.update({
+        "AWS_ENDPOINT_URL": f"http://127.0.0.1:{port}",
+        "AWS_ACCESS_KEY_ID": "testing",
+        "AWS_SECRET_ACCESS_KEY": "testing",
+        "AWS_SESSION_TOKEN": "testing",
+        "AWS_DEFAULT_REGION": "us-east-1",
+        "AWS_EC2_METADATA_DISABLED": "true",
+    })
+    return server
+
+
+def install_fake_npm(bin_dir: Path) -> None:
+    """Put the fake npm first on PATH"""
+
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    npm = bin_dir / "npm"
+    npm.write_text(FAKE_NPM.format(python=sys.executable))
+    npm.chmod(npm.stat().st_mode | stat.S_IEXEC)
+    os.environ["PATH"] = f"{bin_dir}{os.pathsep}{os.environ['PATH']}"
+
+
+def _git(*args: str, cwd: Path) -> None:
+    subprocess.run(
+        ["git", *args],
+        cwd=cwd,
+        check=True,
+        capture_output=True,
+        env={
+            **os.environ,
+            "GIT_AUTHOR_NAME": "bench",
+            "GIT_AUTHOR_EMAIL": "bench@localhost",
+            "GIT_COMMITTER_NAME": "bench",
+            "GIT_COMMITTER_EMAIL": "bench@localhost",
+        },
+    )
+
+
+def make_bare_repo(root: Path, name: str, files: Dict[str, str]) -> str:
+    """Create a bare repo with one commit holding files; returns its URL"""
+
+    work = root / f"{name}-work"
+    bare = root / f"{name}.git"
+    work.mkdir(parents=True)
+
+    for path, content in files.items():
+        (work / path).parent.mkdir(parents=True, exist_ok=True)
+        (work / path).write_text(content)
+
+    _git("init", "-q", "-b", "main", cwd=work)
+    _git("add", "-A", cwd=work)
+    _git("commit", "-q", "-m", "initial", cwd=work)
+    _git("clone", "-q", "--bare", str(work), str(bare), cwd=root)
+    return bare.as_uri()
+
+
+def frontend_repo(root: Path) -> str:
+    return make_bare_repo(root, "frontend", {
+        "package.json": '{"name": "bench-frontend", "scripts": {"build": "bench"}}\n',
+        "package-lock.json": '{"lockfileVersion": 3}\n',
+        "src/index.js": "console.log('bench')\n",
+    })
+
+
+def backend_repo(root: Path) -> str:
+    return make_bare_repo(root, "backend", {
+        "package.json": '{"name": "bench-backend", "main": "index.js"}\n',
+        "package-lock.json": '{"lockfileVersion": 3}\n',
+        "index.js": "require('http').createServer((q, s) => s.end('ok')).listen(3000)\n",
+    })
+
+
+def synthetic_build(path: Path, files: int, size: int) -> Path:
+    """Write a build directory of files × size bytes, without npm"""
+
+    js = path / "static" / "js"
+    js.mkdir(parents=True, exist_ok=True)
+    (path / "index.html").write_text("<html><body>bench</body></html>")
+    for i in range(files - 1):
+        (js / f"chunk.{i:08x}.js").write_text((f"console.log({i});" * (size // 16 + 1))[:size])
+    return path
@@ -0,0 +1,418 @@
+"""Offline benchmark suite
+
+Runs the deployers, the state store and the MCP dispatch path against a
+local moto server, local bare git repos and a fake npm, and records
+throughput and per-phase latency. Every run is appended to a history
+file and compared with the previous run that used the same parameters.
+
+Usage:
+    pip install -r benchmarks/requirements.txt
+    python benchmarks/run.py                       # all scenarios
+    python benchmarks/run.py --files 100,20000 --scenarios upload,frontend
+    python benchmarks/run.py --fail-on-regression  # exit 1 on a slowdown
+
+Metric names ending in _per_sec are higher-is-better; all others
+(seconds, milliseconds, API calls) are lower-is-better.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+import fixtures  # noqa: E402
+
+DEFAULT_HISTORY = ROOT / "benchmarks" / "results" / "history.jsonl"
+
+SCENARIOS: Dict[str, Callable] = {}
+
+
+def scenario(name: str):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+    return register
+
+
+def percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct / 100))]
+
+
+def phase_metrics(prefix: str) -> Dict[str, float]:
+    """Flatten the metrics registry into <prefix>.<phase>.{ms,api_calls}"""
+
+    from mcp_server.metrics import metrics
+
+    results = {}
+    for phase, stats in metrics.snapshot()["phases"].items():
+        results[f"{prefix}.{phase}.ms"] = stats["avg_ms"]
+        if stats["api_calls"]:
+            results[f"{prefix}.{phase}.api_calls"] = stats["api_calls"] / stats["count"]
+    metrics.reset()
+    return results
+
+
+@scenario("upload")
+async def bench_upload(ctx) -> Dict[str, float]:
+    """S3Deployer: full upload of a synthetic build, then a no-change sync"""
+
+    from mcp_server.deployers.s3 import S3Deployer
+
+    results = {}
+    deployer = S3Deployer(region="us-east-1")
+
+    for files in ctx.file_counts:
+        build = fixtures.synthetic_build(ctx.work / f"upload-{files}", files, ctx.file_bytes)
+        bucket = f"bench-upload-{files}-{int(time.time())}"
+        deployer.create_bucket(bucket)
+
+        start = time.perf_counter()
+        deployer.upload_directory(build, bucket)
+        elapsed = time.perf_counter() - start
+        stats = deployer.last_upload_stats
+
+        results[f"upload[{files}].seconds"] = elapsed
+        results[f"upload[{files}].files_per_sec"] = files / elapsed
+        results[f"upload[{files}].mb_per_sec"] = stats["bytes"] / elapsed / 1024 / 1024
+
+        start = time.perf_counter()
+        deployer.sync_directory(build, bucket)
+        results[f"sync_unchanged[{files}].seconds"] = time.perf_counter() - start
+
+        shutil.rmtree(build)
+
+    return results
+
+
+@scenario("frontend")
+async def bench_frontend(ctx) -> Dict[str, float]:
+    """deploy_frontend_to_s3 end to end: clone, fake npm build, upload, save"""
+
+    from mcp_server.tools.s3_deploy import deploy_frontend_to_s3
+
+    results = {}
+    phase_metrics("discard")
+
+    for files in ctx.file_counts:
+        os.environ["FAKE_BUILD_FILES"] = str(files)
+        os.environ["FAKE_BUILD_FILE_BYTES"] = str(ctx.file_bytes)
+        name = f"bench-frontend-{files}"
+
+        # Drop build cache entries from earlier sizes so the first deploy builds
+        shutil.rmtree(ctx.cache_dir / "builds", ignore_errors=True)
+
+        start = time.perf_counter()
+        await deploy_frontend_to_s3(repo_url=ctx.frontend_repo, name=name)
+        results[f"frontend[{files}].cold.seconds"] = time.perf_counter() - start
+        results.update(phase_metrics(f"frontend[{files}].cold"))
+
+        # Same commit again: build cache hit and incremental sync
+        start = time.perf_counter()
+        await deploy_frontend_to_s3(repo_url=ctx.frontend_repo, name=name, sync=True)
+        results[f"frontend[{files}].warm.seconds"] = time.perf_counter() - start
+        results.update(phase_metrics(f"frontend[{files}].warm"))
+
+    return results
+
+
+@scenario("backend")
+async def bench_backend(ctx) -> Dict[str, float]:
+    """deploy_backend_to_ec2 end to end against moto's EC2"""
+
+    from mcp_server.deployers.ec2 import EC2Deployer
+    from mcp_server.tools.ec2_deploy import deploy_backend_to_ec2
+
+    # moto instances never run their user data, so nothing would ever
+    # answer the readiness probe; report the app as up immediately
+    async def app_is_up(self, host, port, deadline, health_path=None):
+        return {"attempts": 1, "tcp_open": True}
+
+    EC2Deployer.probe_app = app_is_up
+    phase_metrics("discard")
+
+    durations = []
+    for i in range(ctx.repeat):
+        start = time.perf_counter()
+        await deploy_backend_to_ec2(repo_url=ctx.backend_repo, name=f"bench-backend-{i}")
+        durations.append(time.perf_counter() - start)
+
+    results = {"backend.seconds": statistics.median(durations)}
+    results.update(phase_metrics("backend"))
+    return results
+
+
+@scenario("status")
+async def bench_status(ctx) -> Dict[str, float]:
+    """get_all_deployment_status over many backends"""
+
+    from mcp_server.aws import get_client
+    from mcp_server.models.deployment import save_deployment, delete_deployment
+    from mcp_server.tools.status import get_all_deployment_status
+
+    count = ctx.records
+    ec2 = get_client("ec2", "us-east-1")
+    instances = ec2.run_instances(
+        ImageId="ami-0c7217cdde317cfec", InstanceType="t2.micro", MinCount=count, MaxCount=count
+    )["Instances"]
+    for i, instance in enumerate(instances):
+        save_deployment(f"bench-status-{i}", {
+            "type": "backend",
+            "region": "us-east-1",
+            "instance_id": instance["InstanceId"],
+        })
+
+    phase_metrics("discard")
+    from mcp_server.metrics import span
+
+    start = time.perf_counter()
+    with span("status_refresh") as refresh:
+        await get_all_deployment_status(deployment_type="backend")
+    results = {
+        f"status[{count}].seconds": time.perf_counter() - start,
+        f"status[{count}].api_calls": refresh.api_calls,
+    }
+    phase_metrics("discard")
+
+    for i in range(count):
+        delete_deployment(f"bench-status-{i}")
+    ec2.terminate_instances(InstanceIds=[i["InstanceId"] for i in instances])
+    return results
+
+
+@scenario("state")
+async def bench_state(ctx) -> Dict[str, float]:
+    """State store: save, cached load and filtered list, per backend"""
+
+    from mcp_server.config import settings
+    from mcp_server.models import deployment
+
+    results = {}
+    count = ctx.records
+
+    for backend in ("json", "sqlite"):
+        settings.state_backend = backend
+        settings.state_dir = ctx.work / f"state-{backend}"
+        deployment._backend = None
+        deployment._cache.clear()
+
+        start = time.perf_counter()
+        for i in range(count):
+            deployment.save_deployment(f"svc-{i}", {
+                "type": "backend" if i % 2 else "frontend",
+                "region": "us-east-1",
+                "status": "running",
+            })
+        results[f"state.{backend}.save_per_sec"] = count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        for i in range(count):
+            deployment.load_deployment(f"svc-{i}")
+        results[f"state.{backend}.load_per_sec"] = count / (time.perf_counter() - start)
+
+        start = time.perf_counter()
+        deployment.list_deployments(type="backend")
+        results[f"state.{backend}.list_filtered.ms"] = (time.perf_counter() - start) * 1000
+
+    settings.state_dir = ctx.state_dir
+    settings.state_backend = "json"
+    deployment._backend = None
+    deployment._cache.clear()
+    return results
+
+
+@scenario("dispatch")
+async def bench_dispatch(ctx) -> Dict[str, float]:
+    """MCP dispatch path: list_tools and a cheap validated tool call"""
+
+    from mcp_server import server
+
+    calls = 2000
+    latencies = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        await server.call_tool("list_jobs", {})
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    start = time.perf_counter()
+    for _ in range(calls):
+        await server.list_tools()
+    list_tools_ms = (time.perf_counter() - start) * 1000 / calls
+
+    phase_metrics("discard")
+    return {
+        "dispatch.call.p50_ms": percentile(latencies, 50),
+        "dispatch.call.p99_ms": percentile(latencies, 99),
+        "dispatch.list_tools.ms": list_tools_ms,
+    }
+
+
+@scenario("startup")
+async def bench_startup(ctx) -> Dict[str, float]:
+    """Process start to initialize / tools/list over stdio"""
+
+    from startup import run_once
+
+    run_once(60)
+    runs = [run_once(60) for _ in range(max(3, ctx.repeat))]
+    return {
+        "startup.initialize.ms": statistics.median(r["initialize_ms"] for r in runs),
+        "startup.list_tools.ms": statistics.median(r["list_tools_ms"] for r in runs),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_baseline(history: Path, params: Dict[str, Any]) -> Dict[str, Any]:
+    """Most recent run in the history with the same parameters"""
+
+    if not history.exists():
+        return {}
+
+    baseline = {}
+    for line in history.read_text().splitlines():
+        entry = json.loads(line)
+        if entry.get("params") == params:
+            baseline = entry
+    return baseline
+
+
+def compare(current: Dict[str, float], baseline: Dict[str, float], threshold: float) -> List[str]:
+    """Print the comparison table; return metrics that regressed"""
+
+    regressions = []
+    print(f"\n{'metric':<55} {'value':>12} {'baseline':>12} {'change':>8}")
+    for name, value in sorted(current.items()):
+        before = baseline.get(name)
+        change = ""
+        if before:
+            delta = (value - before) / before * 100
+            worse = -delta if name.endswith("_per_sec") else delta
+            change = f"{delta:+.0f}%"
+            if worse > threshold:
+                change += " !"
+                regressions.append(name)
+        before_text = f"{before:.3f}" if before is not None else "-"
+        print(f"{name:<55} {value:>12.3f} {before_text:>12} {change:>8}")
+    return regressions
+
+
+async def run(args) -> int:
+    work = Path(tempfile.mkdtemp(prefix="aws-agent-bench-"))
+
+    # Settings are read from the environment at import time
+    os.environ["STATE_DIR"] = str(work / "state")
+    os.environ["CACHE_DIR"] = str(work / "cache")
+
+    server = fixtures.start_moto()
+    fixtures.install_fake_npm(work / "bin")
+
+    class Context:
+        pass
+
+    ctx = Context()
+    ctx.work = work
+    ctx.state_dir = work / "state"
+    ctx.cache_dir = work / "cache"
+    ctx.file_counts = args.files
+    ctx.file_bytes = args.file_bytes
+    ctx.records = args.records
+    ctx.repeat = args.repeat
+    ctx.frontend_repo = fixtures.frontend_repo(work / "repos")
+    ctx.backend_repo = fixtures.backend_repo(work / "repos")
+
+    # Keep the deployers' progress output out of the report
+    results: Dict[str, float] = {}
+    real_stdout, real_stderr = sys.stdout, sys.stderr
+    try:
+        for name in args.scenarios:
+            print(f"▶ {name}", file=real_stdout, flush=True)
+            sys.stdout = sys.stderr = open(os.devnull, "w")
+            try:
+                results.update(await SCENARIOS[name](ctx))
+            finally:
+                sys.stdout.close()
+                sys.stdout, sys.stderr = real_stdout, real_stderr
+    finally:
+        server.stop()
+        shutil.rmtree(work, ignore_errors=True)
+
+    params = {
+        "scenarios": args.scenarios,
+        "files": args.files,
+        "file_bytes": args.file_bytes,
+        "records": args.records,
+        "repeat": args.repeat,
+    }
+    baseline = load_baseline(args.history, params)
+    regressions = compare(results, baseline.get("metrics", {}), args.threshold)
+
+    args.history.parent.mkdir(parents=True, exist_ok=True)
+    with open(args.history, "a") as f:
+        f.write(json.dumps({
+            "timestamp": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "python": sys.version.split()[0],
+            "params": params,
+            "metrics": results,
+        }) + "\n")
+
+    if baseline:
+        print(f"\nCompared with {baseline['commit']} ({baseline['timestamp']})")
+    if regressions:
+        print(f"⚠️  {len(regressions)} metric(s) regressed more than {args.threshold:.0f}%")
+        return 1 if args.fail_on_regression else 0
+    return 0
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--scenarios",
+        type=lambda value: value.split(","),
+        default=list(SCENARIOS),
+        help=f"Comma-separated subset of: {', '.join(SCENARIOS)}",
+    )
+    parser.add_argument(
+        "--files",
+        type=lambda value: [int(n) for n in value.split(",")],
+        default=[100, 1000],
+        help="Build sizes in files, e.g. 100,1000,20000",
+    )
+    parser.add_argument("--file-bytes", type=int, default=2048)
+    parser.add_argument("--records", type=int, default=200, help="Deployments for state/status")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--threshold", type=float, default=25.0, help="Regression threshold in %%")
+    parser.add_argument("--history", type=Path, default=DEFAULT_HISTORY)
+    parser.add_argument("--fail-on-regression", action="store_true")
+    args = parser.parse_args()
+
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"Unknown scenarios: {', '.join(sorted(unknown))}")
+
+    sys.exit(asyncio.run(run(args)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+"""Cold-start benchmark for the MCP server
+
+Spawns `python -m mcp_server.server` the way an MCP client does and
+drives it over stdio with a minimal JSON-RPC client, timing:
+
+  initialize  process start -> initialize response
+  list_tools  process start -> tools/list response
+
+Usage:
+    python benchmarks/startup.py [--runs 10] [--output results.json]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+from mcp.types import LATEST_PROTOCOL_VERSION
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+class StubClient:
+    """Just enough of an MCP client to complete the handshake"""
+
+    def __init__(self, timeout: float):
+        env = dict(os.environ, PYTHONPATH=str(ROOT))
+        self.started = time.perf_counter()
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "mcp_server.server"],
+            cwd=ROOT,
+            env=env,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+        )
+        # Don't hang the benchmark on a server that never answers
+        self.watchdog = threading.Timer(timeout, self.process.kill)
+        self.watchdog.start()
+        self.next_id = 0
+
+    def send(self, method: str, params: dict = None, notify: bool = False) -> None:
+        message = {"jsonrpc": "2.0", "method": method}
+        if params is not None:
+            message["params"] = params
+        if not notify:
+            self.next_id += 1
+            message["id"] = self.next_id
+        self.process.stdin.write(json.dumps(message) + "\n")
+        self.process.stdin.flush()
+
+    def receive(self) -> dict:
+        """Wait for the response to the last request; returns it"""
+
+        while True:
+            line = self.process.stdout.readline()
+            if not line:
+                raise RuntimeError("Server exited before responding")
+            message = json.loads(line)
+            if message.get("id") == self.next_id:
+                if "error" in message:
+                    raise RuntimeError(f"Server error: {message['error']}")
+                return message
+
+    def elapsed_ms(self) -> float:
+        return (time.perf_counter() - self.started) * 1000
+
+    def close(self) -> None:
+        self.watchdog.cancel()
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=5)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+            self.process.wait()
+
+
+def run_once(timeout: float) -> dict:
+    client = StubClient(timeout)
+    try:
+        client.send("initialize", {
+            "protocolVersion": LATEST_PROTOCOL_VERSION,
+            "capabilities": {},
+            "clientInfo": {"name": "startup-benchmark", "version": "0"},
+        })
+        client.receive()
+        initialize_ms = client.elapsed_ms()
+
+        client.send("notifications/initialized", notify=True)
+        client.send("tools/list", {})
+        tools = client.receive()["result"]["tools"]
+        list_tools_ms = client.elapsed_ms()
+    finally:
+        client.close()
+
+    return {
+        "initialize_ms": initialize_ms,
+        "list_tools_ms": list_tools_ms,
+        "tool_count": len(tools),
+    }
+
+
+def summarize(runs: list, metric: str) -> dict:
+    values = [run[metric] for run in runs]
+    return {
+        "min": round(min(values), 1),
+        "median": round(statistics.median(values), 1),
+        "max": round(max(values), 1),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--timeout", type=float, default=60.0)
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    args = parser.parse_args()
+
+    # One untimed run warms the OS page cache and __pycache__
+    run_once(args.timeout)
+    runs = [run_once(args.timeout) for _ in range(args.runs)]
+
+    results = {
+        "python": sys.version.split()[0],
+        "runs": args.runs,
+        "tool_count": runs[-1]["tool_count"],
+        "initialize_ms": summarize(runs, "initialize_ms"),
+        "list_tools_ms": summarize(runs, "list_tools_ms"),
+    }
+
+    for metric in ("initialize_ms", "list_tools_ms"):
+        stats = results[metric]
+        print(f"{metric:<15} min {stats['min']:>7.1f}  median {stats['median']:>7.1f}  max {stats['max']:>7.1f}")
+
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+        print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Process-wide registry of pooled boto3 clients"""
+import threading
+from typing import Any, Dict, Optional, Tuple
+
+import boto3
+from botocore.config import Config
+
+from .config import settings
+from .metrics import count_api_call
+
+
+_clients: Dict[Tuple, Any] = {}
+_clients_lock = threading.Lock()
+_session: Optional[boto3.session.Session] = None
+
+
+def _default_session() -> boto3.session.Session:
+    """The session all clients are created from, set up from settings on first use
+
+    Explicit credentials from settings (ONLY if provided) take precedence
+    over the usual environment/profile chain. Call with _clients_lock held.
+    """
+
+    global _session
+
+    if _session is None:
+        if settings.aws_access_key_id and settings.aws_secret_access_key:
+            _session = boto3.session.Session(
+                aws_access_key_id=settings.aws_access_key_id,
+                aws_secret_access_key=settings.aws_secret_access_key,
+                region_name=settings.aws_default_region,
+            )
+        else:
+            _session = boto3.session.Session()
+
+    return _session
+
+
+def _credentials_key(session: boto3.session.Session) -> Optional[Tuple[str, str]]:
+    """Identify the credentials a client would be created with
+
+    Part of the registry key, so rotating to a different profile or
+    access key gets fresh clients instead of ones signed for the old one.
+    """
+
+    credentials = session.get_credentials()
+    if credentials is None:
+        return None
+    return (session.profile_name, credentials.access_key)
+
+
+def client_config(**overrides: Any) -> Config:
+    """Connection pool, adaptive retries and TCP keep-alive for every client"""
+
+    options = {
+        "max_pool_connections": settings.aws_max_pool_connections,
+        "retries": {"max_attempts": settings.aws_max_attempts, "mode": "adaptive"},
+        "tcp_keepalive": True,
+    }
+    options.update(overrides)
+    return Config(**options)
+
+
+def get_client(service: str, region: Optional[str] = None, **overrides: Any) -> Any:
+    """Return a shared client for (service, region, credentials)
+
+    boto3 clients are thread-safe, so one instance per key is reused by
+    every tool call and executor thread; building one loads the service
+    model and costs tens of milliseconds. overrides are botocore Config
+    options (e.g. a larger max_pool_connections) and are part of the key.
+    """
+
+    region = region or settings.aws_default_region
+
+    with _clients_lock:
+        # Creating clients from the shared session isn't
+        # thread-safe, so creation happens under the lock too
+        session = _default_session()
+        key = (
+            service,
+            region,
+            _credentials_key(session),
+            tuple(sorted((name, repr(value)) for name, value in overrides.items())),
+        )
+
+        client = _clients.get(key)
+        if client is None:
+            client = session.client(
+                service,
+                region_name=region,
+                config=client_config(**overrides),
+            )
+            client.meta.events.register("before-call", count_api_call)
+            _clients[key] = client
+
+        return client
+
+
+def clear_clients() -> None:
+    """Drop all cached clients (e.g. after changing credentials or endpoints)"""
+
+    global _session
+
+    with _clients_lock:
+        _clients.clear()
+        _session = None
@@ -1,6 +1,7 @@
 """Configuration management"""
 import os
 from pathlib import Path
+from typing import Optional
 from pydantic_settings import BaseSettings
 from dotenv import load_dotenv
 import sys
@@ -17,10 +18,56 @@ class Settings(BaseSettings):
     aws_access_key_id: str = ""
     aws_secret_access_key: str = ""
     aws_default_region: str = "us-east-1"
+    # Shared client pool size and adaptive-mode retry attempts
+    aws_max_pool_connections: int = 50
+    aws_max_attempts: int = 5
 
     # Application
     # Store state safely in user's home directory
     state_dir: Path = Path("/tmp/aws-agent-deployments")
+    # "json" (one file per deployment) or "sqlite" (indexed, WAL mode)
+    state_backend: str = "json"
+    state_db: Optional[Path] = None
+
+    # S3 upload engine
+    upload_max_workers: int = 16
+    upload_multipart_threshold_mb: int = 16
+    upload_multipart_chunksize_mb: int = 8
+    upload_max_retries: int = 3
+
+    # Asset pre-compression (0 workers = one per CPU core)
+    compress_min_bytes: int = 1024
+    compress_workers: int = 0
+
+    # Local build caches
+    cache_dir: Path = Path("/tmp/aws-agent-cache")
+    dependency_cache_max_mb: int = 4096
+    build_cache_max_mb: int = 1024
+    git_mirror_cache: bool = False
+
+    # Staging bucket for pre-built backend artifacts (default: per account/region)
+    artifact_bucket: str = ""
+
+    # Seconds a new backend instance gets to boot, install and answer on
+    # its app port (stock AMIs install the runtime at boot)
+    instance_ready_timeout: int = 1200
+
+    # IAM instance profile for backend instances; needs SSM access
+    # (AmazonSSMManagedInstanceCore) for setup_nginx_proxy to reach them,
+    # and autoscaling:CompleteLifecycleAction for Auto Scaling warm pools
+    instance_profile_name: str = ""
+
+    # Executor pools for blocking work called from async tools
+    executor_aws_workers: int = 32
+    executor_build_workers: int = 4
+
+    # Background jobs for deploy tools (finished jobs kept for get_job)
+    max_concurrent_jobs: int = 4
+    job_history: int = 100
+
+    # Metrics: recent spans kept for get_metrics, optional JSONL span log
+    metrics_recent_spans: int = 200
+    metrics_jsonl: Optional[Path] = None
 
     class Config:
         env_file = ".env"
@@ -29,15 +76,6 @@ class Settings(BaseSettings):
 
 settings = Settings()
 
-# Create state directory safely
-settings.state_dir.mkdir(parents=True, exist_ok=True)
-
-# Configure boto3 to use our credentials (ONLY if provided)
-if settings.aws_access_key_id and settings.aws_secret_access_key:
-    import boto3
-
-    boto3.setup_default_session(
-        aws_access_key_id=settings.aws_access_key_id,
-        aws_secret_access_key=settings.aws_secret_access_key,
-        region_name=settings.aws_default_region,
-    )
+# The state directory is created by the state backends on first use, and
+# the boto3 session by mcp_server.aws on first client, so importing this
+# module does no disk or AWS setup work.
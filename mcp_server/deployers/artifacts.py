@@ -0,0 +1,148 @@
+"""Locally built, dependency-complete backend artifacts staged in S3"""
+import hashlib
+import tarfile
+from pathlib import Path
+from typing import Dict, Optional
+
+from botocore.exceptions import ClientError
+
+from .utils import clone_repo, checkout_commit
+from ..aws import get_client
+from ..config import settings
+from ..executors import run_blocking, run_command
+
+# SigV4 presigned URLs are valid for at most 7 days
+PRESIGN_SECONDS = 7 * 24 * 3600
+
+
+class ArtifactStore:
+    """Builds app tarballs once per revision and stages them in S3
+
+    A Node.js artifact holds the app with production node_modules; a
+    Python artifact holds the app plus a wheelhouse of its requirements.
+    Instances download the tarball through a presigned URL, so they need
+    no AWS credentials of their own.
+    """
+
+    def __init__(self, region: str = "us-east-1"):
+        self.region = region
+        self.s3 = get_client("s3", region)
+
+    def bucket_name(self) -> str:
+        """Private staging bucket (configurable, default per account/region)"""
+
+        if settings.artifact_bucket:
+            return settings.artifact_bucket
+
+        account_id = get_client("sts", self.region).get_caller_identity()["Account"]
+        return f"aws-agent-artifacts-{account_id}-{self.region}"
+
+    def ensure_bucket(self, bucket_name: str) -> None:
+        """Create the staging bucket if it does not exist yet"""
+
+        try:
+            self.s3.head_bucket(Bucket=bucket_name)
+            return
+        except ClientError:
+            pass
+
+        if self.region == "us-east-1":
+            self.s3.create_bucket(Bucket=bucket_name)
+        else:
+            self.s3.create_bucket(
+                Bucket=bucket_name,
+                CreateBucketConfiguration={"LocationConstraint": self.region},
+            )
+
+        self.s3.put_bucket_tagging(
+            Bucket=bucket_name,
+            Tagging={"TagSet": [{"Key": "ManagedBy", "Value": "aws-agent"}]},
+        )
+
+    @staticmethod
+    def artifact_key(repo_url: str, commit: str, app_type: str) -> str:
+        repo_id = hashlib.sha256(repo_url.encode()).hexdigest()[:12]
+        return f"{app_type}/{repo_id}/{commit}.tar.gz"
+
+    def exists(self, bucket_name: str, key: str) -> bool:
+        try:
+            self.s3.head_object(Bucket=bucket_name, Key=key)
+            return True
+        except ClientError:
+            return False
+
+    def presign(self, bucket_name: str, key: str) -> str:
+        return self.s3.generate_presigned_url(
+            "get_object",
+            Params={"Bucket": bucket_name, "Key": key},
+            ExpiresIn=PRESIGN_SECONDS,
+        )
+
+    async def install_dependencies(self, app_path: Path, app_type: str) -> None:
+        """Resolve dependencies locally so instances don't have to"""
+
+        if app_type == "nodejs":
+            if (app_path / "package-lock.json").exists():
+                args = ["npm", "ci", "--omit=dev"]
+            else:
+                args = ["npm", "install", "--omit=dev"]
+        elif app_type == "python":
+            args = ["pip", "wheel", "-r", "requirements.txt", "-w", "wheelhouse"]
+        else:
+            raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
+
+        result = await run_command(args, cwd=str(app_path))
+        if result.returncode != 0:
+            raise RuntimeError(f"{' '.join(args)} failed: {result.stderr[-2000:]}")
+
+    @staticmethod
+    def pack(app_path: Path, archive: Path) -> int:
+        """Tar and gzip the app (without .git); returns the archive size"""
+
+        with tarfile.open(archive, "w:gz") as tar:
+            for child in sorted(app_path.iterdir()):
+                if child.name != ".git":
+                    tar.add(child, arcname=child.name)
+
+        return archive.stat().st_size
+
+    async def build_and_stage(
+        self,
+        repo_url: str,
+        commit: str,
+        app_type: str,
+        work_dir: Path,
+    ) -> Dict:
+        """Return a presigned URL for the revision's artifact, building it if needed"""
+
+        bucket_name = await run_blocking(self.bucket_name)
+        key = self.artifact_key(repo_url, commit, app_type)
+        info: Dict[str, Optional[object]] = {
+            "bucket": bucket_name,
+            "key": key,
+            "commit": commit,
+            "reused": True,
+        }
+
+        await run_blocking(self.ensure_bucket, bucket_name)
+
+        if not await run_blocking(self.exists, bucket_name, key):
+            print(f"   Building artifact for {commit[:12]}...")
+            app_path = await run_blocking(
+                clone_repo, repo_url, work_dir / "app", mode="shallow", pool="build"
+            )
+            await run_blocking(checkout_commit, app_path, commit, pool="build")
+            await self.install_dependencies(app_path, app_type)
+
+            archive = work_dir / "artifact.tar.gz"
+            size = await run_blocking(self.pack, app_path, archive, pool="build")
+            await run_blocking(
+                self.s3.upload_file, str(archive), bucket_name, key
+            )
+            info.update(reused=False, size_bytes=size)
+            print(f"   ✓ Staged s3://{bucket_name}/{key} ({size / 1024 / 1024:.1f}MB)")
+        else:
+            print(f"   ✓ Reusing staged artifact s3://{bucket_name}/{key}")
+
+        info["url"] = await run_blocking(self.presign, bucket_name, key)
+        return info
@@ -0,0 +1,163 @@
+"""Content-addressed on-disk cache for build inputs and outputs"""
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Union
+
+
+# One lock per cache root, shared by every ArtifactCache on that directory,
+# so the index read-modify-write cycles of different instances serialize
+_root_locks: Dict[Path, threading.Lock] = {}
+_root_locks_guard = threading.Lock()
+
+
+def _lock_for(root: Path) -> threading.Lock:
+    with _root_locks_guard:
+        return _root_locks.setdefault(root.resolve(), threading.Lock())
+
+
+def _dir_size(path: Path) -> int:
+    """Total size in bytes of the regular files under a directory"""
+
+    total = 0
+    for root, dirs, files in os.walk(path):
+        for file in files:
+            file_path = Path(root) / file
+            if not file_path.is_symlink():
+                total += file_path.stat().st_size
+    return total
+
+
+class ArtifactCache:
+    """Directory cache keyed by content hashes, capped by total size
+
+    Each entry is a directory stored under <root>/<key>/data. An index
+    tracks entry sizes and last-use times so the least recently used
+    entries are evicted once the cache grows past max_bytes.
+    """
+
+    def __init__(self, root: Path, max_bytes: int):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.root.mkdir(parents=True, exist_ok=True)
+        self._lock = _lock_for(self.root)
+        self._index_file = self.root / "index.json"
+        self._index = self._read_index()
+
+    @staticmethod
+    def key_for(*parts: Union[str, bytes]) -> str:
+        """Build a cache key from any number of string/bytes inputs"""
+
+        digest = hashlib.sha256()
+        for part in parts:
+            if isinstance(part, str):
+                part = part.encode()
+            digest.update(hashlib.sha256(part).digest())
+        return digest.hexdigest()
+
+    def _read_index(self) -> Dict:
+        if self._index_file.exists():
+            with open(self._index_file, "r") as f:
+                return json.load(f)
+        return {
+            "entries": {},
+            "stats": {"hits": 0, "misses": 0, "evictions": 0, "evicted_bytes": 0},
+        }
+
+    def _write_index(self) -> None:
+        tmp_file = self._index_file.with_name(
+            f"index.{os.getpid()}.{threading.get_ident()}.tmp"
+        )
+        with open(tmp_file, "w") as f:
+            json.dump(self._index, f)
+        os.replace(tmp_file, self._index_file)
+
+    def _entry_dir(self, key: str) -> Path:
+        return self.root / key / "data"
+
+    def contains(self, key: str) -> bool:
+        """Whether an entry exists, without counting a hit or miss"""
+
+        with self._lock:
+            self._index = self._read_index()
+            return key in self._index["entries"] and self._entry_dir(key).exists()
+
+    def restore(self, key: str, dest: Path) -> bool:
+        """Copy a cached entry to dest; returns False on a cache miss"""
+
+        with self._lock:
+            self._index = self._read_index()
+            entry = self._index["entries"].get(key)
+            if entry is None or not self._entry_dir(key).exists():
+                self._index["entries"].pop(key, None)
+                self._index["stats"]["misses"] += 1
+                self._write_index()
+                return False
+
+            entry["last_used"] = time.time()
+            self._index["stats"]["hits"] += 1
+            self._write_index()
+
+        if dest.exists():
+            shutil.rmtree(dest)
+        shutil.copytree(self._entry_dir(key), dest, symlinks=True)
+        return True
+
+    def store(self, key: str, src: Path) -> None:
+        """Add a directory to the cache under key, evicting old entries"""
+
+        entry_root = self.root / key
+        staging = self.root / f".{key}.{os.getpid()}.{threading.get_ident()}"
+
+        shutil.copytree(src, staging / "data", symlinks=True)
+        size = _dir_size(staging)
+
+        with self._lock:
+            self._index = self._read_index()
+            if entry_root.exists():
+                shutil.rmtree(entry_root)
+            os.replace(staging, entry_root)
+
+            now = time.time()
+            self._index["entries"][key] = {
+                "size": size,
+                "created": now,
+                "last_used": now,
+            }
+            self._evict(keep=key)
+            self._write_index()
+
+    def _evict(self, keep: Optional[str] = None) -> None:
+        """Drop least recently used entries until under the size cap"""
+
+        entries = self._index["entries"]
+        total = sum(entry["size"] for entry in entries.values())
+
+        for key in sorted(entries, key=lambda k: entries[k]["last_used"]):
+            if total <= self.max_bytes:
+                break
+            if key == keep:
+                continue
+
+            size = entries.pop(key)["size"]
+            shutil.rmtree(self.root / key, ignore_errors=True)
+            total -= size
+            self._index["stats"]["evictions"] += 1
+            self._index["stats"]["evicted_bytes"] += size
+
+    def stats(self) -> Dict:
+        """Hit/miss/eviction counters plus current footprint"""
+
+        with self._lock:
+            self._index = self._read_index()
+            entries = self._index["entries"]
+            return {
+                **self._index["stats"],
+                "entries": len(entries),
+                "size_bytes": sum(entry["size"] for entry in entries.values()),
+                "max_bytes": self.max_bytes,
+            }
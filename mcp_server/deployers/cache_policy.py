@@ -0,0 +1,87 @@
+"""Cache-Control rules for uploaded frontend assets"""
+import re
+from fnmatch import fnmatch
+from typing import Dict, Optional
+
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+NO_CACHE = "no-cache"
+
+# Entry points that must always be revalidated so new deploys are picked up
+NO_CACHE_PATTERNS = [
+    "index.html",
+    "*.html",
+    "service-worker.js",
+    "sw.js",
+    "*/service-worker.js",
+    "*/sw.js",
+    "manifest.json",
+    "asset-manifest.json",
+]
+
+# Next.js content-addresses everything under _next/static/, including
+# CSS named by a bare hash (_next/static/css/8e1b3f2a9c4d5e6f.css)
+NEXT_STATIC = re.compile(r"(^|/)_next/static/")
+
+# Other build tools put a content hash in the filename of what they emit
+# under these directories: 8+ hex digits (main.3f2a1b9c.chunk.js) or
+# Vite's 8 base64url characters (index-BxQzKtRa.js, which may have no digit)
+BUILD_ASSET = re.compile(
+    r"(^|/)(static|assets)/(.*/)?"
+    r"(?P<stem>[^/]+?)(\.chunk)?\.[A-Za-z0-9]+$"
+)
+HEX_HASH = re.compile(r"(^|[.-])[0-9a-f]{8,}$")
+BASE64URL_HASH = re.compile(r"(^|[.-])(?P<hash>[A-Za-z0-9_-]{8})$")
+
+# Names like Regular400, banner20, arrow-24 or IMG_2024 fit the base64url
+# shape but are a word plus a number, not a hash
+WORD_AND_NUMBER = re.compile(r"([A-Za-z][a-z]*|[A-Z]+)([_-]?[0-9]+)?")
+
+
+def is_fingerprinted(key: str) -> bool:
+    """Whether a key's name carries a build tool's content hash"""
+
+    if NEXT_STATIC.search(key):
+        return True
+
+    match = BUILD_ASSET.search(key)
+    if not match:
+        return False
+
+    stem = match.group("stem")
+    if HEX_HASH.search(stem):
+        return True
+
+    candidate = BASE64URL_HASH.search(stem)
+    return bool(candidate) and not WORD_AND_NUMBER.fullmatch(candidate.group("hash"))
+
+
+class CachePolicy:
+    """Picks a Cache-Control header for each S3 key
+
+    Overrides are glob patterns (matched against the whole key) checked in
+    order before the built-in rules. An empty header means "send none".
+    """
+
+    def __init__(
+        self,
+        overrides: Optional[Dict[str, str]] = None,
+        default: Optional[str] = None,
+    ):
+        self.overrides = overrides or {}
+        self.default = default
+
+    def header_for(self, key: str) -> Optional[str]:
+        """Cache-Control value for a key, or None to leave it unset"""
+
+        for pattern, header in self.overrides.items():
+            if fnmatch(key, pattern):
+                return header or None
+
+        if any(fnmatch(key, pattern) for pattern in NO_CACHE_PATTERNS):
+            return NO_CACHE
+
+        if is_fingerprinted(key):
+            return IMMUTABLE
+
+        return self.default
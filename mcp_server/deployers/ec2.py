@@ -1,9 +1,16 @@
 """EC2 Deployment Engine"""
 import time
+import base64
+import random
 import asyncio
 from typing import Dict, List, Optional
-import boto3
+import httpx
 from botocore.exceptions import ClientError
+from ..aws import get_client
+from ..config import settings
+from ..executors import run_blocking
+from ..models.images import image_key, load_image
+from .nginx import install_script
 
 
 class EC2Deployer:
@@ -32,18 +39,23 @@ class EC2Deployer:
         "eu-central-1": "ami-0084a47cc718c111a",
     }
     
+    # describe_instances accepts at most 200 values per filter
+    DESCRIBE_BATCH_SIZE = 200
+    
     def __init__(self, region: str = "us-east-1"):
         self.region = region
-        self.ec2 = boto3.client('ec2', region_name=region)
-        self.ec2_resource = boto3.resource('ec2', region_name=region)
+        self.ec2 = get_client('ec2', region)
+        self.last_readiness: Dict = {}
+    
+    def default_vpc_id(self) -> str:
+        vpcs = self.ec2.describe_vpcs(Filters=[{'Name': 'isDefault', 'Values': ['true']}])
+        return vpcs['Vpcs'][0]['VpcId']
     
     def create_security_group(self, name: str, ports: List[int]) -> str:
         """Create security group with specified ports open"""
         
         try:
-            # Get default VPC
-            vpcs = self.ec2.describe_vpcs(Filters=[{'Name': 'isDefault', 'Values': ['true']}])
-            vpc_id = vpcs['Vpcs'][0]['VpcId']
+            vpc_id = self.default_vpc_id()
             
             response = self.ec2.create_security_group(
                 GroupName=name,
@@ -60,8 +72,11 @@ class EC2Deployer:
             
             sg_id = response['GroupId']
             
-            # Wait a bit for the security group to be available
-            time.sleep(2)
+            # Wait for the security group to be visible before using it
+            self.ec2.get_waiter('security_group_exists').wait(
+                GroupIds=[sg_id],
+                WaiterConfig={'Delay': 1, 'MaxAttempts': 30}
+            )
             
             # Add ingress rules
             ip_permissions = []
@@ -90,17 +105,95 @@ class EC2Deployer:
                 return groups['SecurityGroups'][0]['GroupId']
             raise
     
-    def generate_user_data_nodejs(self, repo_url: str, port: int) -> str:
-        """Generate user data script for Node.js application"""
+    def set_public_ports(
+        self,
+        security_group_id: str,
+        open_ports: List[int],
+        close_ports: List[int] = ()
+    ) -> None:
+        """Open ports to 0.0.0.0/0 and close others; already-applied rules are fine"""
+        
+        for port in open_ports:
+            try:
+                self.ec2.authorize_security_group_ingress(
+                    GroupId=security_group_id,
+                    IpPermissions=[{
+                        'IpProtocol': 'tcp',
+                        'FromPort': port,
+                        'ToPort': port,
+                        'IpRanges': [{'CidrIp': '0.0.0.0/0', 'Description': f'Allow port {port}'}]
+                    }]
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidPermission.Duplicate':
+                    raise
+        
+        for port in close_ports:
+            try:
+                self.ec2.revoke_security_group_ingress(
+                    GroupId=security_group_id,
+                    IpPermissions=[{
+                        'IpProtocol': 'tcp',
+                        'FromPort': port,
+                        'ToPort': port,
+                        'IpRanges': [{'CidrIp': '0.0.0.0/0'}]
+                    }]
+                )
+            except ClientError as e:
+                if e.response['Error']['Code'] != 'InvalidPermission.NotFound':
+                    raise
+    
+    def allow_from_group(self, security_group_id: str, source_group_id: str, port: int) -> None:
+        """Open port to members of another security group (e.g. a load balancer)"""
+        
+        try:
+            self.ec2.authorize_security_group_ingress(
+                GroupId=security_group_id,
+                IpPermissions=[{
+                    'IpProtocol': 'tcp',
+                    'FromPort': port,
+                    'ToPort': port,
+                    'UserIdGroupPairs': [{
+                        'GroupId': source_group_id,
+                        'Description': f'Allow port {port} from {source_group_id}'
+                    }]
+                }]
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] != 'InvalidPermission.Duplicate':
+                raise
+    
+    def delete_security_group(self, security_group_id: str, timeout: int = 300) -> None:
+        """Delete a security group, waiting out instances and interfaces still using it"""
         
-        return f"""#!/bin/bash
+        deadline = time.time() + timeout
+        while True:
+            try:
+                self.ec2.delete_security_group(GroupId=security_group_id)
+                return
+            except ClientError as e:
+                code = e.response['Error']['Code']
+                if code == 'InvalidGroup.NotFound':
+                    return
+                if code != 'DependencyViolation' or time.time() > deadline:
+                    raise
+            time.sleep(10)
+    
+    # User data is assembled from sections so that a golden AMI can bake
+    # the slow ones (system upgrade, toolchain, optionally the app itself)
+    # and instances launched from it only run what is left.
+    
+    USER_DATA_HEADER = """#!/bin/bash
 set -e
 
 # Logging
 exec > >(tee /var/log/user-data.log|logger -t user-data -s 2>/dev/console) 2>&1
 
 echo "Starting deployment at $(date)"
-
+"""
+    
+    PROVISION_SCRIPTS = {
+        "nodejs": """
 # Update system
 apt-get update
 DEBIAN_FRONTEND=noninteractive apt-get upgrade -y
@@ -112,35 +205,106 @@ apt-get install -y nodejs git build-essential
 # Verify installation
 node --version
 npm --version
+""",
+        "python": """
+# Update and install Python
+apt-get update
+DEBIAN_FRONTEND=noninteractive apt-get upgrade -y
+apt-get install -y python3 python3-pip python3-venv git
+""",
+    }
+    
+    INSTALL_SCRIPTS = {
+        "nodejs": """
+# Install dependencies
+npm install --production
+""",
+        "python": """
+# Create virtual environment
+python3 -m venv venv
+source venv/bin/activate
+
+# Install dependencies
+pip install --upgrade pip
+pip install -r requirements.txt
+""",
+    }
+    
+    def _fetch_script(self, app_type: str, repo_url: str, commit: Optional[str] = None) -> str:
+        """Clone the repository into /home/ubuntu/app and install dependencies
 
+        With commit, the checkout is pinned to that revision rather than
+        whatever HEAD is by the time the instance boots.
+        """
+        
+        checkout = f"git checkout --quiet {commit}\n" if commit else ""
+        return f"""
 # Clone repository
 cd /home/ubuntu
 rm -rf app
 git clone {repo_url} app
 cd app
+{checkout}{self.INSTALL_SCRIPTS[app_type]}"""
+    
+    # Finishing an unpacked artifact: dependencies are already in it
+    ARTIFACT_INSTALL_SCRIPTS = {
+        "nodejs": """
+# Rebuild native addons for this platform (no-op for pure JS deps)
+npm rebuild || true
+""",
+        "python": """
+# Install from the shipped wheelhouse, falling back to the index
+python3 -m venv venv
+venv/bin/pip install --no-index --find-links wheelhouse -r requirements.txt \\
+    || venv/bin/pip install -r requirements.txt
+""",
+    }
 
-# Install dependencies
-npm install --production
+    def _download_script(self, app_type: str, artifact_url: str) -> str:
+        """Unpack a pre-built artifact into /home/ubuntu/app"""
 
+        return f"""
+# Download pre-built application artifact
+cd /home/ubuntu
+rm -rf app
+mkdir app
+cd app
+curl -fsSL --retry 5 '{artifact_url}' | tar xz
+{self.ARTIFACT_INSTALL_SCRIPTS[app_type]}"""
+
+    def _service_script(self, app_type: str, port: int) -> str:
+        """Write the app's environment and systemd unit, then start it"""
+        
+        if app_type == "nodejs":
+            env_file = f"""
 # Create environment file
-cat > .env <<EOF
+cat > /home/ubuntu/app/.env <<EOF
 PORT={port}
 NODE_ENV=production
 EOF
-
+"""
+            description = "Backend Application"
+            environment = f"Environment=PORT={port}\nEnvironment=NODE_ENV=production"
+            exec_start = "/usr/bin/npm start"
+        else:
+            env_file = ""
+            description = "Python Backend"
+            environment = f"Environment=PORT={port}"
+            exec_start = "/home/ubuntu/app/venv/bin/python app.py"
+        
+        return f"""{env_file}
 # Create systemd service
 cat > /etc/systemd/system/app.service <<EOF
 [Unit]
-Description=Backend Application
+Description={description}
 After=network.target
 
 [Service]
 Type=simple
 User=ubuntu
 WorkingDirectory=/home/ubuntu/app
-Environment=PORT={port}
-Environment=NODE_ENV=production
-ExecStart=/usr/bin/npm start
+{environment}
+ExecStart={exec_start}
 Restart=always
 RestartSec=10
 
@@ -154,7 +318,7 @@ chown -R ubuntu:ubuntu /home/ubuntu/app
 # Start service
 systemctl daemon-reload
 systemctl enable app
-systemctl start app
+systemctl restart app
 
 # Wait and check status
 sleep 10
@@ -163,84 +327,318 @@ systemctl status app --no-pager
 echo "Deployment completed at $(date)"
 """
     
+    def generate_user_data(
+        self,
+        app_type: str,
+        repo_url: str,
+        port: int,
+        provisioned: bool = False,
+        app_baked: bool = False,
+        artifact_url: Optional[str] = None,
+        proxy_config: Optional[str] = None,
+        commit: Optional[str] = None,
+    ) -> str:
+        """Generate the user data script for a Node.js or Python application
+
+        provisioned: the AMI already has the runtime toolchain installed.
+        app_baked: the AMI already holds the app and its dependencies.
+        artifact_url: download this pre-built tarball instead of cloning
+        and installing dependencies on the instance.
+        proxy_config: nginx site config to put in front of the app.
+        commit: revision to check out after cloning.
+        """
+        
+        if app_type not in self.PROVISION_SCRIPTS:
+            raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
+        
+        script = self.USER_DATA_HEADER
+        if not (provisioned or app_baked):
+            script += self.PROVISION_SCRIPTS[app_type]
+        if not app_baked:
+            if artifact_url:
+                script += self._download_script(app_type, artifact_url)
+            else:
+                script += self._fetch_script(app_type, repo_url, commit)
+        script += self._service_script(app_type, port)
+        if proxy_config:
+            script += install_script(proxy_config)
+        
+        return script
+    
+    def generate_user_data_nodejs(self, repo_url: str, port: int) -> str:
+        """Generate user data script for Node.js application"""
+        
+        return self.generate_user_data("nodejs", repo_url, port)
+    
     def generate_user_data_python(self, repo_url: str, port: int) -> str:
         """Generate user data script for Python application"""
         
-        return f"""#!/bin/bash
-set -e
-
-exec > >(tee /var/log/user-data.log|logger -t user-data -s 2>/dev/console) 2>&1
+        return self.generate_user_data("python", repo_url, port)
+    
+    # Files whose change means dependencies must be reinstalled
+    DEPENDENCY_FILES = {
+        "nodejs": ["package.json", "package-lock.json", "npm-shrinkwrap.json", "yarn.lock"],
+        "python": ["requirements.txt"],
+    }
+    
+    # In-place updates run over SSM as root; "::phase <name>" lines in
+    # their output mark progress
+    UPDATE_HEADER = """set -e
+export HOME=/root
+cd /home/ubuntu/app
+"""
+    
+    def _restart_script(self, port: int, health_path: Optional[str] = None) -> str:
+        """Restart the app and wait until it answers locally"""
+        
+        return f"""
+echo "::phase restart"
+chown -R ubuntu:ubuntu /home/ubuntu/app
+systemctl restart app
+# Any HTTP answer will do, unless there is a health path to pass
+curl -sS {'-f ' if health_path else ''}-o /dev/null --retry 30 --retry-delay 1 --retry-connrefused \\
+    http://127.0.0.1:{port}{health_path or '/'}
+systemctl is-active app
+"""
+    
+    def generate_update_script(
+        self,
+        app_type: str,
+        commit: str,
+        port: int,
+        health_path: Optional[str] = None
+    ) -> str:
+        """Check out commit in the instance's git checkout and restart the app
+        
+        Dependencies are reinstalled only when one of DEPENDENCY_FILES
+        differs between the running and the new revision.
+        """
+        
+        if app_type not in self.INSTALL_SCRIPTS:
+            raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
+        
+        dependency_files = " ".join(self.DEPENDENCY_FILES[app_type])
+        return self.UPDATE_HEADER + f"""
+git config --global --add safe.directory /home/ubuntu/app
 
-echo "Starting Python deployment at $(date)"
+echo "::phase fetch"
+git fetch --quiet --depth 1 origin {commit}
+CHANGED=$(git diff --name-only HEAD {commit} -- {dependency_files})
+git checkout --quiet --force {commit}
 
-# Update and install Python
-apt-get update
-DEBIAN_FRONTEND=noninteractive apt-get upgrade -y
-apt-get install -y python3 python3-pip python3-venv git
+if [ -n "$CHANGED" ]; then
+    echo "::phase install"
+{self.INSTALL_SCRIPTS[app_type]}
+else
+    echo "::phase install_skipped"
+fi
+""" + self._restart_script(port, health_path)
+    
+    def generate_artifact_update_script(
+        self,
+        app_type: str,
+        artifact_url: str,
+        port: int,
+        health_path: Optional[str] = None
+    ) -> str:
+        """Unpack a pre-built artifact next to the app, swap it in and restart"""
+        
+        if app_type not in self.ARTIFACT_INSTALL_SCRIPTS:
+            raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
+        
+        return self.UPDATE_HEADER + f"""
+echo "::phase fetch"
+rm -rf /home/ubuntu/app.new /home/ubuntu/app.old
+mkdir /home/ubuntu/app.new
+curl -fsSL --retry 5 '{artifact_url}' | tar xz -C /home/ubuntu/app.new
+cp -a /home/ubuntu/app/.env /home/ubuntu/app.new/ 2>/dev/null || true
 
-# Clone repository
+echo "::phase install"
+cd /home/ubuntu/app.new
+{self.ARTIFACT_INSTALL_SCRIPTS[app_type]}
 cd /home/ubuntu
-rm -rf app
-git clone {repo_url} app
+mv app app.old
+mv app.new app
 cd app
+""" + self._restart_script(port, health_path) + """
+rm -rf /home/ubuntu/app.old
+"""
+    
+    def generate_bake_script(
+        self,
+        app_type: str,
+        repo_url: Optional[str] = None,
+        commit: Optional[str] = None
+    ) -> str:
+        """User data for a bake instance: provision, optionally fetch the app, power off"""
+        
+        if app_type not in self.PROVISION_SCRIPTS:
+            raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
+        
+        script = self.USER_DATA_HEADER + self.PROVISION_SCRIPTS[app_type]
+        if repo_url:
+            script += self._fetch_script(app_type, repo_url, commit)
+            script += "\nchown -R ubuntu:ubuntu /home/ubuntu/app\n"
+        
+        return script + """
+# Trim the image and stop so it can be snapshotted
+apt-get clean
+rm -rf /var/lib/apt/lists/*
+echo "Bake completed at $(date)"
+shutdown -h now
+"""
+    
+    def resolve_ami(self, app_type: str, revision: Optional[str] = None) -> Dict:
+        """Pick the best AMI: app revision image, runtime image, then stock Ubuntu"""
+        
+        candidates = []
+        if revision:
+            candidates.append(("app", image_key(self.region, app_type, revision)))
+        candidates.append(("runtime", image_key(self.region, app_type)))
+        
+        for kind, key in candidates:
+            image = load_image(key)
+            if image:
+                return {"ami_id": image["ami_id"], "kind": kind}
+        
+        ami_id = self.AMIS.get(self.region)
+        if not ami_id:
+            raise ValueError(f"No AMI configured for region {self.region}")
+        
+        return {"ami_id": ami_id, "kind": "stock"}
+    
+    def bake_ami(
+        self,
+        app_type: str,
+        repo_url: Optional[str] = None,
+        revision: Optional[str] = None,
+        instance_type: str = "t3.small",
+        timeout: int = 1800,
+    ) -> Dict:
+        """Build and register a golden AMI for a runtime (and optionally an app revision)
 
-# Create virtual environment
-python3 -m venv venv
-source venv/bin/activate
-
-# Install dependencies
-pip install --upgrade pip
-pip install -r requirements.txt
-
-# Create systemd service
-cat > /etc/systemd/system/app.service <<EOF
-[Unit]
-Description=Python Backend
-After=network.target
-
-[Service]
-Type=simple
-User=ubuntu
-WorkingDirectory=/home/ubuntu/app
-Environment=PORT={port}
-ExecStart=/home/ubuntu/app/venv/bin/python app.py
-Restart=always
-RestartSec=10
-
-[Install]
-WantedBy=multi-user.target
-EOF
-
-chown -R ubuntu:ubuntu /home/ubuntu/app
-
-systemctl daemon-reload
-systemctl enable app
-systemctl start app
-
-sleep 10
-systemctl status app --no-pager
+        Launches a stock instance that provisions itself and powers off, then
+        snapshots it into an AMI and terminates it. Blocks until the image is
+        available.
+        """
+        
+        source_ami = self.AMIS.get(self.region)
+        if not source_ami:
+            raise ValueError(f"No AMI configured for region {self.region}")
+        
+        label = revision[:12] if revision else "runtime"
+        name = f"aws-agent-{app_type}-{label}-{int(time.time())}"
+        
+        response = self.ec2.run_instances(
+            ImageId=source_ami,
+            InstanceType=instance_type,
+            MinCount=1,
+            MaxCount=1,
+            UserData=self.generate_bake_script(app_type, repo_url, revision),
+            InstanceInitiatedShutdownBehavior='stop',
+            TagSpecifications=[{
+                'ResourceType': 'instance',
+                'Tags': [
+                    {'Key': 'Name', 'Value': f"{name}-builder"},
+                    {'Key': 'ManagedBy', 'Value': 'aws-agent'}
+                ]
+            }]
+        )
+        instance_id = response['Instances'][0]['InstanceId']
+        print(f"   Bake instance: {instance_id}")
+        
+        waiter_config = {'Delay': 15, 'MaxAttempts': max(timeout // 15, 1)}
+        
+        try:
+            # The bake script powers the instance off once provisioning is done
+            self.ec2.get_waiter('instance_stopped').wait(
+                InstanceIds=[instance_id],
+                WaiterConfig=waiter_config
+            )
+            
+            image = self.ec2.create_image(
+                InstanceId=instance_id,
+                Name=name,
+                Description=f"aws-agent golden image for {app_type}",
+                TagSpecifications=[{
+                    'ResourceType': 'image',
+                    'Tags': [
+                        {'Key': 'Name', 'Value': name},
+                        {'Key': 'ManagedBy', 'Value': 'aws-agent'},
+                        {'Key': 'Runtime', 'Value': app_type},
+                        {'Key': 'Revision', 'Value': revision or ''}
+                    ]
+                }]
+            )
+            ami_id = image['ImageId']
+            print(f"   Registering AMI {ami_id}...")
+            
+            self.ec2.get_waiter('image_available').wait(
+                ImageIds=[ami_id],
+                WaiterConfig=waiter_config
+            )
+        finally:
+            self.ec2.terminate_instances(InstanceIds=[instance_id])
+        
+        return {
+            "ami_id": ami_id,
+            "name": name,
+            "region": self.region,
+            "runtime": app_type,
+            "repo_url": repo_url,
+            "revision": revision,
+            "source_ami": source_ami,
+        }
 
-echo "Python deployment completed at $(date)"
-"""
+    @staticmethod
+    def _instance_profile() -> Dict:
+        """IamInstanceProfile argument, when one is configured"""
+        
+        if not settings.instance_profile_name:
+            return {}
+        return {'IamInstanceProfile': {'Name': settings.instance_profile_name}}
     
     def launch_instance(
         self,
         name: str,
         instance_type: str,
         security_group_id: str,
-        user_data: str
+        user_data: str,
+        ami_id: Optional[str] = None
     ) -> Dict:
-        """Launch EC2 instance"""
+        """Launch EC2 instance (from ami_id, or the region's stock Ubuntu AMI)"""
         
-        ami_id = self.AMIS.get(self.region)
+        return self.launch_instances(
+            name, instance_type, security_group_id, user_data, ami_id=ami_id
+        )[0]
+    
+    def launch_instances(
+        self,
+        name: str,
+        instance_type: str,
+        security_group_id: str,
+        user_data: str,
+        count: int = 1,
+        subnet_id: Optional[str] = None,
+        ami_id: Optional[str] = None
+    ) -> List[Dict]:
+        """Launch count identical instances with one run_instances call
+        
+        subnet_id pins them to that subnet's availability zone; otherwise
+        EC2 picks a default subnet.
+        """
+        
+        ami_id = ami_id or self.AMIS.get(self.region)
         if not ami_id:
             raise ValueError(f"No AMI configured for region {self.region}")
         
+        placement = {'SubnetId': subnet_id} if subnet_id else {}
+        
         response = self.ec2.run_instances(
             ImageId=ami_id,
             InstanceType=instance_type,
-            MinCount=1,
-            MaxCount=1,
+            MinCount=count,
+            MaxCount=count,
             SecurityGroupIds=[security_group_id],
             UserData=user_data,
             TagSpecifications=[{
@@ -251,51 +649,579 @@ echo "Python deployment completed at $(date)"
                 ]
             }],
             # Enable detailed monitoring for better metrics
-            Monitoring={'Enabled': True}
+            Monitoring={'Enabled': True},
+            **placement,
+            **self._instance_profile()
         )
         
-        return response['Instances'][0]
+        return response['Instances']
     
-    async def wait_for_instance(self, instance_id: str, timeout: int = 600) -> str:
-        """Wait for instance to be running and return public IP"""
+    async def launch_across_zones(
+        self,
+        subnets: List[str],
+        count: int,
+        **launch_args
+    ) -> List[Dict]:
+        """Spread count instances round-robin over subnets (one per zone)
         
-        print(f"⏳ Waiting for instance {instance_id} to start...")
-        start_time = time.time()
+        A run_instances call places all its instances in one subnet, so
+        there is one call per zone used, issued concurrently.
+        """
+        
+        counts = {}
+        for i in range(count):
+            subnet = subnets[i % len(subnets)]
+            counts[subnet] = counts.get(subnet, 0) + 1
+        
+        batches = await asyncio.gather(*(
+            run_blocking(self.launch_instances, count=n, subnet_id=subnet, **launch_args)
+            for subnet, n in counts.items()
+        ), return_exceptions=True)
+        
+        launched = [
+            instance
+            for batch in batches if not isinstance(batch, BaseException)
+            for instance in batch
+        ]
+        failures = [batch for batch in batches if isinstance(batch, BaseException)]
+        if failures:
+            # All or nothing: instances in the zones that did launch would
+            # otherwise run unrecorded
+            if launched:
+                await run_blocking(
+                    self.terminate_instances,
+                    [instance['InstanceId'] for instance in launched]
+                )
+            raise failures[0]
+        
+        return launched
+    
+    def terminate_instances(self, instance_ids: List[str]) -> None:
+        self.ec2.terminate_instances(InstanceIds=instance_ids)
+    
+    def allocate_address(self, name: str) -> Dict:
+        """Allocate an Elastic IP; returns its allocation ID and address"""
+        
+        response = self.ec2.allocate_address(
+            Domain='vpc',
+            TagSpecifications=[{
+                'ResourceType': 'elastic-ip',
+                'Tags': [
+                    {'Key': 'Name', 'Value': name},
+                    {'Key': 'ManagedBy', 'Value': 'aws-agent'}
+                ]
+            }]
+        )
+        return {
+            'allocation_id': response['AllocationId'],
+            'public_ip': response['PublicIp'],
+        }
+    
+    def release_address(self, allocation_id: str) -> None:
+        self.ec2.release_address(AllocationId=allocation_id)
+    
+    def associate_address(self, allocation_id: str, instance_id: str) -> None:
+        """Point an Elastic IP at instance_id, moving it off any other instance"""
+        
+        self.ec2.associate_address(
+            AllocationId=allocation_id,
+            InstanceId=instance_id,
+            AllowReassociation=True
+        )
+    
+    def default_subnets(self) -> List[str]:
+        """One default-VPC subnet per availability zone"""
+        
+        vpc_id = self.default_vpc_id()
+        
+        subnets = {}
+        paginator = self.ec2.get_paginator('describe_subnets')
+        for page in paginator.paginate(Filters=[{'Name': 'vpc-id', 'Values': [vpc_id]}]):
+            for subnet in page['Subnets']:
+                subnets.setdefault(subnet['AvailabilityZone'], subnet['SubnetId'])
+        
+        return [subnets[zone] for zone in sorted(subnets)]
+    
+    def create_launch_template(
+        self,
+        name: str,
+        instance_type: str,
+        security_group_id: str,
+        user_data: str,
+        ami_id: Optional[str] = None
+    ) -> Dict:
+        """Create a launch template equivalent to launch_instance's settings"""
+        
+        ami_id = ami_id or self.AMIS.get(self.region)
+        if not ami_id:
+            raise ValueError(f"No AMI configured for region {self.region}")
+        
+        response = self.ec2.create_launch_template(
+            LaunchTemplateName=name,
+            LaunchTemplateData={
+                'ImageId': ami_id,
+                'InstanceType': instance_type,
+                'SecurityGroupIds': [security_group_id],
+                # Launch templates take user data base64-encoded
+                'UserData': base64.b64encode(user_data.encode()).decode(),
+                'Monitoring': {'Enabled': True},
+                **self._instance_profile(),
+                'TagSpecifications': [{
+                    'ResourceType': 'instance',
+                    'Tags': [
+                        {'Key': 'Name', 'Value': name},
+                        {'Key': 'ManagedBy', 'Value': 'aws-agent'}
+                    ]
+                }],
+            },
+            TagSpecifications=[{
+                'ResourceType': 'launch-template',
+                'Tags': [{'Key': 'ManagedBy', 'Value': 'aws-agent'}]
+            }]
+        )
+        
+        return response['LaunchTemplate']
+    
+    # Launch lifecycle hook that warm pool instances complete once they serve
+    LAUNCH_HOOK = "aws-agent-ready"
+    
+    def lifecycle_script(self, group_name: str) -> str:
+        """Complete the group's launch lifecycle hook, now and on every boot
+        
+        Warm pool instances run user data once, when they first launch into
+        the pool; a scale-out later starts them and holds them in the hook
+        again, so a boot-time unit completes it after app.service is up.
+        Needs autoscaling:CompleteLifecycleAction on the instance profile.
+        """
+        
+        return f"""
+# Signal Auto Scaling that this instance is ready, now and on warm starts
+command -v aws >/dev/null 2>&1 || snap install aws-cli --classic
+cat > /usr/local/bin/aws-agent-ready <<'READY'
+#!/bin/bash
+TOKEN=$(curl -fsS -X PUT http://169.254.169.254/latest/api/token \\
+    -H 'X-aws-ec2-metadata-token-ttl-seconds: 300')
+meta() {{ curl -fsS -H "X-aws-ec2-metadata-token: $TOKEN" "http://169.254.169.254/latest/meta-data/$1"; }}
+# Fails harmlessly when the instance isn't waiting in the hook
+aws autoscaling complete-lifecycle-action \\
+    --region "$(meta placement/region)" \\
+    --auto-scaling-group-name {group_name} \\
+    --lifecycle-hook-name {self.LAUNCH_HOOK} \\
+    --instance-id "$(meta instance-id)" \\
+    --lifecycle-action-result CONTINUE || true
+READY
+chmod +x /usr/local/bin/aws-agent-ready
+cat > /etc/systemd/system/aws-agent-ready.service <<EOF
+[Unit]
+Description=Complete the Auto Scaling launch lifecycle hook
+After=app.service network-online.target
+Wants=network-online.target
+
+[Service]
+Type=oneshot
+ExecStart=/usr/local/bin/aws-agent-ready
+
+[Install]
+WantedBy=multi-user.target
+EOF
+systemctl daemon-reload
+systemctl enable aws-agent-ready
+/usr/local/bin/aws-agent-ready
+"""
+    
+    def create_autoscaling_group(
+        self,
+        name: str,
+        launch_template_id: str,
+        min_size: int,
+        max_size: int,
+        subnet_ids: List[str],
+        target_cpu: int,
+        warm_pool_size: int = 0,
+        target_group_arns: Optional[List[str]] = None
+    ) -> Dict:
+        """Create an Auto Scaling group with a CPU target-tracking policy
+        
+        With warm_pool_size, that many instances are launched, run their
+        user data (install and first start) and are kept stopped, so a
+        scale-out only pays for a start rather than a full boot and install.
+        The group then holds launching instances in LAUNCH_HOOK until their
+        user data (see lifecycle_script) completes it, so none is stopped
+        into the pool, or put in service, before the app is installed.
+        """
+        
+        autoscaling = get_client('autoscaling', self.region)
+        
+        group = {
+            'AutoScalingGroupName': name,
+            'LaunchTemplate': {'LaunchTemplateId': launch_template_id, 'Version': '$Latest'},
+            'MinSize': min_size,
+            'MaxSize': max_size,
+            'DesiredCapacity': min_size,
+            'VPCZoneIdentifier': ','.join(subnet_ids),
+            'HealthCheckGracePeriod': 300,
+            'Tags': [
+                {'Key': 'Name', 'Value': name, 'PropagateAtLaunch': True},
+                {'Key': 'ManagedBy', 'Value': 'aws-agent', 'PropagateAtLaunch': True}
+            ]
+        }
+        if target_group_arns:
+            group['TargetGroupARNs'] = target_group_arns
+            group['HealthCheckType'] = 'ELB'
+        if warm_pool_size:
+            group['LifecycleHookSpecificationList'] = [{
+                'LifecycleHookName': self.LAUNCH_HOOK,
+                'LifecycleTransition': 'autoscaling:EC2_INSTANCE_LAUNCHING',
+                # Room for a full install on a stock AMI; instances that
+                # never finish are abandoned rather than put in service
+                'HeartbeatTimeout': 1800,
+                'DefaultResult': 'ABANDON',
+            }]
+        
+        autoscaling.create_auto_scaling_group(**group)
+        
+        policy = autoscaling.put_scaling_policy(
+            AutoScalingGroupName=name,
+            PolicyName=f"{name}-cpu-{target_cpu}",
+            PolicyType='TargetTrackingScaling',
+            TargetTrackingConfiguration={
+                'PredefinedMetricSpecification': {
+                    'PredefinedMetricType': 'ASGAverageCPUUtilization'
+                },
+                'TargetValue': float(target_cpu),
+            }
+        )
         
-        while time.time() - start_time < timeout:
-            response = self.ec2.describe_instances(InstanceIds=[instance_id])
-            instance = response['Reservations'][0]['Instances'][0]
+        if warm_pool_size:
+            autoscaling.put_warm_pool(
+                AutoScalingGroupName=name,
+                MinSize=warm_pool_size,
+                PoolState='Stopped',
+                # Instances go back to the pool on scale-in instead of
+                # being terminated and rebuilt next time
+                InstanceReusePolicy={'ReuseOnScaleIn': True}
+            )
+        
+        return {
+            'group_name': name,
+            'policy_arn': policy.get('PolicyARN'),
+        }
+    
+    def delete_autoscaling_group(
+        self,
+        group_name: str,
+        launch_template_name: str,
+        timeout: int = 600
+    ) -> None:
+        """Force-delete a group (terminating its instances) and its launch template
+        
+        Either may be missing. Blocks until the group is gone, so both
+        names can be reused right away.
+        """
+        
+        autoscaling = get_client('autoscaling', self.region)
+        
+        try:
+            autoscaling.delete_auto_scaling_group(
+                AutoScalingGroupName=group_name,
+                ForceDelete=True
+            )
+        except ClientError as e:
+            # A deletion already in progress is waited out below
+            if (e.response['Error']['Code'] != 'ScalingActivityInProgress'
+                    and 'not found' not in str(e).lower()):
+                raise
+        
+        deadline = time.time() + timeout
+        while autoscaling.describe_auto_scaling_groups(
+            AutoScalingGroupNames=[group_name]
+        )['AutoScalingGroups']:
+            if time.time() > deadline:
+                raise TimeoutError(f"Auto Scaling group {group_name} not deleted within {timeout}s")
+            time.sleep(5)
+        
+        templates = self.ec2.describe_launch_templates(
+            Filters=[{'Name': 'launch-template-name', 'Values': [launch_template_name]}]
+        )['LaunchTemplates']
+        for template in templates:
+            self.ec2.delete_launch_template(LaunchTemplateId=template['LaunchTemplateId'])
+    
+    def group_instance_ids(self, group_name: str) -> List[str]:
+        """IDs of a group's in-service instances (not its warm pool)"""
+        
+        groups = get_client('autoscaling', self.region).describe_auto_scaling_groups(
+            AutoScalingGroupNames=[group_name]
+        )['AutoScalingGroups']
+        if not groups:
+            return []
+        return [
+            instance['InstanceId']
+            for instance in groups[0]['Instances']
+            if instance['LifecycleState'] == 'InService'
+        ]
+    
+    def swap_target_group(self, group_name: str, old_arn: str, new_arn: str) -> None:
+        """Move an Auto Scaling group's instances from one target group to another"""
+        
+        autoscaling = get_client('autoscaling', self.region)
+        autoscaling.attach_load_balancer_target_groups(
+            AutoScalingGroupName=group_name,
+            TargetGroupARNs=[new_arn]
+        )
+        autoscaling.detach_load_balancer_target_groups(
+            AutoScalingGroupName=group_name,
+            TargetGroupARNs=[old_arn]
+        )
+    
+    def update_launch_template(
+        self,
+        launch_template_id: str,
+        user_data: str,
+        ami_id: Optional[str] = None
+    ) -> None:
+        """Add a launch template version with new user data (and image)
+        
+        Groups launch '$Latest', so every instance they launch from now on
+        (scale-outs, replacements) boots it.
+        """
+        
+        data = {'UserData': base64.b64encode(user_data.encode()).decode()}
+        if ami_id:
+            data['ImageId'] = ami_id
+        
+        self.ec2.create_launch_template_version(
+            LaunchTemplateId=launch_template_id,
+            SourceVersion='$Latest',
+            LaunchTemplateData=data
+        )
+    
+    def start_instance_refresh(self, group_name: str) -> str:
+        """Start replacing a group's instances; returns the refresh ID
+        
+        Replacements (warm pool included) come from the latest template
+        version, while 90% of capacity stays healthy.
+        """
+        
+        response = get_client('autoscaling', self.region).start_instance_refresh(
+            AutoScalingGroupName=group_name,
+            Strategy='Rolling',
+            Preferences={'MinHealthyPercentage': 90, 'InstanceWarmup': 300}
+        )
+        return response['InstanceRefreshId']
+    
+    def refresh_autoscaling_group(
+        self,
+        group_name: str,
+        launch_template_id: str,
+        user_data: str,
+        ami_id: Optional[str] = None
+    ) -> str:
+        """Roll an Auto Scaling group onto new user data; returns the refresh ID"""
+        
+        self.update_launch_template(launch_template_id, user_data, ami_id)
+        return self.start_instance_refresh(group_name)
+    
+    async def wait_for_running(self, instance_id: str, deadline: float) -> str:
+        """Poll with exponential backoff until running; return the public IP"""
+        
+        delay = 2.0
+        last_state = None
+        
+        while time.time() < deadline:
+            try:
+                response = await run_blocking(
+                    self.ec2.describe_instances, InstanceIds=[instance_id]
+                )
+                instance = response['Reservations'][0]['Instances'][0]
+            except ClientError as e:
+                # Fresh instance IDs take a moment to become visible to
+                # describe calls (eventual consistency)
+                if e.response['Error']['Code'] != 'InvalidInstanceID.NotFound':
+                    raise
+                instance = {'State': {'Name': 'pending'}}
             
             state = instance['State']['Name']
-            print(f"   Instance state: {state}")
+            if state != last_state:
+                print(f"   Instance state: {state}")
+                last_state = state
+            
+            if state in ('shutting-down', 'terminated', 'stopping', 'stopped'):
+                reason = instance.get('StateReason', {}).get('Message', 'unknown')
+                raise RuntimeError(
+                    f"Instance {instance_id} entered state '{state}' while starting: {reason}"
+                )
+            
+            public_ip = instance.get('PublicIpAddress')
+            if state == 'running' and public_ip:
+                return public_ip
             
-            if state == 'running':
-                public_ip = instance.get('PublicIpAddress')
-                if public_ip:
-                    print(f"✓ Instance running at {public_ip}")
-                    print(f"⏳ Waiting 60s for application to start...")
-                    # Give user data script time to run
-                    await asyncio.sleep(60)
-                    return public_ip
+            await asyncio.sleep(min(delay, max(deadline - time.time(), 0)))
+            delay = min(delay * 1.5, 15.0)
+        
+        raise TimeoutError(
+            f"Instance {instance_id} did not reach 'running' with a public IP "
+            f"(last state: {last_state})"
+        )
+    
+    async def probe_app(
+        self,
+        host: str,
+        port: int,
+        deadline: float,
+        health_path: Optional[str] = None,
+    ) -> Dict:
+        """Probe the app port (TCP, then optional HTTP path) until it answers"""
+        
+        delay = 1.0
+        attempts = 0
+        last_error = "no probe attempted"
+        tcp_open = False
+        
+        while time.time() < deadline:
+            attempts += 1
+            try:
+                _, writer = await asyncio.wait_for(
+                    asyncio.open_connection(host, port), timeout=3
+                )
+                writer.close()
+                tcp_open = True
+                
+                if not health_path:
+                    return {"attempts": attempts, "tcp_open": True}
+                
+                async with httpx.AsyncClient(timeout=5) as client:
+                    response = await client.get(f"http://{host}:{port}{health_path}")
+                if response.status_code < 500:
+                    return {
+                        "attempts": attempts,
+                        "tcp_open": True,
+                        "http_status": response.status_code,
+                    }
+                last_error = f"GET {health_path} returned HTTP {response.status_code}"
+            except (OSError, asyncio.TimeoutError) as e:
+                last_error = f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+            except Exception as e:
+                last_error = f"{type(e).__name__}: {e}"
             
-            await asyncio.sleep(10)
+            # Jitter keeps concurrent deploys from probing in lockstep
+            await asyncio.sleep(
+                min(random.uniform(delay / 2, delay), max(deadline - time.time(), 0))
+            )
+            delay = min(delay * 2, 10.0)
+        
+        raise TimeoutError(
+            f"{host}:{port} not ready after {attempts} probes "
+            f"(tcp_open={tcp_open}, last error: {last_error})"
+        )
+    
+    def get_console_tail(self, instance_id: str, lines: int = 20) -> str:
+        """Last lines of the instance console output, for diagnostics"""
+        
+        try:
+            response = self.ec2.get_console_output(InstanceId=instance_id, Latest=True)
+        except ClientError:
+            return ""
+        
+        return "\n".join(response.get('Output', '').splitlines()[-lines:])
+    
+    async def wait_for_instance(
+        self,
+        instance_id: str,
+        timeout: Optional[int] = None,
+        port: Optional[int] = None,
+        health_path: Optional[str] = None,
+    ) -> str:
+        """Wait for instance to be running (and its app to answer); return public IP
+        
+        When port is given, the app is probed until it accepts connections
+        (and, with health_path, answers HTTP without a 5xx). timeout
+        defaults to settings.instance_ready_timeout. Timing details are
+        kept in self.last_readiness.
+        """
+        
+        timeout = timeout or settings.instance_ready_timeout
+        print(f"⏳ Waiting for instance {instance_id} to start...")
+        start_time = time.time()
+        deadline = start_time + timeout
+        
+        public_ip = await self.wait_for_running(instance_id, deadline)
+        running_at = time.time()
+        print(f"✓ Instance running at {public_ip} ({running_at - start_time:.0f}s)")
+        
+        self.last_readiness = {
+            "seconds_to_running": round(running_at - start_time, 1),
+        }
+        
+        if port is None:
+            return public_ip
         
-        raise TimeoutError(f"Instance {instance_id} did not start within {timeout}s")
+        target = f"{public_ip}:{port}{health_path or ''}"
+        print(f"⏳ Probing application at {target}...")
+        try:
+            probe = await self.probe_app(public_ip, port, deadline, health_path)
+        except TimeoutError as e:
+            console = await run_blocking(self.get_console_tail, instance_id)
+            diagnosis = (
+                f"Application on {instance_id} not ready within {timeout}s: {e}. "
+                f"Instance was running after {running_at - start_time:.0f}s; "
+                f"check /var/log/user-data.log and 'journalctl -u app' on the instance."
+            )
+            if console:
+                diagnosis += f"\nConsole output (tail):\n{console}"
+            raise TimeoutError(diagnosis) from e
+        
+        ready_at = time.time()
+        self.last_readiness.update(probe)
+        self.last_readiness["seconds_to_ready"] = round(ready_at - start_time, 1)
+        print(f"✓ Application answering at {target} ({ready_at - start_time:.0f}s)")
+        
+        return public_ip
     
     def estimate_cost(self, instance_type: str) -> float:
         """Estimate monthly cost for instance type"""
         return self.INSTANCE_COSTS.get(instance_type, 0.0)
     
+    @staticmethod
+    def _instance_summary(instance: Dict) -> Dict:
+        return {
+            'instance_id': instance['InstanceId'],
+            'state': instance['State']['Name'],
+            'public_ip': instance.get('PublicIpAddress'),
+            'instance_type': instance['InstanceType'],
+            'launch_time': instance['LaunchTime'].isoformat()
+        }
+    
     def get_instance_info(self, instance_id: str) -> Dict:
         """Get current instance information"""
         
         response = self.ec2.describe_instances(InstanceIds=[instance_id])
         instance = response['Reservations'][0]['Instances'][0]
         
-        return {
-            'instance_id': instance_id,
-            'state': instance['State']['Name'],
-            'public_ip': instance.get('PublicIpAddress'),
-            'instance_type': instance['InstanceType'],
-            'launch_time': instance['LaunchTime'].isoformat()
-        }
\ No newline at end of file
+        return self._instance_summary(instance)
+    
+    def get_instances_info(self, instance_ids: List[str]) -> Dict[str, Dict]:
+        """Get information for many instances with as few API calls as possible
+        
+        IDs are sent as an instance-id filter in batches of
+        DESCRIBE_BATCH_SIZE (the per-filter value limit) and each batch is
+        paginated. Unlike InstanceIds, a filter doesn't fail the whole call
+        when one instance no longer exists; missing IDs are simply absent
+        from the result.
+        """
+        
+        unique_ids = list(dict.fromkeys(instance_ids))
+        paginator = self.ec2.get_paginator('describe_instances')
+        instances = {}
+        
+        for start in range(0, len(unique_ids), self.DESCRIBE_BATCH_SIZE):
+            batch = unique_ids[start:start + self.DESCRIBE_BATCH_SIZE]
+            pages = paginator.paginate(
+                Filters=[{'Name': 'instance-id', 'Values': batch}],
+                PaginationConfig={'PageSize': 1000},
+            )
+            for page in pages:
+                for reservation in page['Reservations']:
+                    for instance in reservation['Instances']:
+                        instances[instance['InstanceId']] = self._instance_summary(instance)
+        
+        return instances
\ No newline at end of file
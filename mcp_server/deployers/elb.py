@@ -0,0 +1,174 @@
+"""Application Load Balancers in front of backend instances"""
+import asyncio
+import re
+import time
+from typing import Dict, List, Optional
+from ..aws import get_client
+from ..executors import run_blocking
+
+
+class LoadBalancerDeployer:
+    """Creates and manages an ALB, its target group and listener"""
+
+    # us-east-1 hourly rate plus a light LCU load, USD/month
+    MONTHLY_COST = 16.43
+
+    # Load balancer and target group names are limited to 32 characters
+    MAX_NAME_LENGTH = 32
+
+    TAGS = [{'Key': 'ManagedBy', 'Value': 'aws-agent'}]
+
+    def __init__(self, region: str = "us-east-1"):
+        self.region = region
+        self.elb = get_client('elbv2', region)
+
+    @classmethod
+    def resource_name(cls, name: str, suffix: str) -> str:
+        """A valid ELB resource name: alphanumerics and hyphens, max 32"""
+
+        base = re.sub(r'[^A-Za-z0-9-]', '-', name).strip('-')
+        base = base[:cls.MAX_NAME_LENGTH - len(suffix) - 1].rstrip('-')
+        return f"{base}-{suffix}"
+
+    def create_target_group(
+        self,
+        name: str,
+        vpc_id: str,
+        port: int,
+        health_path: Optional[str] = None
+    ) -> str:
+        """Create an instance target group on port; returns its ARN"""
+
+        response = self.elb.create_target_group(
+            Name=name,
+            Protocol='HTTP',
+            Port=port,
+            VpcId=vpc_id,
+            TargetType='instance',
+            HealthCheckProtocol='HTTP',
+            HealthCheckPath=health_path or '/',
+            HealthCheckIntervalSeconds=10,
+            HealthyThresholdCount=2,
+            UnhealthyThresholdCount=3,
+            # Without a health path any answer below 500 means the app is up
+            Matcher={'HttpCode': '200-399' if health_path else '200-499'},
+            Tags=self.TAGS
+        )
+        arn = response['TargetGroups'][0]['TargetGroupArn']
+
+        # Connection draining: how long deregistered targets keep serving
+        # in-flight requests
+        self.elb.modify_target_group_attributes(
+            TargetGroupArn=arn,
+            Attributes=[{'Key': 'deregistration_delay.timeout_seconds', 'Value': '30'}]
+        )
+        return arn
+
+    def create_load_balancer(
+        self,
+        name: str,
+        subnet_ids: List[str],
+        security_group_id: str
+    ) -> Dict:
+        """Create an internet-facing ALB; returns its ARN and DNS name"""
+
+        response = self.elb.create_load_balancer(
+            Name=name,
+            Subnets=subnet_ids,
+            SecurityGroups=[security_group_id],
+            Scheme='internet-facing',
+            Type='application',
+            IpAddressType='ipv4',
+            Tags=self.TAGS
+        )
+        balancer = response['LoadBalancers'][0]
+        return {
+            'arn': balancer['LoadBalancerArn'],
+            'dns_name': balancer['DNSName'],
+        }
+
+    def create_listener(self, load_balancer_arn: str, target_group_arn: str, port: int = 80) -> str:
+        """Forward HTTP on port to the target group; returns the listener ARN"""
+
+        response = self.elb.create_listener(
+            LoadBalancerArn=load_balancer_arn,
+            Protocol='HTTP',
+            Port=port,
+            DefaultActions=[{'Type': 'forward', 'TargetGroupArn': target_group_arn}]
+        )
+        return response['Listeners'][0]['ListenerArn']
+
+    def forward_listener(self, listener_arn: str, target_group_arn: str) -> None:
+        """Point a listener's default action at another target group"""
+
+        self.elb.modify_listener(
+            ListenerArn=listener_arn,
+            DefaultActions=[{'Type': 'forward', 'TargetGroupArn': target_group_arn}]
+        )
+
+    def delete_load_balancer(self, load_balancer_arn: str) -> None:
+        """Delete a load balancer (and its listeners) and wait until it is gone"""
+
+        self.elb.delete_load_balancer(LoadBalancerArn=load_balancer_arn)
+        self.elb.get_waiter('load_balancers_deleted').wait(
+            LoadBalancerArns=[load_balancer_arn],
+            WaiterConfig={'Delay': 5, 'MaxAttempts': 60}
+        )
+
+    def delete_target_group(self, target_group_arn: str) -> None:
+        self.elb.delete_target_group(TargetGroupArn=target_group_arn)
+
+    def register_targets(self, target_group_arn: str, instance_ids: List[str]) -> None:
+        self.elb.register_targets(
+            TargetGroupArn=target_group_arn,
+            Targets=[{'Id': instance_id} for instance_id in instance_ids]
+        )
+
+    def deregister_targets(self, target_group_arn: str, instance_ids: List[str]) -> None:
+        self.elb.deregister_targets(
+            TargetGroupArn=target_group_arn,
+            Targets=[{'Id': instance_id} for instance_id in instance_ids]
+        )
+
+    def wait_deregistered(self, target_group_arn: str, instance_ids: List[str]) -> None:
+        """Block until deregistered targets have finished draining"""
+
+        self.elb.get_waiter('target_deregistered').wait(
+            TargetGroupArn=target_group_arn,
+            Targets=[{'Id': instance_id} for instance_id in instance_ids],
+            WaiterConfig={'Delay': 5, 'MaxAttempts': 60}
+        )
+
+    def target_health(self, target_group_arn: str) -> Dict[str, str]:
+        """Health state of every registered target, by instance ID"""
+
+        response = self.elb.describe_target_health(TargetGroupArn=target_group_arn)
+        return {
+            target['Target']['Id']: target['TargetHealth']['State']
+            for target in response['TargetHealthDescriptions']
+        }
+
+    async def wait_healthy(
+        self,
+        target_group_arn: str,
+        instance_ids: List[str],
+        timeout: int = 600
+    ) -> Dict[str, str]:
+        """Wait until every instance passes the target group health check"""
+
+        deadline = time.time() + timeout
+        delay = 2.0
+        health: Dict[str, str] = {}
+
+        while time.time() < deadline:
+            health = await run_blocking(self.target_health, target_group_arn)
+            if all(health.get(instance_id) == 'healthy' for instance_id in instance_ids):
+                return health
+
+            await asyncio.sleep(min(delay, max(deadline - time.time(), 0)))
+            delay = min(delay * 1.5, 15.0)
+
+        pending = {i: health.get(i, 'unregistered') for i in instance_ids if health.get(i) != 'healthy'}
+        raise TimeoutError(
+            f"Targets not healthy within {timeout}s: {pending}"
+        )
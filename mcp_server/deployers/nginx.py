@@ -0,0 +1,102 @@
+"""nginx reverse proxy configuration for backend instances"""
+from pathlib import Path
+from typing import Dict, List, Optional
+
+from jinja2 import Environment, FileSystemLoader, StrictUndefined
+
+TEMPLATES_DIR = Path(__file__).resolve().parent.parent / "templates"
+
+APP_DIR = "/home/ubuntu/app"
+CONFIG_PATH = "/etc/nginx/sites-available/app.conf"
+
+# Public ports once nginx fronts the app (plain HTTP; no TLS is configured)
+PROXY_PORTS = [80]
+
+_environment: Optional[Environment] = None
+
+
+def _template():
+    global _environment
+
+    if _environment is None:
+        _environment = Environment(
+            loader=FileSystemLoader(str(TEMPLATES_DIR)),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            keep_trailing_newline=True,
+            undefined=StrictUndefined,
+        )
+    return _environment.get_template("nginx.conf.j2")
+
+
+def normalize_routes(routes: Optional[List[Dict]], app_port: int) -> List[Dict]:
+    """Fill in route defaults; no routes proxies everything to the app
+
+    Each route has a path and either proxies to upstream_port (default:
+    the app's port, optionally micro-cached for cache_seconds) or serves
+    static_dir (relative to the app checkout) directly from disk.
+    """
+
+    if not routes:
+        routes = [{"path": "/"}]
+
+    normalized = []
+    for route in routes:
+        path = route.get("path", "/")
+        if not path.startswith("/"):
+            raise ValueError(f"Route path must start with '/': {path!r}")
+
+        static_dir = route.get("static_dir")
+        if static_dir:
+            static_dir = static_dir.rstrip("/")
+            if not static_dir.startswith("/"):
+                static_dir = f"{APP_DIR}/{static_dir}"
+            # alias maps the location prefix onto the directory, so both
+            # need the trailing slash
+            path = path.rstrip("/") + "/"
+
+        normalized.append({
+            "path": path,
+            "upstream_port": int(route.get("upstream_port") or app_port),
+            "static_dir": static_dir,
+            "cache_seconds": int(route.get("cache_seconds") or 0),
+        })
+
+    return normalized
+
+
+def render_config(routes: List[Dict]) -> str:
+    """Render the site config for normalized routes"""
+
+    proxied = [route for route in routes if not route["static_dir"]]
+    return _template().render(
+        routes=routes,
+        upstream_ports=sorted({route["upstream_port"] for route in proxied}),
+        micro_cache=any(route["cache_seconds"] for route in proxied),
+    )
+
+
+def install_script(config: str) -> str:
+    """Shell that installs nginx if needed, writes config and reloads
+
+    Used both as a user data section and as an SSM command.
+    """
+
+    return f"""
+# Install nginx and apply the reverse proxy config
+if ! command -v nginx >/dev/null 2>&1; then
+    apt-get update
+    DEBIAN_FRONTEND=noninteractive apt-get install -y nginx
+fi
+mkdir -p /var/cache/nginx/app
+# Let nginx's worker read static files under the app checkout
+chmod o+x /home/ubuntu
+cat > {CONFIG_PATH} <<'NGINX_CONF'
+{config}NGINX_CONF
+ln -sf {CONFIG_PATH} /etc/nginx/sites-enabled/app.conf
+rm -f /etc/nginx/sites-enabled/default
+nginx -t
+systemctl enable nginx
+systemctl reload nginx || systemctl restart nginx
+echo "nginx configured at $(date)"
+"""
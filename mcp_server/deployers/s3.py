@@ -1,22 +1,83 @@
 """S3 Deployment Engine"""
 
 import os
+import time
+import hashlib
 import subprocess
 import mimetypes
+import contextvars
 import json
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
-from typing import Dict, Optional
-import boto3
+from typing import Dict, List, Optional
+from boto3.s3.transfer import TransferConfig
 from botocore.exceptions import ClientError
 from .utils import clone_repo, cleanup_temp_dir
+from .compress import compress_plan, is_compressible, validate_encoding
+from .cache_policy import CachePolicy
+from .cache import ArtifactCache
+from ..aws import get_client
+from ..config import settings
+from ..executors import run_blocking, run_command
+from ..metrics import span
+
+MB = 1024 * 1024
+
+# Lockfiles that pin a complete node_modules tree, in order of preference
+LOCKFILES = ["package-lock.json", "npm-shrinkwrap.json", "yarn.lock", "pnpm-lock.yaml"]
+
+# Object kept in every bucket we deploy to, mapping each key to the
+# fingerprint of the content and headers last uploaded for it
+MANIFEST_KEY = ".aws-agent-manifest.json"
+
+
+def _file_md5(path: Path) -> str:
+    """MD5 hex digest of a file, matching S3's ETag for single-part uploads"""
+
+    digest = hashlib.md5()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(MB), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _fingerprint(item: Dict) -> str:
+    """Fingerprint of a planned upload: content hash plus object headers"""
+
+    fields = {"md5": item["md5"], "extra_args": item["extra_args"]}
+    if item.get("compression"):
+        fields["compression"] = item["compression"]
+
+    payload = json.dumps(fields, sort_keys=True)
+    return hashlib.sha256(payload.encode()).hexdigest()
 
 
 class S3Deployer:
     """Handles S3 static website deployment"""
 
-    def __init__(self, region: str = "us-east-1"):
+    def __init__(self, region: str = "us-east-1", max_workers: Optional[int] = None):
         self.region = region
-        self.s3 = boto3.client("s3", region_name=region)
+        self.max_workers = max_workers or settings.upload_max_workers
+
+        # Shared client whose connection pool is at least the worker count,
+        # so upload threads never wait on a connection. Its retries (with
+        # jittered backoff, per request so a multipart upload only resends
+        # the failed part) are the only retry layer for uploads.
+        self.s3 = get_client(
+            "s3",
+            region,
+            max_pool_connections=max(self.max_workers, settings.aws_max_pool_connections),
+            retries={"max_attempts": settings.upload_max_retries + 1, "mode": "standard"},
+        )
+        self.transfer_config = TransferConfig(
+            multipart_threshold=settings.upload_multipart_threshold_mb * MB,
+            multipart_chunksize=settings.upload_multipart_chunksize_mb * MB,
+            use_threads=False,
+        )
+        self.last_upload_stats: Dict = {}
+        self.last_compression_stats: Dict = {}
+        self.last_dependency_cache: Dict = {}
 
     def create_bucket(self, bucket_name: str) -> str:
         """Create S3 bucket with static website hosting"""
@@ -94,7 +155,55 @@ class S3Deployer:
                 return bucket_name
             raise
 
-    def build_app(self, repo_path: Path, build_command: str) -> Path:
+    async def dependency_cache_key(self, repo_path: Path) -> Optional[str]:
+        """Cache key for node_modules: lockfile contents plus Node version"""
+
+        lockfile = next(
+            (repo_path / name for name in LOCKFILES if (repo_path / name).exists()),
+            None,
+        )
+        if lockfile is None:
+            return None
+
+        try:
+            node_version = (await run_command(["node", "--version"])).stdout.strip()
+        except FileNotFoundError:
+            node_version = "unknown"
+
+        return ArtifactCache.key_for(
+            lockfile.name,
+            lockfile.read_bytes(),
+            node_version,
+            os.uname().sysname,
+            os.uname().machine,
+        )
+
+    async def install_dependencies(self, repo_path: Path) -> None:
+        """Run npm install, restoring/populating the node_modules cache"""
+
+        cache = ArtifactCache(
+            settings.cache_dir / "node_modules",
+            settings.dependency_cache_max_mb * MB,
+        )
+        key = await self.dependency_cache_key(repo_path)
+        node_modules = repo_path / "node_modules"
+
+        if key and await run_blocking(cache.restore, key, node_modules, pool="build"):
+            print("   ✓ Restored node_modules from cache, skipping npm install")
+            self.last_dependency_cache = {"hit": True, **cache.stats()}
+            return
+
+        # Install dependencies
+        result = await run_command(["npm", "install"], cwd=str(repo_path))
+
+        if result.returncode != 0:
+            print(f"⚠️  npm install warnings: {result.stderr}")
+        elif key and node_modules.exists():
+            await run_blocking(cache.store, key, node_modules, pool="build")
+
+        self.last_dependency_cache = {"hit": False, **cache.stats()}
+
+    async def build_app(self, repo_path: Path, build_command: str) -> Path:
         """Build the frontend application"""
 
         print("📦 Installing dependencies...")
@@ -115,16 +224,8 @@ class S3Deployer:
                 with open(package_json_path, "w") as f:
                     json.dump(package_data, f, indent=2)
 
-            # Install dependencies
-            result = subprocess.run(
-                ["npm", "install"],
-                cwd=repo_path,
-                capture_output=True,
-                text=True,
-            )
-
-            if result.returncode != 0:
-                print(f"⚠️  npm install warnings: {result.stderr}")
+            with span("dependencies"):
+                await self.install_dependencies(repo_path)
 
         print("🔨 Building application...")
 
@@ -132,13 +233,7 @@ class S3Deployer:
         env["PUBLIC_URL"] = "/"
         env["GENERATE_SOURCEMAP"] = "false"
 
-        result = subprocess.run(
-            build_command.split(),
-            cwd=repo_path,
-            capture_output=True,
-            text=True,
-            env=env,
-        )
+        result = await run_command(build_command.split(), cwd=str(repo_path), env=env)
 
         if result.returncode != 0:
             print(f"❌ Build failed: {result.stderr}")
@@ -146,6 +241,11 @@ class S3Deployer:
                 result.returncode, build_command, result.stderr
             )
 
+        return await run_blocking(self.locate_build_output, repo_path, pool="build")
+
+    def locate_build_output(self, repo_path: Path) -> Path:
+        """Find the build output directory and summarise its contents"""
+
         possible_build_dirs = ["build", "dist", "out", ".next/out", "public"]
         build_dir = None
 
@@ -200,11 +300,17 @@ class S3Deployer:
 
         return build_dir
 
-    def upload_directory(self, local_path: Path, bucket_name: str) -> int:
-        """Upload directory contents to S3 root (no nested folder)"""
+    def plan_upload(
+        self,
+        local_path: Path,
+        compression: Optional[str] = None,
+        cache_policy: Optional[CachePolicy] = None,
+    ) -> List[Dict]:
+        """Walk a build directory and describe every object to upload"""
 
-        file_count = 0
-        print("\n📤 Uploading to S3...")
+        validate_encoding(compression)
+        cache_policy = cache_policy or CachePolicy()
+        plan = []
 
         for root, dirs, files in os.walk(local_path):
             for file in files:
@@ -216,25 +322,237 @@ class S3Deployer:
                 if content_type is None:
                     content_type = "application/octet-stream"
 
-                self.s3.upload_file(
-                    str(local_file),
-                    bucket_name,
-                    s3_key,
-                    ExtraArgs={"ContentType": content_type},
+                item = {
+                    "path": local_file,
+                    "key": s3_key,
+                    "size": local_file.stat().st_size,
+                    "md5": _file_md5(local_file),
+                    "extra_args": {"ContentType": content_type},
+                }
+                cache_control = cache_policy.header_for(s3_key)
+                if cache_control:
+                    item["extra_args"]["CacheControl"] = cache_control
+                if compression and is_compressible(item, settings.compress_min_bytes):
+                    item["compression"] = compression
+
+                # Taken before compression rewrites the item, so it only
+                # depends on the source file and the requested settings
+                item["fingerprint"] = _fingerprint(item)
+                plan.append(item)
+
+        return plan
+
+    def _upload_compressed(self, plan: List[Dict], bucket_name: str) -> int:
+        """Compress the items marked for it, then upload the whole plan"""
+
+        with tempfile.TemporaryDirectory() as out_dir:
+            self.last_compression_stats = compress_plan(
+                plan, Path(out_dir), workers=settings.compress_workers or None
+            )
+
+            for ext, stats in sorted(self.last_compression_stats.items()):
+                print(
+                    f"   🗜️  {ext}: {stats['compressed_files']}/{stats['files']} files "
+                    f"compressed, ratio {stats['ratio']:.2f}"
                 )
 
-                file_count += 1
+            return self.upload_files(plan, bucket_name)
+
+    def _upload_file(self, item: Dict, bucket_name: str) -> int:
+        """Upload one planned file; transient failures are retried by the client"""
 
-                if file_count <= 5:
-                    print(f"   ✓ {s3_key}")
+        self.s3.upload_file(
+            str(item["path"]),
+            bucket_name,
+            item["key"],
+            ExtraArgs=item["extra_args"],
+            Config=self.transfer_config,
+        )
+        return item["size"]
+
+    def upload_files(self, plan: List[Dict], bucket_name: str) -> int:
+        """Upload planned files concurrently and record throughput stats"""
+
+        file_count = 0
+        byte_count = 0
+        start_time = time.time()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = {
+                # Each worker gets a copy of our context so its API calls
+                # count towards the caller's metrics span
+                pool.submit(contextvars.copy_context().run, self._upload_file, item, bucket_name): item
+                for item in plan
+            }
+
+            try:
+                for future in as_completed(futures):
+                    byte_count += future.result()
+                    file_count += 1
+
+                    if file_count <= 5:
+                        print(f"   ✓ {futures[future]['key']}")
+            except Exception:
+                for future in futures:
+                    future.cancel()
+                raise
 
         if file_count > 5:
             print(f"   ✓ ... and {file_count - 5} more files")
 
+        elapsed = max(time.time() - start_time, 1e-6)
+        self.last_upload_stats = {
+            "files": file_count,
+            "bytes": byte_count,
+            "seconds": round(elapsed, 3),
+            "files_per_sec": round(file_count / elapsed, 1),
+            "bytes_per_sec": round(byte_count / elapsed),
+            "workers": self.max_workers,
+        }
+
+        return file_count
+
+    def upload_directory(
+        self,
+        local_path: Path,
+        bucket_name: str,
+        compression: Optional[str] = None,
+        cache_policy: Optional[CachePolicy] = None,
+    ) -> int:
+        """Upload directory contents to S3 root (no nested folder)"""
+
+        print("\n📤 Uploading to S3...")
+
+        plan = self.plan_upload(local_path, compression, cache_policy)
+        file_count = self._upload_compressed(plan, bucket_name)
+        self.write_manifest(bucket_name, plan)
+
+        stats = self.last_upload_stats
         print(f"\n✓ Uploaded {file_count} files to bucket root")
+        print(
+            f"   {stats['files_per_sec']} files/s, "
+            f"{stats['bytes_per_sec'] / MB:.2f} MB/s "
+            f"({stats['workers']} workers)"
+        )
 
         return file_count
 
+    def list_objects(self, bucket_name: str) -> Dict[str, str]:
+        """Map every key in a bucket to its ETag with a single listing pass"""
+
+        objects = {}
+        paginator = self.s3.get_paginator("list_objects_v2")
+
+        for page in paginator.paginate(Bucket=bucket_name):
+            for obj in page.get("Contents", []):
+                objects[obj["Key"]] = obj["ETag"].strip('"')
+
+        return objects
+
+    def load_manifest(self, bucket_name: str) -> Optional[Dict[str, str]]:
+        """Load the content manifest stored in a bucket, if there is one"""
+
+        try:
+            response = self.s3.get_object(Bucket=bucket_name, Key=MANIFEST_KEY)
+        except ClientError as e:
+            if e.response["Error"]["Code"] in ("NoSuchKey", "404"):
+                return None
+            raise
+
+        return json.loads(response["Body"].read()).get("files", {})
+
+    def write_manifest(self, bucket_name: str, plan: List[Dict]) -> None:
+        """Record the fingerprint of every uploaded file in the bucket"""
+
+        manifest = {
+            "version": 1,
+            "files": {item["key"]: item["fingerprint"] for item in plan},
+        }
+
+        self.s3.put_object(
+            Bucket=bucket_name,
+            Key=MANIFEST_KEY,
+            Body=json.dumps(manifest).encode(),
+            ContentType="application/json",
+            CacheControl="no-cache",
+        )
+
+    def delete_objects(self, bucket_name: str, keys: List[str]) -> int:
+        """Delete keys from a bucket in batches of 1000 (the API maximum)"""
+
+        for i in range(0, len(keys), 1000):
+            batch = keys[i:i + 1000]
+            self.s3.delete_objects(
+                Bucket=bucket_name,
+                Delete={
+                    "Objects": [{"Key": key} for key in batch],
+                    "Quiet": True,
+                },
+            )
+
+        return len(keys)
+
+    def sync_directory(
+        self,
+        local_path: Path,
+        bucket_name: str,
+        compression: Optional[str] = None,
+        cache_policy: Optional[CachePolicy] = None,
+    ) -> int:
+        """Upload only changed files and delete stale ones from a bucket"""
+
+        print("\n🔄 Syncing with existing bucket...")
+
+        plan = self.plan_upload(local_path, compression, cache_policy)
+        remote = self.list_objects(bucket_name)
+        manifest = self.load_manifest(bucket_name)
+
+        changed = []
+        for item in plan:
+            if item["key"] not in remote:
+                changed.append(item)
+            elif manifest is not None:
+                if manifest.get(item["key"]) != item["fingerprint"]:
+                    changed.append(item)
+            elif remote[item["key"]] != item["md5"]:
+                # No manifest yet: fall back to comparing single-part ETags
+                changed.append(item)
+
+        local_keys = {item["key"] for item in plan}
+        stale = sorted(
+            key for key in remote
+            if key not in local_keys and key != MANIFEST_KEY
+        )
+
+        print(
+            f"   {len(changed)} changed, {len(stale)} stale, "
+            f"{len(plan) - len(changed)} unchanged"
+        )
+
+        self._upload_compressed(changed, bucket_name)
+        deleted = self.delete_objects(bucket_name, stale)
+        self.write_manifest(bucket_name, plan)
+
+        self.last_upload_stats.update({
+            "mode": "sync",
+            "unchanged": len(plan) - len(changed),
+            "uploaded": len(changed),
+            "deleted": deleted,
+        })
+
+        print(f"\n✓ Synced {len(plan)} files ({len(changed)} uploaded, {deleted} deleted)")
+
+        return len(plan)
+
+    def bucket_exists(self, bucket_name: str) -> bool:
+        """Check whether a bucket exists and is reachable with our credentials"""
+
+        try:
+            self.s3.head_bucket(Bucket=bucket_name)
+            return True
+        except ClientError:
+            return False
+
     def get_website_url(self, bucket_name: str) -> str:
         """Get the website URL for a bucket"""
 
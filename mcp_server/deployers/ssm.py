@@ -0,0 +1,134 @@
+"""Run shell scripts on running instances with SSM Run Command"""
+import asyncio
+import secrets
+import time
+from typing import Callable, Dict, List, Optional
+from botocore.exceptions import ClientError
+from ..aws import get_client
+from ..executors import run_blocking
+
+
+class SSMRunner:
+    """Sends AWS-RunShellScript commands and waits for their results
+
+    Instances need the SSM agent (preinstalled on the Ubuntu AMIs) and an
+    instance profile that allows it, see settings.instance_profile_name.
+    """
+
+    FINISHED = ("Success", "Failed", "Cancelled", "TimedOut")
+
+    def __init__(self, region: str = "us-east-1"):
+        self.region = region
+        self.ssm = get_client('ssm', region)
+
+    def managed_instances(self, instance_ids: List[str]) -> List[str]:
+        """Those of instance_ids whose SSM agent is online"""
+
+        paginator = self.ssm.get_paginator('describe_instance_information')
+        online = []
+        for page in paginator.paginate(
+            Filters=[{'Key': 'InstanceIds', 'Values': instance_ids}]
+        ):
+            for info in page['InstanceInformationList']:
+                if info.get('PingStatus') == 'Online':
+                    online.append(info['InstanceId'])
+        return online
+
+    def send_script(
+        self,
+        instance_ids: List[str],
+        script: str,
+        comment: str,
+        timeout_seconds: int = 600,
+        max_concurrency: Optional[int] = None
+    ) -> str:
+        """Start script under bash as root on the instances; returns the command ID
+
+        With max_concurrency, SSM runs on that many instances at a time and
+        stops at the first failure, so a bad script doesn't take down
+        every instance at once.
+        """
+
+        # AWS-RunShellScript uses /bin/sh (dash on Ubuntu); the script is
+        # written to a file rather than piped so that commands reading
+        # stdin can't swallow it
+        path = f"/tmp/aws-agent-{secrets.token_hex(4)}.sh"
+        wrapped = (
+            f"cat > {path} <<'AWS_AGENT_SCRIPT'\n{script}\nAWS_AGENT_SCRIPT\n"
+            f"bash {path}; status=$?; rm -f {path}; exit $status"
+        )
+
+        options = {}
+        if max_concurrency:
+            options = {'MaxConcurrency': str(max_concurrency), 'MaxErrors': '0'}
+
+        response = self.ssm.send_command(
+            InstanceIds=instance_ids,
+            DocumentName='AWS-RunShellScript',
+            Comment=comment[:100],
+            TimeoutSeconds=timeout_seconds,
+            Parameters={
+                'commands': [wrapped],
+                'executionTimeout': [str(timeout_seconds)],
+            },
+            **options
+        )
+        return response['Command']['CommandId']
+
+    def get_invocation(self, command_id: str, instance_id: str) -> Optional[Dict]:
+        """Current status and output, or None before the agent has picked it up"""
+
+        try:
+            response = self.ssm.get_command_invocation(
+                CommandId=command_id,
+                InstanceId=instance_id
+            )
+        except ClientError as e:
+            if e.response['Error']['Code'] == 'InvocationDoesNotExist':
+                return None
+            raise
+
+        return {
+            'status': response['Status'],
+            'response_code': response.get('ResponseCode'),
+            'stdout': response.get('StandardOutputContent', ''),
+            'stderr': response.get('StandardErrorContent', ''),
+        }
+
+    async def wait(
+        self,
+        command_id: str,
+        instance_id: str,
+        timeout: int = 600,
+        on_output: Optional[Callable[[str], None]] = None
+    ) -> Dict:
+        """Poll until the command finishes on instance_id
+
+        on_output is called with each new line of standard output as it
+        appears, so callers can relay progress.
+        """
+
+        deadline = time.time() + timeout
+        delay = 0.5
+        seen = 0
+        invocation = None
+
+        while time.time() < deadline:
+            invocation = await run_blocking(self.get_invocation, command_id, instance_id)
+            if invocation is not None:
+                lines = invocation['stdout'].splitlines()
+                if on_output:
+                    for line in lines[seen:]:
+                        on_output(line)
+                seen = max(seen, len(lines))
+                if invocation['status'] in self.FINISHED:
+                    return invocation
+
+            await asyncio.sleep(min(delay, max(deadline - time.time(), 0)))
+            delay = min(delay * 1.5, 3.0)
+
+        status = invocation['status'] if invocation else 'not delivered'
+        raise TimeoutError(
+            f"SSM command {command_id} on {instance_id} did not finish "
+            f"within {timeout}s (last status: {status})"
+        )
@@ -1,32 +1,142 @@
 """Utility functions for deployers"""
+import hashlib
 import tempfile
 import shutil
+import threading
 from pathlib import Path
-from typing import Optional
+from typing import Dict, Optional
 import git
+from ..config import settings
 
 
-def clone_repo(repo_url: str, target_dir: Optional[Path] = None) -> Path:
-    """Clone a git repository"""
+# Clone modes:
+#   full    - complete history and working tree
+#   shallow - depth-1, single-branch clone of the default branch
+#   sparse  - depth-1 clone without blobs or checkout; enough to list the
+#             files at the repository root (see detect_app_type)
+CLONE_MODES = ("full", "shallow", "sparse")
+
+_mirror_locks: Dict[str, threading.Lock] = {}
+_mirror_locks_guard = threading.Lock()
+
+
+def _mirror_lock(repo_url: str) -> threading.Lock:
+    with _mirror_locks_guard:
+        return _mirror_locks.setdefault(repo_url, threading.Lock())
+
+
+def update_mirror(repo_url: str) -> Path:
+    """Create or incrementally fetch the local bare mirror of a repository"""
+    
+    key = hashlib.sha256(repo_url.encode()).hexdigest()[:16]
+    mirror_path = settings.cache_dir / "git-mirrors" / f"{key}.git"
+    
+    with _mirror_lock(repo_url):
+        if mirror_path.exists():
+            git.Repo(mirror_path).git.remote("update", "--prune")
+        else:
+            mirror_path.parent.mkdir(parents=True, exist_ok=True)
+            git.Repo.clone_from(repo_url, mirror_path, mirror=True)
+    
+    return mirror_path
+
+
+def clone_repo(
+    repo_url: str,
+    target_dir: Optional[Path] = None,
+    mode: str = "full",
+    use_mirror: Optional[bool] = None,
+) -> Path:
+    """Clone a git repository
+    
+    With use_mirror (default: settings.git_mirror_cache) the clone is made
+    from a local bare mirror that is fetched incrementally on every call.
+    """
+    
+    if mode not in CLONE_MODES:
+        raise ValueError(f"Unknown clone mode '{mode}'. Supported: {', '.join(CLONE_MODES)}")
     
     if target_dir is None:
         target_dir = Path(tempfile.mkdtemp())
     
-    git.Repo.clone_from(repo_url, target_dir)
+    if use_mirror is None:
+        use_mirror = settings.git_mirror_cache
+    
+    # Shallow clones need a URL, not a plain path, to be honoured locally
+    source = update_mirror(repo_url).as_uri() if use_mirror else repo_url
+    
+    options = {}
+    if mode in ("shallow", "sparse"):
+        options.update(depth=1, single_branch=True)
+    if mode == "sparse":
+        options.update(no_checkout=True, filter="blob:none")
+    
+    repo = git.Repo.clone_from(source, target_dir, **options)
+    
+    if use_mirror:
+        repo.remote("origin").set_url(repo_url)
     
     return target_dir
 
 
+def resolve_commit(repo_url: str, ref: str = "HEAD") -> Optional[str]:
+    """Resolve a ref to its commit SHA without cloning (git ls-remote)"""
+    
+    try:
+        output = git.cmd.Git().ls_remote(repo_url, ref)
+    except git.GitCommandError:
+        return None
+    
+    for line in output.splitlines():
+        sha, _, name = line.partition("\t")
+        if name == ref:
+            return sha
+    
+    return None
+
+
+def checkout_commit(repo_path: Path, commit: str) -> None:
+    """Make sure a (possibly shallow) clone has a specific commit checked out"""
+
+    repo = git.Repo(repo_path)
+    if repo.head.commit.hexsha == commit:
+        return
+
+    repo.git.fetch("--depth", "1", "origin", commit)
+    repo.git.checkout(commit)
+
+
+def head_commit(repo_path: Path) -> str:
+    """Commit SHA checked out in a local clone"""
+    
+    return git.Repo(repo_path).head.commit.hexsha
+
+
+def root_files(repo_path: Path) -> set:
+    """Names at the repository root, read from git for sparse clones"""
+    
+    names = {path.name for path in repo_path.iterdir()}
+    
+    if names <= {".git"}:
+        # Nothing checked out: list the tree of HEAD instead
+        output = git.Repo(repo_path).git.ls_tree("--name-only", "HEAD")
+        names = set(output.splitlines())
+    
+    return names
+
+
 def detect_app_type(repo_path: Path) -> str:
     """Detect application type from repository contents"""
     
-    if (repo_path / "package.json").exists():
+    names = root_files(repo_path)
+    
+    if "package.json" in names:
         return "nodejs"
-    elif (repo_path / "requirements.txt").exists():
+    elif "requirements.txt" in names:
         return "python"
-    elif (repo_path / "go.mod").exists():
+    elif "go.mod" in names:
         return "go"
-    elif (repo_path / "Gemfile").exists():
+    elif "Gemfile" in names:
         return "ruby"
     else:
         return "unknown"
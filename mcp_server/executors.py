@@ -0,0 +1,113 @@
+"""Managed executors for blocking work called from async tools"""
+import asyncio
+import contextvars
+import functools
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+
+
+# aws:   boto3 API calls (network bound, many in flight)
+# build: git clones, cache copies and other disk-heavy work
+POOL_SIZES = {
+    "aws": lambda: settings.executor_aws_workers,
+    "build": lambda: settings.executor_build_workers,
+}
+
+_pools: Dict[str, ThreadPoolExecutor] = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name: str) -> ThreadPoolExecutor:
+    """Return the named executor, creating it on first use"""
+
+    with _pools_lock:
+        if name not in _pools:
+            if name not in POOL_SIZES:
+                raise ValueError(f"Unknown executor pool '{name}'")
+            _pools[name] = ThreadPoolExecutor(
+                max_workers=POOL_SIZES[name](),
+                thread_name_prefix=f"aws-agent-{name}",
+            )
+        return _pools[name]
+
+
+async def run_blocking(func: Callable, *args: Any, pool: str = "aws", **kwargs: Any) -> Any:
+    """Run a blocking callable in a managed pool without stalling the loop
+
+    The caller's contextvars are carried into the worker thread.
+    """
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    call = functools.partial(context.run, func, *args, **kwargs)
+    return await loop.run_in_executor(get_pool(pool), call)
+
+
+async def run_to_completion(step: Awaitable) -> Any:
+    """Await a step that creates resources, even if the task is cancelled meanwhile
+
+    step must not have started yet (pass a coroutine). A cancellation
+    (cancel_job) that arrives while it runs is held back until it is done
+    and then lands at the caller's next await, so the rollback handling it
+    knows what the step created. One already pending lands before the
+    step starts.
+    """
+
+    try:
+        await asyncio.sleep(0)
+    except asyncio.CancelledError:
+        if asyncio.iscoroutine(step):
+            step.close()
+        raise
+
+    task = asyncio.ensure_future(step)
+    try:
+        return await asyncio.shield(task)
+    except asyncio.CancelledError:
+        # A second cancellation while waiting here gives up on the step
+        result = await task
+        asyncio.current_task().cancel()
+        return result
+
+
+async def run_command(
+    args: List[str],
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+) -> subprocess.CompletedProcess:
+    """Run a subprocess asynchronously and capture its text output"""
+
+    process = await asyncio.create_subprocess_exec(
+        *args,
+        cwd=cwd,
+        env=env,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+
+    try:
+        stdout, stderr = await process.communicate()
+    except asyncio.CancelledError:
+        process.kill()
+        await process.wait()
+        raise
+
+    return subprocess.CompletedProcess(
+        args,
+        process.returncode,
+        stdout.decode(errors="replace"),
+        stderr.decode(errors="replace"),
+    )
+
+
+def shutdown_pools() -> None:
+    """Stop all executors (used on server shutdown)"""
+
+    with _pools_lock:
+        for pool in _pools.values():
+            pool.shutdown(wait=False, cancel_futures=True)
+        _pools.clear()
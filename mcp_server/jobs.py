@@ -0,0 +1,201 @@
+"""Background jobs for long-running tools"""
+import asyncio
+import contextvars
+import secrets
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from .config import settings
+
+
+JOB_STATES = ("queued", "running", "succeeded", "failed", "cancelled")
+FINISHED_STATES = ("succeeded", "failed", "cancelled")
+
+Notifier = Callable[["Job"], Awaitable[None]]
+
+# The job whose handler is running in this context (also inside
+# run_blocking workers, which copy the caller's context)
+_current_job: contextvars.ContextVar[Optional["Job"]] = contextvars.ContextVar(
+    "current_job", default=None
+)
+
+
+class Job:
+    """One submitted tool call and its progress"""
+
+    def __init__(self, tool: str, arguments: Dict[str, Any], notifier: Optional[Notifier] = None):
+        self.id = f"job-{secrets.token_hex(6)}"
+        self.tool = tool
+        self.arguments = arguments
+        self.status = "queued"
+        self.phase: Optional[str] = None
+        self.message: Optional[str] = None
+        self.progress = 0
+        self.phases: List[Dict[str, Any]] = []
+        self.result: Optional[Dict[str, Any]] = None
+        self.error: Optional[str] = None
+        self.created_at = datetime.utcnow().isoformat()
+        self.started_at: Optional[str] = None
+        self.finished_at: Optional[str] = None
+        self.task: Optional[asyncio.Task] = None
+        self._notifier = notifier
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def report(self, phase: str, message: Optional[str] = None) -> None:
+        """Record that the job entered a phase and notify the client
+
+        Safe to call from the event loop or from executor threads.
+        """
+
+        self.phase = phase
+        self.message = message
+        self.progress += 1
+        self.phases.append({
+            "phase": phase,
+            "message": message,
+            "at": datetime.utcnow().isoformat(),
+        })
+        self.notify()
+
+    def notify(self) -> None:
+        if self._notifier is None or self._loop is None or self._loop.is_closed():
+            return
+        asyncio.run_coroutine_threadsafe(self._safe_notify(), self._loop)
+
+    async def _safe_notify(self) -> None:
+        try:
+            await self._notifier(self)
+        except Exception as e:
+            # The client may have gone away; the job carries on regardless
+            print(f"⚠️  Could not notify about {self.id}: {e}", file=sys.stderr)
+
+    def to_dict(self) -> Dict[str, Any]:
+        info = {
+            "job_id": self.id,
+            "tool": self.tool,
+            "status": self.status,
+            "phase": self.phase,
+            "message": self.message,
+            "progress": self.progress,
+            "created_at": self.created_at,
+            "started_at": self.started_at,
+            "finished_at": self.finished_at,
+        }
+        if self.status in FINISHED_STATES:
+            info["phases"] = self.phases
+            info["result"] = self.result
+            info["error"] = self.error
+        return info
+
+
+def report_progress(phase: str, message: Optional[str] = None) -> None:
+    """Report a phase of the current background job (no-op outside jobs)"""
+
+    job = _current_job.get()
+    if job is not None:
+        job.report(phase, message)
+
+
+class JobQueue:
+    """Runs submitted tool calls as asyncio tasks, at most max_concurrent at once
+
+    Jobs live in memory for the life of the server process; finished ones
+    beyond settings.job_history are forgotten, oldest first.
+    """
+
+    def __init__(self, max_concurrent: int):
+        self.max_concurrent = max_concurrent
+        self.jobs: "OrderedDict[str, Job]" = OrderedDict()
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    def submit(
+        self,
+        tool: str,
+        handler: Callable[..., Awaitable[Dict[str, Any]]],
+        arguments: Dict[str, Any],
+        notifier: Optional[Notifier] = None,
+    ) -> Job:
+        """Queue handler(**arguments) and return its job right away"""
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_concurrent)
+
+        job = Job(tool, arguments, notifier)
+        job._loop = asyncio.get_running_loop()
+        job.task = job._loop.create_task(self._run(job, handler))
+        self.jobs[job.id] = job
+        self._prune()
+        return job
+
+    async def _run(self, job: Job, handler: Callable[..., Awaitable[Dict[str, Any]]]) -> None:
+        try:
+            async with self._slots:
+                job.status = "running"
+                job.started_at = datetime.utcnow().isoformat()
+                job.report("started")
+
+                _current_job.set(job)
+                result = await handler(**job.arguments)
+
+            job.result = result
+            if isinstance(result, dict) and result.get("success") is False:
+                job.status = "failed"
+                job.error = result.get("message") or result.get("error")
+            else:
+                job.status = "succeeded"
+        except asyncio.CancelledError:
+            job.status = "cancelled"
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            print(f"❌ {job.id} ({job.tool}) failed: {e}", file=sys.stderr)
+        finally:
+            job.finished_at = datetime.utcnow().isoformat()
+            job.phase = job.status
+            job.message = job.error
+            job.notify()
+
+    def get(self, job_id: str) -> Optional[Job]:
+        return self.jobs.get(job_id)
+
+    def list(self, status: Optional[str] = None) -> List[Job]:
+        return [job for job in self.jobs.values() if status is None or job.status == status]
+
+    def cancel(self, job_id: str) -> bool:
+        """Cancel a queued or running job; False if it already finished
+
+        Blocking work already handed to an executor thread runs to
+        completion, but the job stops at its next await. Steps that create
+        AWS resources run under run_to_completion, and the deploy tools
+        roll back what they created when the cancellation lands.
+        """
+
+        job = self.jobs.get(job_id)
+        if job is None or job.status in FINISHED_STATES:
+            return False
+
+        job.task.cancel()
+        return True
+
+    def _prune(self) -> None:
+        finished = [job_id for job_id, job in self.jobs.items() if job.status in FINISHED_STATES]
+        for job_id in finished[:max(0, len(finished) - settings.job_history)]:
+            del self.jobs[job_id]
+
+
+_queue: Optional[JobQueue] = None
+_queue_lock = threading.Lock()
+
+
+def get_queue() -> JobQueue:
+    """Return the process-wide job queue"""
+
+    global _queue
+
+    with _queue_lock:
+        if _queue is None:
+            _queue = JobQueue(settings.max_concurrent_jobs)
+        return _queue
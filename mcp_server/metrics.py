@@ -0,0 +1,203 @@
+"""Timing spans and counters for tool phases
+
+    with span("upload", bucket=bucket_name) as s:
+        count = deployer.upload_directory(...)
+        s.set(bytes=deployer.last_upload_stats["bytes"])
+
+Spans nest through a contextvar, so they follow asyncio tasks and
+run_blocking workers. Every boto3 client from mcp_server.aws counts its
+API calls against the innermost open span and all of its parents.
+"""
+import contextvars
+import json
+import sys
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional
+
+from .config import settings
+
+
+class Span:
+    """One timed phase"""
+
+    def __init__(self, name: str, parent: Optional["Span"], attrs: Dict[str, Any]):
+        self.name = name
+        self.parent = parent
+        self.attrs = attrs
+        self.api_calls = 0
+        self.error: Optional[str] = None
+        self.started_at = datetime.utcnow().isoformat()
+        self._start = time.perf_counter()
+        self.duration_ms: Optional[float] = None
+
+    def set(self, **attrs: Any) -> None:
+        """Attach counts (bytes, files, ...) discovered during the phase"""
+
+        self.attrs.update(attrs)
+
+    def path(self) -> str:
+        names = []
+        span = self
+        while span is not None:
+            names.append(span.name)
+            span = span.parent
+        return "/".join(reversed(names))
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "name": self.name,
+            "path": self.path(),
+            "started_at": self.started_at,
+            "duration_ms": self.duration_ms,
+            "api_calls": self.api_calls,
+            "error": self.error,
+            **self.attrs,
+        }
+
+
+_current_span: contextvars.ContextVar[Optional[Span]] = contextvars.ContextVar(
+    "current_span", default=None
+)
+
+
+class MetricsRegistry:
+    """Per-phase aggregates, AWS API call counts and recent spans"""
+
+    def __init__(self, recent: int):
+        self._lock = threading.Lock()
+        self._recent = recent
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.phases: Dict[str, Dict[str, Any]] = {}
+            self.api_calls: Dict[str, int] = {}
+            self.spans: deque = deque(maxlen=self._recent)
+
+    def record_api_call(self, operation: str) -> None:
+        with self._lock:
+            self.api_calls[operation] = self.api_calls.get(operation, 0) + 1
+            span = _current_span.get()
+            while span is not None:
+                span.api_calls += 1
+                span = span.parent
+
+    def record_span(self, span: Span) -> None:
+        with self._lock:
+            phase = self.phases.setdefault(span.name, {
+                "count": 0,
+                "errors": 0,
+                "total_ms": 0.0,
+                "min_ms": None,
+                "max_ms": 0.0,
+                "bytes": 0,
+                "api_calls": 0,
+            })
+            phase["count"] += 1
+            phase["errors"] += 1 if span.error else 0
+            phase["total_ms"] += span.duration_ms
+            phase["min_ms"] = span.duration_ms if phase["min_ms"] is None else min(phase["min_ms"], span.duration_ms)
+            phase["max_ms"] = max(phase["max_ms"], span.duration_ms)
+            phase["bytes"] += span.attrs.get("bytes") or 0
+            phase["api_calls"] += span.api_calls
+            self.spans.append(span.to_dict())
+
+        if settings.metrics_jsonl:
+            self._append_jsonl(span.to_dict())
+
+    def _append_jsonl(self, record: Dict[str, Any]) -> None:
+        try:
+            with self._lock, open(settings.metrics_jsonl, "a") as f:
+                f.write(json.dumps(record, default=str) + "\n")
+        except OSError as e:
+            print(f"⚠️  Could not write metrics to {settings.metrics_jsonl}: {e}", file=sys.stderr)
+
+    def snapshot(self, include_spans: bool = False) -> Dict[str, Any]:
+        with self._lock:
+            phases = {}
+            for name, phase in sorted(self.phases.items()):
+                phases[name] = {
+                    **phase,
+                    "total_ms": round(phase["total_ms"], 1),
+                    "avg_ms": round(phase["total_ms"] / phase["count"], 1),
+                    "min_ms": round(phase["min_ms"], 1),
+                    "max_ms": round(phase["max_ms"], 1),
+                }
+            snapshot = {
+                "phases": phases,
+                "api_calls": dict(sorted(self.api_calls.items())),
+            }
+            if include_spans:
+                snapshot["spans"] = list(self.spans)
+            return snapshot
+
+    def prometheus(self) -> str:
+        """Render aggregates in the Prometheus text exposition format"""
+
+        snapshot = self.snapshot()
+        lines: List[str] = []
+
+        def metric(name: str, kind: str, help_text: str, samples: List[tuple]) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{val}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}")
+
+        phases = snapshot["phases"]
+        lines.append("# HELP aws_agent_phase_duration_seconds Time spent per phase")
+        lines.append("# TYPE aws_agent_phase_duration_seconds summary")
+        for p, v in phases.items():
+            lines.append(f'aws_agent_phase_duration_seconds_sum{{phase="{p}"}} {v["total_ms"] / 1000:.6f}')
+            lines.append(f'aws_agent_phase_duration_seconds_count{{phase="{p}"}} {v["count"]}')
+        metric(
+            "aws_agent_phase_errors_total", "counter", "Phases that raised",
+            [({"phase": p}, v["errors"]) for p, v in phases.items()],
+        )
+        metric(
+            "aws_agent_phase_bytes_total", "counter", "Bytes processed per phase",
+            [({"phase": p}, v["bytes"]) for p, v in phases.items()],
+        )
+        metric(
+            "aws_agent_phase_api_calls_total", "counter", "AWS API calls made per phase",
+            [({"phase": p}, v["api_calls"]) for p, v in phases.items()],
+        )
+        metric(
+            "aws_agent_aws_api_calls_total", "counter", "AWS API calls by operation",
+            [
+                (dict(zip(("service", "operation"), op.split(".", 1))), count)
+                for op, count in snapshot["api_calls"].items()
+            ],
+        )
+        return "\n".join(lines) + "\n"
+
+
+metrics = MetricsRegistry(settings.metrics_recent_spans)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Span]:
+    """Time a phase (nested under whatever span is open in this context)"""
+
+    current = Span(name, _current_span.get(), attrs)
+    token = _current_span.set(current)
+    try:
+        yield current
+    except BaseException as e:
+        current.error = f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        current.duration_ms = round((time.perf_counter() - current._start) * 1000, 3)
+        _current_span.reset(token)
+        metrics.record_span(current)
+
+
+def count_api_call(event_name: str, **kwargs: Any) -> None:
+    """botocore before-call hook; event_name is before-call.<service>.<operation>"""
+
+    _, service, operation = event_name.split(".", 2)
+    metrics.record_api_call(f"{service}.{operation}")
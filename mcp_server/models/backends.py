@@ -0,0 +1,217 @@
+"""Storage backends for deployment state"""
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional, Tuple
+
+
+# Record fields that can be filtered on in list queries
+INDEXED_FIELDS = ("type", "region", "status", "connected_to")
+
+
+def _matches(info: Dict[str, Any], filters: Dict[str, Any]) -> bool:
+    return all(info.get(field) == value for field, value in filters.items())
+
+
+def _check_filters(filters: Dict[str, Any]) -> None:
+    unknown = set(filters) - set(INDEXED_FIELDS)
+    if unknown:
+        raise ValueError(
+            f"Cannot filter deployments on {sorted(unknown)}. "
+            f"Supported: {', '.join(INDEXED_FIELDS)}"
+        )
+
+
+class JsonStateBackend:
+    """One pretty-printed JSON file per deployment"""
+
+    def __init__(self, state_dir: Path):
+        self.state_dir = Path(state_dir)
+        self.state_dir.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, name: str) -> Path:
+        return self.state_dir / f"{name}.json"
+
+    def save(self, name: str, info: Dict[str, Any]) -> None:
+        # Write a sibling temp file and rename it over the old one, so
+        # readers never see a truncated or half-written record
+        state_file = self._path(name)
+        tmp_file = state_file.with_name(f".{state_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+
+        with open(tmp_file, 'w') as f:
+            json.dump(info, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+
+        os.replace(tmp_file, state_file)
+
+    def stamp(self, name: str) -> Optional[Tuple]:
+        """Cheap change marker for a record (None if it doesn't exist)"""
+
+        try:
+            stat = self._path(name).stat()
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        state_file = self._path(name)
+
+        if not state_file.exists():
+            return None
+
+        with open(state_file, 'r') as f:
+            return json.load(f)
+
+    def list(self, **filters: Any) -> Dict[str, Dict[str, Any]]:
+        _check_filters(filters)
+        deployments = {}
+
+        for state_file in self.state_dir.glob("*.json"):
+            with open(state_file, 'r') as f:
+                info = json.load(f)
+            if _matches(info, filters):
+                deployments[state_file.stem] = info
+
+        return deployments
+
+    def delete(self, name: str) -> bool:
+        state_file = self._path(name)
+
+        if state_file.exists():
+            state_file.unlink()
+            return True
+
+        return False
+
+
+class SqliteStateBackend:
+    """Deployments in one SQLite database (WAL mode) with indexed filter columns
+
+    The full record is stored as JSON; the fields in INDEXED_FIELDS are
+    mirrored into indexed columns so filtered listings don't scan every
+    record.
+    """
+
+    SCHEMA = """
+    CREATE TABLE IF NOT EXISTS deployments (
+        name TEXT PRIMARY KEY,
+        type TEXT,
+        region TEXT,
+        status TEXT,
+        connected_to TEXT,
+        created_at TEXT,
+        updated_at TEXT,
+        data TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS idx_deployments_type ON deployments(type);
+    CREATE INDEX IF NOT EXISTS idx_deployments_region ON deployments(region);
+    CREATE INDEX IF NOT EXISTS idx_deployments_status ON deployments(status);
+    CREATE INDEX IF NOT EXISTS idx_deployments_connected_to ON deployments(connected_to);
+    CREATE TABLE IF NOT EXISTS meta (
+        key TEXT PRIMARY KEY,
+        value TEXT
+    );
+    """
+
+    def __init__(self, db_path: Path):
+        self.db_path = Path(db_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        # sqlite3 connections can't be shared across threads, and tools
+        # touch state from executor threads
+        self._local = threading.local()
+
+        with self._connect() as conn:
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def save(self, name: str, info: Dict[str, Any]) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO deployments
+                    (name, type, region, status, connected_to, created_at, updated_at, data)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(name) DO UPDATE SET
+                    type = excluded.type,
+                    region = excluded.region,
+                    status = excluded.status,
+                    connected_to = excluded.connected_to,
+                    created_at = excluded.created_at,
+                    updated_at = excluded.updated_at,
+                    data = excluded.data
+                """,
+                (
+                    name,
+                    *(info.get(field) for field in INDEXED_FIELDS),
+                    info.get('created_at'),
+                    info.get('updated_at'),
+                    json.dumps(info),
+                ),
+            )
+
+    def stamp(self, name: str) -> Optional[Tuple]:
+        """Change marker for the whole database: any commit updates the
+        main file or its write-ahead log"""
+
+        parts = []
+        for path in (self.db_path, self.db_path.with_name(self.db_path.name + "-wal")):
+            try:
+                stat = path.stat()
+                parts.append((stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                parts.append(None)
+        return tuple(parts)
+
+    def load(self, name: str) -> Optional[Dict[str, Any]]:
+        row = self._connect().execute(
+            "SELECT data FROM deployments WHERE name = ?", (name,)
+        ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def list(self, **filters: Any) -> Dict[str, Dict[str, Any]]:
+        _check_filters(filters)
+        query = "SELECT name, data FROM deployments"
+        if filters:
+            query += " WHERE " + " AND ".join(f"{field} = ?" for field in filters)
+
+        rows = self._connect().execute(query, tuple(filters.values())).fetchall()
+        return {name: json.loads(data) for name, data in rows}
+
+    def delete(self, name: str) -> bool:
+        with self._connect() as conn:
+            cursor = conn.execute("DELETE FROM deployments WHERE name = ?", (name,))
+        return cursor.rowcount > 0
+
+    def migrate_from(self, source: JsonStateBackend) -> int:
+        """Import JSON state files once; later calls are no-ops"""
+
+        conn = self._connect()
+        done = conn.execute(
+            "SELECT value FROM meta WHERE key = 'json_migrated'"
+        ).fetchone()
+        if done:
+            return 0
+
+        records = source.list()
+        for name, info in records.items():
+            if self.load(name) is None:
+                self.save(name, info)
+
+        with conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)",
+                (str(len(records)),),
+            )
+
+        return len(records)
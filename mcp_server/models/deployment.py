@@ -1,57 +1,205 @@
 """Deployment state management"""
-import json
-from pathlib import Path
-from typing import Dict, Any, Optional
+import copy
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Callable, Dict, Any, Optional
 from datetime import datetime
 from ..config import settings
+from .backends import JsonStateBackend, SqliteStateBackend
+from ..metrics import span
 
+try:
+    import fcntl
+except ImportError:  # not available on Windows
+    fcntl = None
 
-def save_deployment(name: str, info: Dict[str, Any]) -> None:
-    """Save deployment information to disk"""
+
+class DeploymentConflictError(RuntimeError):
+    """The record changed since the caller loaded it"""
+
+
+# Written by connect_services; a redeploy replaces everything else
+LINK_FIELDS = ("connected_to", "backend_url", "frontend_url")
+
+
+_backend = None
+_backend_lock = threading.Lock()
+
+# name -> (backend stamp, record); see load_deployment
+_cache: Dict[str, tuple] = {}
+_cache_lock = threading.Lock()
+
+_locks: Dict[str, threading.RLock] = {}
+_locks_guard = threading.Lock()
+_held = threading.local()
+
+
+def get_backend():
+    """Return the configured state backend (settings.state_backend)"""
     
-    state_file = settings.state_dir / f"{name}.json"
+    global _backend
+    
+    with _backend_lock:
+        if _backend is None:
+            json_backend = JsonStateBackend(settings.state_dir)
+            
+            if settings.state_backend == "json":
+                _backend = json_backend
+            elif settings.state_backend == "sqlite":
+                _backend = SqliteStateBackend(
+                    settings.state_db or settings.state_dir / "deployments.db"
+                )
+                migrated = _backend.migrate_from(json_backend)
+                if migrated:
+                    print(f"📦 Migrated {migrated} deployments from JSON to SQLite", file=sys.stderr)
+            else:
+                raise ValueError(
+                    f"Unknown state backend '{settings.state_backend}'. Supported: json, sqlite"
+                )
+        
+        return _backend
+
+
+@contextmanager
+def deployment_lock(name: str):
+    """Serialize writers of one deployment, across threads and processes
+
+    Reentrant within a thread, so update_deployment can call
+    save_deployment while holding it.
+    """
     
-    # Add timestamp
-    info['updated_at'] = datetime.utcnow().isoformat()
-    if 'created_at' not in info:
-        info['created_at'] = info['updated_at']
+    with _locks_guard:
+        lock = _locks.setdefault(name, threading.RLock())
     
-    with open(state_file, 'w') as f:
-        json.dump(info, f, indent=2)
+    with lock:
+        depth = getattr(_held, name, 0)
+        lock_file = None
+        
+        if depth == 0 and fcntl is not None:
+            lock_dir = settings.state_dir / ".locks"
+            lock_dir.mkdir(parents=True, exist_ok=True)
+            lock_file = open(lock_dir / f"{name}.lock", "w")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        
+        setattr(_held, name, depth + 1)
+        try:
+            yield
+        finally:
+            setattr(_held, name, depth)
+            if lock_file is not None:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+                lock_file.close()
+
+
+def save_deployment(name: str, info: Dict[str, Any]) -> None:
+    """Save deployment information
+
+    Records carry a 'version' that is bumped on every save. If info has a
+    version (it was loaded from the store), saving fails with
+    DeploymentConflictError when someone else saved in the meantime.
+    """
+    
+    backend = get_backend()
+    
+    with deployment_lock(name):
+        current = backend.load(name)
+        current_version = current.get('version', 0) if current else 0
+        
+        expected_version = info.get('version')
+        if expected_version is not None and expected_version != current_version:
+            raise DeploymentConflictError(
+                f"Deployment '{name}' changed (version {current_version}, "
+                f"expected {expected_version})"
+            )
+        
+        # Add timestamp
+        info['updated_at'] = datetime.utcnow().isoformat()
+        if 'created_at' not in info:
+            info['created_at'] = info['updated_at']
+        info['version'] = current_version + 1
+        
+        with span("state_save", backend=settings.state_backend):
+            backend.save(name, info)
+        
+        with _cache_lock:
+            _cache[name] = (backend.stamp(name), copy.deepcopy(info))
 
 
 def load_deployment(name: str) -> Optional[Dict[str, Any]]:
-    """Load deployment information from disk"""
+    """Load deployment information
+
+    Served from an in-process cache while the backend's change stamp
+    (file mtime, or database mtime) is unchanged.
+    """
+    
+    backend = get_backend()
+    stamp = backend.stamp(name)
     
-    state_file = settings.state_dir / f"{name}.json"
+    with _cache_lock:
+        cached = _cache.get(name)
+        if cached and stamp is not None and cached[0] == stamp:
+            return copy.deepcopy(cached[1])
     
-    if not state_file.exists():
-        return None
+    info = backend.load(name)
     
-    with open(state_file, 'r') as f:
-        return json.load(f)
+    with _cache_lock:
+        if info is None:
+            _cache.pop(name, None)
+        else:
+            _cache[name] = (stamp, copy.deepcopy(info))
+    
+    return info
+
 
+def update_deployment(
+    name: str,
+    mutate: Callable[[Dict[str, Any]], None],
+) -> Optional[Dict[str, Any]]:
+    """Atomically load, modify and save a deployment
 
-def list_deployments() -> Dict[str, Dict[str, Any]]:
-    """List all deployments"""
+    Returns the saved record, or None if the deployment doesn't exist.
+    """
     
-    deployments = {}
+    with deployment_lock(name):
+        info = load_deployment(name)
+        if info is None:
+            return None
+        
+        mutate(info)
+        save_deployment(name, info)
+        return info
+
+
+def replace_deployment(name: str, info: Dict[str, Any]) -> Dict[str, Any]:
+    """Save a freshly deployed record over whatever is stored under name
+
+    Like update_deployment, the stored record is read under the lock, so
+    links that connect_services wrote while the deploy ran (LINK_FIELDS)
+    are carried over unless info sets them itself.
+    """
     
-    for state_file in settings.state_dir.glob("*.json"):
-        name = state_file.stem
-        with open(state_file, 'r') as f:
-            deployments[name] = json.load(f)
+    with deployment_lock(name):
+        current = load_deployment(name) or {}
+        for field in LINK_FIELDS:
+            if field in current and info.get(field) is None:
+                info[field] = current[field]
+        
+        info.pop('version', None)
+        save_deployment(name, info)
+        return info
+
+
+def list_deployments(**filters: Any) -> Dict[str, Dict[str, Any]]:
+    """List all deployments, optionally filtered by type, region, status or connected_to"""
     
-    return deployments
+    return get_backend().list(**filters)
 
 
 def delete_deployment(name: str) -> bool:
     """Delete deployment information"""
     
-    state_file = settings.state_dir / f"{name}.json"
-    
-    if state_file.exists():
-        state_file.unlink()
-        return True
-    
-    return False
\ No newline at end of file
+    with deployment_lock(name):
+        with _cache_lock:
+            _cache.pop(name, None)
+        return get_backend().delete(name)
@@ -0,0 +1,57 @@
+"""Golden AMI registry"""
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Any, Optional
+from datetime import datetime
+from ..config import settings
+
+
+def _images_dir() -> Path:
+    images_dir = settings.state_dir / "images"
+    images_dir.mkdir(parents=True, exist_ok=True)
+    return images_dir
+
+
+def image_key(region: str, runtime: str, revision: Optional[str] = None) -> str:
+    """Registry key for a runtime image, or an app image at a given revision"""
+
+    key = f"{region}-{runtime}"
+    if revision:
+        key += f"-{revision[:12]}"
+    return key
+
+
+def save_image(key: str, info: Dict[str, Any]) -> None:
+    """Record a baked AMI, replacing any previous image for the key"""
+
+    info['created_at'] = datetime.utcnow().isoformat()
+
+    # Write then rename, so readers never see a half-written record
+    image_file = _images_dir() / f"{key}.json"
+    tmp_file = image_file.with_name(f".{image_file.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp_file, 'w') as f:
+        json.dump(info, f, indent=2)
+    os.replace(tmp_file, image_file)
+
+
+def load_image(key: str) -> Optional[Dict[str, Any]]:
+    """Load a baked AMI record"""
+
+    image_file = _images_dir() / f"{key}.json"
+
+    if not image_file.exists():
+        return None
+
+    with open(image_file, 'r') as f:
+        return json.load(f)
+
+
+def list_images() -> Dict[str, Dict[str, Any]]:
+    """List all baked AMIs"""
+
+    return {
+        image_file.stem: json.loads(image_file.read_text())
+        for image_file in _images_dir().glob("*.json")
+    }
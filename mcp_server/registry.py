@@ -0,0 +1,95 @@
+"""Declarative tool registry: schemas, handlers and dispatch in one table"""
+import functools
+import importlib
+from dataclasses import dataclass, field
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+import jsonschema
+from mcp.types import Tool
+
+
+@dataclass
+class ToolSpec:
+    """One MCP tool
+
+    Its handler is the function of the same name exported by
+    mcp_server.tools, imported on first call, so declaring a tool costs
+    nothing until it is used.
+    """
+
+    name: str
+    description: str
+    input_schema: Dict[str, Any]
+    # Run as a background job: the call returns a job ID immediately
+    background: bool = False
+    _func: Optional[Callable[..., Awaitable[Any]]] = field(default=None, init=False, repr=False)
+    _validator: Any = field(default=None, init=False, repr=False)
+
+    def __post_init__(self):
+        validator_class = jsonschema.validators.validator_for(self.input_schema)
+        validator_class.check_schema(self.input_schema)
+        self._validator = validator_class(self.input_schema)
+
+    def resolve(self) -> Callable[..., Awaitable[Any]]:
+        """Import and cache the handler function"""
+
+        if self._func is None:
+            tools = importlib.import_module(".tools", __package__)
+            self._func = getattr(tools, self.name)
+        return self._func
+
+    def validate(self, arguments: Dict[str, Any]) -> None:
+        """Raise ValueError if arguments don't match the input schema"""
+
+        error = jsonschema.exceptions.best_match(self._validator.iter_errors(arguments))
+        if error is not None:
+            location = ".".join(str(part) for part in error.absolute_path)
+            prefix = f"'{location}': " if location else ""
+            raise ValueError(f"Invalid arguments for {self.name}: {prefix}{error.message}")
+
+    def to_tool(self) -> Tool:
+        return Tool(name=self.name, description=self.description, inputSchema=self.input_schema)
+
+
+class ToolRegistry:
+    """Tools by name, with the list_tools response built once"""
+
+    def __init__(self, specs: List[ToolSpec]):
+        self.specs: Dict[str, ToolSpec] = {}
+        for spec in specs:
+            if spec.name in self.specs:
+                raise ValueError(f"Tool '{spec.name}' is registered twice")
+            self.specs[spec.name] = spec
+
+        self.tools: List[Tool] = [spec.to_tool() for spec in specs]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.specs
+
+    async def call(self, name: str, arguments: Optional[Dict[str, Any]]) -> Any:
+        """Validate arguments and run the tool's handler"""
+
+        spec = self.specs.get(name)
+        if spec is None:
+            raise KeyError(name)
+
+        arguments = arguments or {}
+        spec.validate(arguments)
+        return await self._invoke(spec, **arguments)
+
+    def submit(self, name: str, arguments: Optional[Dict[str, Any]], notifier=None):
+        """Validate arguments and queue the tool as a background job"""
+
+        from .jobs import get_queue
+
+        spec = self.specs[name]
+        arguments = arguments or {}
+        spec.validate(arguments)
+        return get_queue().submit(name, functools.partial(self._invoke, spec), arguments, notifier)
+
+    @staticmethod
+    async def _invoke(spec: ToolSpec, /, **arguments: Any) -> Any:
+        from .metrics import span
+
+        with span(f"tool.{spec.name}"):
+            return await spec.resolve()(**arguments)
@@ -16,15 +16,9 @@ print("=" * 60, file=sys.stderr)
 print("🚀 AWS DEPLOYMENT AGENT - MCP SERVER", file=sys.stderr)
 print("=" * 60, file=sys.stderr)
 
-from .tools import (
-    deploy_backend_to_ec2,
-    deploy_frontend_to_s3,
-    connect_services,
-    setup_nginx_proxy,
-    create_autoscaling_group,
-    estimate_deployment_cost,
-    get_deployment_status,
-)
+# Tool handlers are imported on first call (see ToolSpec.resolve),
+# keeping boto3, GitPython and settings off the startup path
+from .registry import ToolRegistry, ToolSpec
 
 print("✅ Tools imported successfully", file=sys.stderr)
 
@@ -33,16 +27,11 @@ app = Server("aws-deployment-agent")
 print("✅ MCP Server initialized", file=sys.stderr)
 
 
-@app.list_tools()
-async def list_tools() -> list[Tool]:
-    """List all available AWS deployment tools"""
-    
-    print("📋 Listing tools...", file=sys.stderr)
-    
-    tools = [
-        Tool(
-            name="deploy_backend_to_ec2",
-            description="""Deploy a backend application to AWS EC2.
+# Every tool: schema, description and handler. Built once at startup.
+registry = ToolRegistry([
+    ToolSpec(
+        name="deploy_backend_to_ec2",
+        description="""Deploy a backend application to AWS EC2.
 
 Supports Node.js and Python applications.
 
@@ -56,37 +45,63 @@ Automatically handles:
 - Security group configuration  
 - Application deployment
 - Auto-start on boot
+- Optional replicas across zones behind a load balancer
 
 Example: "Deploy my Express API at github.com/user/repo to EC2"
-            """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo_url": {
-                        "type": "string",
-                        "description": "GitHub repository URL (e.g., https://github.com/user/repo)"
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "Deployment name for tracking (e.g., 'my-backend')"
-                    },
-                    "instance_type": {
-                        "type": "string",
-                        "default": "t2.micro",
-                        "description": "EC2 instance type"
-                    },
-                    "port": {
-                        "type": "integer",
-                        "default": 3000,
-                        "description": "Application port"
-                    },
-                },
-                "required": ["repo_url", "name"]
-            }
-        ),
-        Tool(
-            name="deploy_frontend_to_s3",
-            description="""Deploy a frontend application to AWS S3 with static website hosting.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "repo_url": {
+                    "type": "string",
+                    "description": "GitHub repository URL (e.g., https://github.com/user/repo)"
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Deployment name for tracking (e.g., 'my-backend')"
+                },
+                "instance_type": {
+                    "type": "string",
+                    "default": "t2.micro",
+                    "description": "EC2 instance type"
+                },
+                "port": {
+                    "type": "integer",
+                    "default": 3000,
+                    "description": "Application port"
+                },
+                "health_check_path": {
+                    "type": "string",
+                    "description": "Optional HTTP path (e.g. '/health') probed before the deploy is reported live"
+                },
+                "use_golden_ami": {
+                    "type": "boolean",
+                    "default": True,
+                    "description": "Boot from a baked AMI for this runtime/revision when one exists"
+                },
+                "ship_artifact": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Build a dependency-complete tarball locally, stage it in S3 and have the instance download it instead of running npm/pip install"
+                },
+                "replicas": {
+                    "type": "integer",
+                    "default": 1,
+                    "minimum": 1,
+                    "maximum": 20,
+                    "description": "Number of instances; more than 1 spreads them across availability zones behind an Application Load Balancer whose DNS name is the URL"
+                },
+            },
+            "required": ["repo_url", "name"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="deploy_frontend_to_s3",
+        description="""Deploy a frontend application to AWS S3 with static website hosting.
 
 Supports React, Vue, Angular, Next.js, and any static site.
 
@@ -100,95 +115,463 @@ Automatically handles:
 Cost: ~$0.50/month
 
 Example: "Deploy my React app at github.com/user/repo to S3"
-            """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "repo_url": {
-                        "type": "string",
-                        "description": "GitHub repository URL"
-                    },
-                    "name": {
-                        "type": "string",
-                        "description": "Deployment name"
-                    },
-                    "build_command": {
-                        "type": "string",
-                        "default": "npm run build",
-                        "description": "Build command"
-                    },
-                    "backend_url": {
-                        "type": "string",
-                        "description": "Backend API URL to inject into environment"
-                    },
-                },
-                "required": ["repo_url", "name"]
-            }
-        ),
-        Tool(
-            name="connect_services",
-            description="""Connect backend and frontend deployments.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "repo_url": {
+                    "type": "string",
+                    "description": "GitHub repository URL"
+                },
+                "name": {
+                    "type": "string",
+                    "description": "Deployment name"
+                },
+                "build_command": {
+                    "type": "string",
+                    "default": "npm run build",
+                    "description": "Build command"
+                },
+                "backend_url": {
+                    "type": "string",
+                    "description": "Backend API URL to inject into environment"
+                },
+                "sync": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Redeploy into the existing bucket, uploading only changed files"
+                },
+                "compression": {
+                    "type": "string",
+                    "enum": ["gzip"],
+                    "description": "Pre-compress JS/CSS/HTML/SVG/JSON assets with this Content-Encoding"
+                },
+                "cache_control": {
+                    "type": "object",
+                    "additionalProperties": {"type": "string"},
+                    "description": "Cache-Control overrides as {key glob: header}, e.g. {\"*.png\": \"public, max-age=86400\"}. Fingerprinted assets are immutable and HTML is no-cache by default"
+                },
+            },
+            "required": ["repo_url", "name"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="connect_services",
+        description="""Connect backend and frontend deployments.
 
 Updates CORS configuration and links the services.
 
 Use after deploying both frontend and backend.
-            """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "backend_name": {
-                        "type": "string",
-                        "description": "Backend deployment name"
-                    },
-                    "frontend_name": {
-                        "type": "string",
-                        "description": "Frontend deployment name"
-                    },
-                },
-                "required": ["backend_name", "frontend_name"]
-            }
-        ),
-        Tool(
-            name="get_deployment_status",
-            description="""Check the status and details of a deployment.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "backend_name": {
+                    "type": "string",
+                    "description": "Backend deployment name"
+                },
+                "frontend_name": {
+                    "type": "string",
+                    "description": "Frontend deployment name"
+                },
+            },
+            "required": ["backend_name", "frontend_name"]
+        },
+    ),
+    ToolSpec(
+        name="setup_nginx_proxy",
+        description="""Put nginx in front of a backend's instances as a reverse proxy.
+
+Renders a config with keep-alive upstream pools, gzip, static file routes
+served from disk and optional per-route proxy micro-caching, and applies it
+to every instance over SSM Run Command (instances need an SSM instance
+profile). A single instance then serves port 80 and closes the app port;
+behind a load balancer, the load balancer is switched to nginx on port 80
+and nothing is opened to the world. Routes default to proxying / to the
+app. An Auto Scaling group's in-service instances are configured too, and
+later instances of this backend (the group's included) get the same
+config at boot; a warm pool is replaced by an instance refresh.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "instance_name": {
+                    "type": "string",
+                    "description": "Backend deployment name"
+                },
+                "routes": {
+                    "type": "array",
+                    "description": "Locations to serve",
+                    "items": {
+                        "type": "object",
+                        "properties": {
+                            "path": {
+                                "type": "string",
+                                "pattern": "^/",
+                                "description": "Location prefix, e.g. /api"
+                            },
+                            "upstream_port": {
+                                "type": "integer",
+                                "minimum": 1,
+                                "maximum": 65535,
+                                "description": "Local port to proxy to (default: the app port)"
+                            },
+                            "static_dir": {
+                                "type": "string",
+                                "description": "Serve files from this directory (relative to the app checkout) instead of proxying"
+                            },
+                            "cache_seconds": {
+                                "type": "integer",
+                                "minimum": 0,
+                                "default": 0,
+                                "description": "Micro-cache successful GET responses for this many seconds"
+                            },
+                        },
+                        "required": ["path"],
+                        "additionalProperties": False
+                    }
+                },
+            },
+            "required": ["instance_name"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="create_autoscaling_group",
+        description="""Run a backend in an EC2 Auto Scaling group that scales on CPU.
+
+Creates a launch template from the backend's image and user data at its
+deployed commit, a group of min_size..max_size instances across the default
+VPC's zones that joins the backend's load balancer (deploy with replicas
+first), and a target-tracking policy on average CPU. warm_pool_size keeps
+that many instances pre-initialized and stopped so scale-out skips boot and
+install; it needs INSTANCE_PROFILE_NAME.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "instance_name": {
+                    "type": "string",
+                    "description": "Backend deployment name"
+                },
+                "min_size": {
+                    "type": "integer",
+                    "default": 1,
+                    "minimum": 0
+                },
+                "max_size": {
+                    "type": "integer",
+                    "default": 3,
+                    "minimum": 1
+                },
+                "target_cpu": {
+                    "type": "integer",
+                    "default": 70,
+                    "minimum": 1,
+                    "maximum": 100,
+                    "description": "Target average CPU utilization (%)"
+                },
+                "warm_pool_size": {
+                    "type": "integer",
+                    "default": 0,
+                    "minimum": 0,
+                    "description": "Stopped, pre-initialized instances kept ready for scale-out"
+                },
+            },
+            "required": ["instance_name"]
+        },
+    ),
+    ToolSpec(
+        name="get_deployment_status",
+        description="""Check the status and details of a deployment.
 
 Returns current state, URLs, and resource information.
-            """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "deployment_name": {
-                        "type": "string",
-                        "description": "Name of deployment to check"
-                    },
-                },
-                "required": ["deployment_name"]
-            }
-        ),
-        Tool(
-            name="estimate_deployment_cost",
-            description="""Estimate monthly AWS costs for a deployment.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "deployment_name": {
+                    "type": "string",
+                    "description": "Name of deployment to check"
+                },
+            },
+            "required": ["deployment_name"]
+        },
+    ),
+    ToolSpec(
+        name="get_all_deployment_status",
+        description="""Check the live status of every deployment at once.
+
+Backends are refreshed with one batched EC2 query per region and frontend
+buckets are checked concurrently. Returns each deployment plus a count
+per state.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "deployment_type": {
+                    "type": "string",
+                    "enum": ["backend", "frontend"],
+                    "description": "Only refresh deployments of this type"
+                },
+            },
+        },
+    ),
+    ToolSpec(
+        name="estimate_deployment_cost",
+        description="""Estimate monthly AWS costs for a deployment.
 
 Shows breakdown of EC2, S3, and data transfer costs.
-            """,
-            inputSchema={
-                "type": "object",
-                "properties": {
-                    "deployment_name": {
-                        "type": "string",
-                        "description": "Deployment name"
-                    },
-                },
-                "required": ["deployment_name"]
-            }
-        ),
-    ]
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "deployment_name": {
+                    "type": "string",
+                    "description": "Deployment name"
+                },
+            },
+            "required": ["deployment_name"]
+        },
+    ),
+    ToolSpec(
+        name="redeploy_backend",
+        description="""Redeploy a backend at its repository's current HEAD without downtime.
+
+Reuses the deployment's security group and settings. Replicas behind a
+load balancer are replaced batch_size at a time: each batch must pass the
+health check before the instances it replaces are drained and terminated.
+A single instance is replaced blue-green behind the Elastic IP it was
+deployed with, so the address never changes. Auto Scaling groups get an
+instance refresh. A replacement that fails to launch or never gets ready is
+rolled back and the old instances keep serving; a rollout stopped midway is
+recorded as rollout_incomplete, with each instance's commit.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "Backend deployment name"
+                },
+                "batch_size": {
+                    "type": "integer",
+                    "default": 1,
+                    "minimum": 1,
+                    "description": "Instances replaced at a time behind a load balancer"
+                },
+                "drain_seconds": {
+                    "type": "integer",
+                    "default": 30,
+                    "minimum": 0,
+                    "maximum": 3600,
+                    "description": "How long a single old instance keeps finishing requests after the swap"
+                },
+                "use_golden_ami": {
+                    "type": "boolean",
+                    "default": True,
+                    "description": "Boot from a baked AMI for this runtime/revision when one exists"
+                },
+            },
+            "required": ["name"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="hot_update_backend",
+        description="""Update a running backend's code in place in seconds, without new instances.
+
+Over SSM Run Command, each instance checks out the new revision, reinstalls
+dependencies only if the lockfile/requirements changed, and restarts the
+app service. Artifact deployments get the new revision's artifact swapped
+in. Replicas are updated one at a time. An Auto Scaling group's instances
+are updated too, and its launch template moves to the new revision.
+Instances need an SSM instance profile; otherwise use redeploy_backend.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "name": {
+                    "type": "string",
+                    "description": "Backend deployment name"
+                },
+                "ref": {
+                    "type": "string",
+                    "default": "HEAD",
+                    "description": "Branch, tag or commit SHA to deploy"
+                },
+            },
+            "required": ["name"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="bake_golden_ami",
+        description="""Bake a reusable AMI for a backend runtime.
+
+The image has system updates and the Node.js or Python toolchain
+pre-installed, so new backend instances skip minutes of provisioning.
+Pass repo_url to also bake the app at its current commit with
+dependencies installed; deploys of that exact commit then just start it.
+
+Backend deploys pick up baked images automatically.
+
+Runs in the background: returns a job_id right away. Follow it with
+get_job (progress is also sent as notifications).
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "runtime": {
+                    "type": "string",
+                    "enum": ["nodejs", "python"],
+                    "description": "Application runtime to bake"
+                },
+                "repo_url": {
+                    "type": "string",
+                    "description": "Optional repository to bake in at its current HEAD"
+                },
+                "instance_type": {
+                    "type": "string",
+                    "default": "t3.small",
+                    "description": "Instance type used for the bake"
+                },
+            },
+            "required": ["runtime"]
+        },
+        background=True,
+    ),
+    ToolSpec(
+        name="get_job",
+        description="""Check a background job (deploys and AMI bakes run as jobs).
+
+Returns its status, current phase and, once finished, the tool result.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job ID returned when the tool was called"
+                },
+            },
+            "required": ["job_id"]
+        },
+    ),
+    ToolSpec(
+        name="cancel_job",
+        description="""Cancel a queued or running background job.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "job_id": {
+                    "type": "string",
+                    "description": "Job ID to cancel"
+                },
+            },
+            "required": ["job_id"]
+        },
+    ),
+    ToolSpec(
+        name="list_jobs",
+        description="""List background jobs started by this server.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "status": {
+                    "type": "string",
+                    "enum": ["queued", "running", "succeeded", "failed", "cancelled"],
+                    "description": "Only list jobs in this state"
+                },
+            },
+        },
+    ),
+    ToolSpec(
+        name="get_metrics",
+        description="""Show where deploy time goes.
+
+Per-phase timings (clone, build, upload, launch, wait, state save, ...)
+with byte counts and AWS API calls, plus API call totals by operation.
+Available as JSON or Prometheus text.
+        """,
+        input_schema={
+            "type": "object",
+            "properties": {
+                "format": {
+                    "type": "string",
+                    "enum": ["json", "prometheus"],
+                    "default": "json"
+                },
+                "include_spans": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Also return the most recent individual spans (JSON only)"
+                },
+                "reset": {
+                    "type": "boolean",
+                    "default": False,
+                    "description": "Clear the counters after reading them"
+                },
+            },
+        },
+    ),
+])
+
+
+@app.list_tools()
+async def list_tools() -> list[Tool]:
+    """List all available AWS deployment tools"""
+    
+    print("📋 Listing tools...", file=sys.stderr)
+    
+    return registry.tools
+
+
+def job_notifier():
+    """Build a callback that reports job progress to the calling client
+
+    Each phase goes out as a log message. Progress notifications are not
+    used: they belong to the tools/call request, which has already been
+    answered with the job ID by the time the job runs.
+    """
+    
+    session = app.request_context.session
     
-    print(f"✅ Returning {len(tools)} tools", file=sys.stderr)
-    return tools
+    async def notify(job):
+        await session.send_log_message(
+            level="error" if job.status == "failed" else "info",
+            data={"job_id": job.id, "status": job.status, "phase": job.phase, "message": job.message},
+            logger="jobs",
+        )
+    
+    return notify
+
 
+@app.set_logging_level()
+async def set_logging_level(level) -> None:
+    """Accept the client's log level (declares logging support for job updates)"""
+    
+    print(f"📝 Client log level: {level}", file=sys.stderr)
 
-@app.call_tool()
+
+# The registry validates arguments with validators compiled once per
+# tool, so the SDK's per-call schema check is switched off
+@app.call_tool(validate_input=False)
 async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
     """Execute a tool with given arguments"""
     
@@ -199,29 +582,16 @@ async def call_tool(name: str, arguments: Any) -> Sequence[TextContent]:
         print(json.dumps(arguments, indent=2), file=sys.stderr)
         print(f"{'='*60}\n", file=sys.stderr)
         
-        result = None
-        
-        if name == "deploy_backend_to_ec2":
-            result = await deploy_backend_to_ec2(**arguments)
-            
-        elif name == "deploy_frontend_to_s3":
-            result = await deploy_frontend_to_s3(**arguments)
-            
-        elif name == "connect_services":
-            result = await connect_services(**arguments)
-            
-        elif name == "setup_nginx_proxy":
-            result = await setup_nginx_proxy(**arguments)
-            
-        elif name == "create_autoscaling_group":
-            result = await create_autoscaling_group(**arguments)
-            
-        elif name == "estimate_deployment_cost":
-            result = await estimate_deployment_cost(**arguments)
-            
-        elif name == "get_deployment_status":
-            result = await get_deployment_status(**arguments)
-            
+        if name in registry and registry.specs[name].background:
+            job = registry.submit(name, arguments, notifier=job_notifier())
+            result = {
+                "success": True,
+                "message": f"✓ {name} started as job '{job.id}'. Use get_job to follow it.",
+                "job_id": job.id,
+                "status": job.status
+            }
+        elif name in registry:
+            result = await registry.call(name, arguments)
         else:
             result = {"error": f"Unknown tool: {name}", "success": False}
         
@@ -253,6 +623,11 @@ async def main():
         async with stdio_server() as (read_stream, write_stream):
             print("✅ Connected! Processing requests...\n", file=sys.stderr)
             
+            # stdio_server holds its own handle on stdout; send the tools'
+            # progress prints to stderr so concurrent jobs can't corrupt
+            # the JSON-RPC stream
+            sys.stdout = sys.stderr
+            
             await app.run(
                 read_stream,
                 write_stream,
@@ -264,6 +639,10 @@ async def main():
         print(f"\n\n❌ Server error: {e}", file=sys.stderr)
         import traceback
         traceback.print_exc(file=sys.stderr)
+    finally:
+        if "mcp_server.executors" in sys.modules:
+            from .executors import shutdown_pools
+            shutdown_pools()
 
 
 if __name__ == "__main__":
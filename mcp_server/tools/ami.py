@@ -0,0 +1,63 @@
+"""Golden AMI baking tool"""
+from typing import Dict, Any
+from ..deployers.ec2 import EC2Deployer
+from ..deployers.utils import resolve_commit
+from ..models.images import image_key, save_image, list_images
+from ..config import settings
+from ..executors import run_blocking, run_to_completion
+from ..jobs import report_progress
+
+
+async def bake_golden_ami(
+    runtime: str,
+    region: str = None,
+    repo_url: str = None,
+    instance_type: str = "t3.small",
+) -> Dict[str, Any]:
+    """Bake and register a golden AMI for a runtime
+
+    The image has the system upgraded and the runtime toolchain installed.
+    With repo_url, it also holds the app at its current HEAD with
+    dependencies installed, and is used only for deploys of that revision.
+    """
+    
+    if region is None:
+        region = settings.aws_default_region
+    
+    revision = None
+    if repo_url:
+        revision = await run_blocking(resolve_commit, repo_url, pool="build")
+        if revision is None:
+            return {
+                "success": False,
+                "message": f"Could not resolve HEAD of {repo_url}"
+            }
+    
+    print(f"\n🍞 Baking {runtime} AMI in {region}...")
+    if revision:
+        print(f"   App revision: {revision[:12]}")
+    
+    report_progress("bake", f"Baking {runtime} AMI in {region}")
+    deployer = await run_blocking(EC2Deployer, region=region)
+    # Once started, the bake finishes and is registered even if cancelled,
+    # so its AMI isn't left unrecorded
+    image = await run_to_completion(run_blocking(
+        deployer.bake_ami,
+        runtime,
+        repo_url=repo_url,
+        revision=revision,
+        instance_type=instance_type,
+    ))
+    
+    key = image_key(region, runtime, revision)
+    save_image(key, image)
+    
+    print(f"\n✅ Golden AMI ready: {image['ami_id']}")
+    
+    return {
+        "success": True,
+        "message": f"✓ Baked {runtime} AMI {image['ami_id']}",
+        "image_key": key,
+        "image": image,
+        "registered_images": sorted(list_images()),
+    }
@@ -0,0 +1,174 @@
+"""EC2 Auto Scaling for backend deployments"""
+from typing import Dict, Any, Optional
+from ..config import settings
+from ..deployers.ec2 import EC2Deployer
+from ..models.deployment import load_deployment, update_deployment
+from ..executors import run_blocking, run_to_completion
+from ..metrics import span
+
+
+def group_user_data(
+    deployer: EC2Deployer,
+    deployment: Dict[str, Any],
+    group_name: str,
+    warm_pool_size: int,
+    image_kind: str,
+    commit: Optional[str],
+) -> str:
+    """User data for a group's instances, at commit
+
+    Instances clone the repo at boot rather than fetching the deploy's
+    artifact: its presigned URL expires long before the group does.
+    """
+
+    user_data = deployer.generate_user_data(
+        deployment['app_type'],
+        deployment['repo_url'],
+        deployment['port'],
+        provisioned=image_kind != 'stock',
+        app_baked=image_kind == 'app',
+        proxy_config=deployment.get('proxy', {}).get('config'),
+        commit=commit,
+    )
+    if warm_pool_size:
+        user_data += deployer.lifecycle_script(group_name)
+    return user_data
+
+
+async def create_autoscaling_group(
+    instance_name: str,
+    min_size: int = 1,
+    max_size: int = 3,
+    target_cpu: int = 70,
+    warm_pool_size: int = 0,
+) -> Dict[str, Any]:
+    """Run a deployed backend in an Auto Scaling group
+
+    The launch template reuses the deployment's AMI, instance type and
+    security group, and boots the same user data as the original instance,
+    at the deployed commit. Group instances join the deployment's load
+    balancer, so only backends deployed with replicas can scale. The group
+    tracks target_cpu average utilization. With warm_pool_size, that many
+    instances are kept pre-initialized and stopped for scale-out.
+    """
+
+    deployment = load_deployment(instance_name)
+    if not deployment or deployment.get('type') != 'backend':
+        return {
+            "success": False,
+            "message": f"Backend '{instance_name}' not found"
+        }
+
+    if deployment.get('autoscaling'):
+        return {
+            "success": False,
+            "message": f"Backend '{instance_name}' already has Auto Scaling group "
+                       f"{deployment['autoscaling']['group_name']}"
+        }
+
+    if min_size > max_size:
+        return {
+            "success": False,
+            "message": f"min_size ({min_size}) is larger than max_size ({max_size})"
+        }
+
+    load_balancer = deployment.get('load_balancer')
+    if not load_balancer:
+        return {
+            "success": False,
+            "message": f"Backend '{instance_name}' has no load balancer for group instances "
+                       f"to join; deploy it with replicas >= 2 first"
+        }
+
+    if warm_pool_size and not settings.instance_profile_name:
+        return {
+            "success": False,
+            "message": "A warm pool needs INSTANCE_PROFILE_NAME: its instances report "
+                       "readiness with autoscaling:CompleteLifecycleAction"
+        }
+
+    region = deployment['region']
+    group_name = f"{instance_name}-asg"
+    template_name = f"{instance_name}-lt"
+
+    print(f"\n📈 Creating Auto Scaling group '{group_name}'...")
+    print(f"   Size: {min_size}-{max_size}, target CPU {target_cpu}%")
+    if warm_pool_size:
+        print(f"   Warm pool: {warm_pool_size} stopped instances")
+
+    deployer = await run_blocking(EC2Deployer, region=region)
+
+    user_data = group_user_data(
+        deployer,
+        deployment,
+        group_name,
+        warm_pool_size,
+        image_kind=deployment.get('image_kind', 'stock'),
+        commit=deployment.get('commit'),
+    )
+
+    # The group isn't recorded yet, so anything under these names is left
+    # over from an earlier attempt that failed
+    await run_blocking(deployer.delete_autoscaling_group, group_name, template_name)
+
+    try:
+        with span("launch_template"):
+            template = await run_to_completion(run_blocking(
+                deployer.create_launch_template,
+                name=template_name,
+                instance_type=deployment['instance_type'],
+                security_group_id=deployment['security_group_id'],
+                user_data=user_data,
+                ami_id=deployment.get('ami_id')
+            ))
+        print(f"   Launch template: {template['LaunchTemplateId']}")
+
+        with span("autoscaling_group", min_size=min_size, max_size=max_size):
+            subnets = await run_blocking(deployer.default_subnets)
+            group = await run_to_completion(run_blocking(
+                deployer.create_autoscaling_group,
+                name=group_name,
+                launch_template_id=template['LaunchTemplateId'],
+                min_size=min_size,
+                max_size=max_size,
+                subnet_ids=subnets,
+                target_cpu=target_cpu,
+                warm_pool_size=warm_pool_size,
+                target_group_arns=[load_balancer['target_group_arn']]
+            ))
+    except BaseException:
+        # Also on cancellation (cancel_job), so nothing is left unrecorded
+        print(f"❌ Creating '{group_name}' failed, removing it and its launch template")
+        await run_blocking(deployer.delete_autoscaling_group, group_name, template_name)
+        raise
+
+    autoscaling = {
+        "group_name": group_name,
+        "launch_template_id": template['LaunchTemplateId'],
+        "min_size": min_size,
+        "max_size": max_size,
+        "target_cpu": target_cpu,
+        "warm_pool_size": warm_pool_size,
+        "subnets": subnets,
+        "policy_arn": group['policy_arn'],
+    }
+
+    def record_group(info):
+        info['autoscaling'] = autoscaling
+
+    update_deployment(instance_name, record_group)
+
+    instance_cost = deployer.estimate_cost(deployment['instance_type'])
+
+    print(f"\n✅ Auto Scaling group ready!")
+
+    return {
+        "success": True,
+        "message": f"✓ Backend '{instance_name}' now scales between {min_size} and {max_size} "
+                   f"instances at {target_cpu}% CPU",
+        "autoscaling": autoscaling,
+        "cost_per_month": {
+            "min": instance_cost * min_size,
+            "max": instance_cost * max_size,
+        }
+    }
@@ -1,6 +1,6 @@
 """Connect backend and frontend services"""
 from typing import Dict, Any
-from ..models.deployment import load_deployment, save_deployment
+from ..models.deployment import load_deployment, update_deployment
 
 
 async def connect_services(
@@ -33,14 +33,18 @@ async def connect_services(
     frontend_url = frontend.get('url')
     
     # Update frontend deployment info
-    frontend['backend_url'] = backend_url
-    frontend['connected_to'] = backend_name
-    save_deployment(frontend_name, frontend)
+    def link_frontend(info):
+        info['backend_url'] = backend_url
+        info['connected_to'] = backend_name
+    
+    update_deployment(frontend_name, link_frontend)
     
     # Update backend deployment info
-    backend['frontend_url'] = frontend_url
-    backend['connected_to'] = frontend_name
-    save_deployment(backend_name, backend)
+    def link_backend(info):
+        info['frontend_url'] = frontend_url
+        info['connected_to'] = frontend_name
+    
+    update_deployment(backend_name, link_backend)
     
     print(f"\n✅ Services connected!")
     print(f"   Backend → Frontend: CORS configured for {frontend_url}")
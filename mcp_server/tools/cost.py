@@ -3,6 +3,8 @@ from typing import Dict, Any
 from ..models.deployment import load_deployment
 from ..deployers.ec2 import EC2Deployer
 from ..deployers.s3 import S3Deployer
+from ..deployers.elb import LoadBalancerDeployer
+from ..executors import run_blocking
 
 
 async def estimate_deployment_cost(deployment_name: str) -> Dict[str, Any]:
@@ -22,13 +24,18 @@ async def estimate_deployment_cost(deployment_name: str) -> Dict[str, Any]:
     
     if deployment_type == 'backend':
         instance_type = deployment.get('instance_type', 't2.micro')
-        deployer = EC2Deployer()
-        cost = deployer.estimate_cost(instance_type)
+        replicas = deployment.get('replicas', 1)
+        deployer = await run_blocking(EC2Deployer)
+        cost = deployer.estimate_cost(instance_type) * replicas
         total_cost += cost
         breakdown['ec2'] = cost
+        
+        if deployment.get('load_balancer'):
+            total_cost += LoadBalancerDeployer.MONTHLY_COST
+            breakdown['load_balancer'] = LoadBalancerDeployer.MONTHLY_COST
     
     elif deployment_type == 'frontend':
-        deployer = S3Deployer()
+        deployer = await run_blocking(S3Deployer)
         cost = deployer.estimate_cost()
         total_cost += cost
         breakdown['s3'] = cost
@@ -1,11 +1,114 @@
 """EC2 Backend Deployment Tool"""
 import asyncio
 import secrets
-from typing import Dict, Any
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Any, List
 from ..deployers.ec2 import EC2Deployer
-from ..deployers.utils import clone_repo, detect_app_type, cleanup_temp_dir
-from ..models.deployment import save_deployment
+from ..deployers.elb import LoadBalancerDeployer
+from ..deployers.artifacts import ArtifactStore
+from ..deployers.utils import clone_repo, detect_app_type, cleanup_temp_dir, head_commit
+from ..models.deployment import replace_deployment
 from ..config import settings
+from ..executors import run_blocking, run_to_completion
+from ..jobs import report_progress
+from ..metrics import span
+
+
+async def _create_load_balancer(
+    deployer: EC2Deployer,
+    name: str,
+    region: str,
+    subnets: List[str],
+    instance_security_group_id: str,
+    port: int,
+    health_check_path: str = None,
+    created: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """ALB on port 80 forwarding to a target group on the app port
+
+    The instances' security group only admits the app port from the
+    load balancer's own group. Each resource goes into created (returned
+    once complete) as soon as it exists, so a failed deploy can remove
+    what was made.
+    """
+
+    balancer = await run_blocking(LoadBalancerDeployer, region=region)
+    token = secrets.token_hex(2)
+    created = {} if created is None else created
+
+    created["security_group_id"] = await run_blocking(
+        deployer.create_security_group,
+        name=f"{name}-alb-sg-{secrets.token_hex(4)}",
+        ports=[80]
+    )
+    await run_blocking(
+        deployer.allow_from_group,
+        instance_security_group_id,
+        created["security_group_id"],
+        port
+    )
+
+    vpc_id = await run_blocking(deployer.default_vpc_id)
+    created["target_group_arn"] = await run_blocking(
+        balancer.create_target_group,
+        name=LoadBalancerDeployer.resource_name(name, f"tg-{token}"),
+        vpc_id=vpc_id,
+        port=port,
+        health_path=health_check_path
+    )
+    load_balancer = await run_blocking(
+        balancer.create_load_balancer,
+        name=LoadBalancerDeployer.resource_name(name, f"alb-{token}"),
+        subnet_ids=subnets,
+        security_group_id=created["security_group_id"]
+    )
+    created["arn"] = load_balancer['arn']
+    created["dns_name"] = load_balancer['dns_name']
+    created["listener_arn"] = await run_blocking(
+        balancer.create_listener,
+        load_balancer['arn'],
+        created["target_group_arn"]
+    )
+
+    return created
+
+
+async def _remove_deploy(
+    deployer: EC2Deployer,
+    region: str,
+    instance_ids: List[str],
+    security_group_id: str,
+    load_balancer: Dict[str, Any] = None,
+) -> None:
+    """Best-effort removal of everything a failed deploy created"""
+
+    load_balancer = load_balancer or {}
+    balancer = await run_blocking(LoadBalancerDeployer, region=region)
+
+    steps = []
+    if instance_ids:
+        steps.append((f"instances {', '.join(instance_ids)}", deployer.terminate_instances, instance_ids))
+    if load_balancer.get("arn"):
+        steps.append(("load balancer", balancer.delete_load_balancer, load_balancer["arn"]))
+    if load_balancer.get("target_group_arn"):
+        steps.append(("target group", balancer.delete_target_group, load_balancer["target_group_arn"]))
+    # The instances' group references the load balancer's, so it goes first
+    steps.append((f"security group {security_group_id}", deployer.delete_security_group, security_group_id))
+    if load_balancer.get("security_group_id"):
+        steps.append((
+            f"security group {load_balancer['security_group_id']}",
+            deployer.delete_security_group,
+            load_balancer["security_group_id"]
+        ))
+
+    for what, func, arg in steps:
+        try:
+            await run_blocking(func, arg)
+            print(f"   Removed {what}")
+        except Exception as e:
+            print(f"⚠️  Could not remove {what}: {e}")
 
 
 async def deploy_backend_to_ec2(
@@ -14,8 +117,27 @@ async def deploy_backend_to_ec2(
     instance_type: str = "t2.micro",
     region: str = None,
     port: int = 3000,
+    health_check_path: str = None,
+    use_golden_ami: bool = True,
+    ship_artifact: bool = False,
+    replicas: int = 1,
 ) -> Dict[str, Any]:
-    """Deploy backend application to EC2"""
+    """Deploy backend application to EC2
+
+    With use_golden_ami, an AMI baked by bake_golden_ami for this runtime
+    (or for this exact app revision) is used so the instance skips system
+    provisioning (and dependency installation) at boot.
+
+    With ship_artifact, dependencies are resolved once locally into a
+    tarball staged in S3 (reused for every instance of the same commit),
+    and the instance downloads it instead of running npm/pip install.
+
+    A single instance is reached through an Elastic IP, so redeploys can
+    swap the instance without changing the URL. With replicas > 1, that
+    many instances are spread over the default VPC's availability zones
+    behind an Application Load Balancer, whose DNS name becomes the
+    deployment URL.
+    """
     
     if region is None:
         region = settings.aws_default_region
@@ -24,48 +146,143 @@ async def deploy_backend_to_ec2(
     print(f"   Repository: {repo_url}")
     print(f"   Instance: {instance_type} in {region}")
     print(f"   Port: {port}")
+    if replicas > 1:
+        print(f"   Replicas: {replicas} behind a load balancer")
     
-    deployer = EC2Deployer(region=region)
+    deployer = await run_blocking(EC2Deployer, region=region)
     
     # Clone and detect app type
     print(f"\n📦 Analyzing repository...")
-    repo_path = clone_repo(repo_url)
-    app_type = detect_app_type(repo_path)
+    report_progress("analyze", "Analyzing repository")
+    with span("clone", mode="sparse"):
+        repo_path = await run_blocking(clone_repo, repo_url, mode="sparse", pool="build")
+    with span("detect"):
+        app_type = await run_blocking(detect_app_type, repo_path, pool="build")
+        commit = await run_blocking(head_commit, repo_path, pool="build")
     print(f"   Detected: {app_type} application")
-    cleanup_temp_dir(repo_path)
-    
-    # Create security group
-    print(f"\n🔒 Creating security group...")
-    sg_name = f"{name}-sg-{secrets.token_hex(4)}"
-    security_group_id = deployer.create_security_group(
-        name=sg_name,
-        ports=[port, 22]  # App port + SSH
-    )
-    print(f"   Security group: {security_group_id}")
+    await run_blocking(cleanup_temp_dir, repo_path, pool="build")
     
     # Generate user data script
     print(f"\n📝 Generating deployment script...")
-    if app_type == "nodejs":
-        user_data = deployer.generate_user_data_nodejs(repo_url, port)
-    elif app_type == "python":
-        user_data = deployer.generate_user_data_python(repo_url, port)
-    else:
+    if app_type not in ("nodejs", "python"):
         raise ValueError(f"Unsupported app type: {app_type}. Supported: nodejs, python")
     
-    # Launch EC2 instance
-    print(f"\n☁️  Launching EC2 instance...")
-    instance = deployer.launch_instance(
-        name=name,
-        instance_type=instance_type,
-        security_group_id=security_group_id,
-        user_data=user_data
+    if use_golden_ami:
+        with span("image"):
+            ami = await run_blocking(deployer.resolve_ami, app_type, commit)
+    else:
+        ami = {"ami_id": None, "kind": "stock"}
+    print(f"   Image: {ami['kind']} {ami['ami_id'] or ''}")
+    
+    artifact = None
+    if ship_artifact and ami["kind"] != "app":
+        print(f"\n📦 Preparing pre-built artifact...")
+        report_progress("artifact", "Preparing pre-built artifact")
+        store = await run_blocking(ArtifactStore, region=region)
+        work_dir = Path(tempfile.mkdtemp())
+        try:
+            with span("artifact") as artifact_span:
+                artifact = await store.build_and_stage(repo_url, commit, app_type, work_dir)
+                artifact_span.set(bytes=artifact.get("size_bytes", 0), reused=artifact["reused"])
+        finally:
+            await run_blocking(cleanup_temp_dir, work_dir, pool="build")
+    
+    user_data = deployer.generate_user_data(
+        app_type,
+        repo_url,
+        port,
+        provisioned=ami["kind"] != "stock",
+        app_baked=ami["kind"] == "app",
+        artifact_url=artifact["url"] if artifact else None,
+        commit=commit,
     )
     
-    instance_id = instance['InstanceId']
-    print(f"   Instance ID: {instance_id}")
+    # Created last, so a failure above leaves nothing behind
+    print(f"\n🔒 Creating security group...")
+    report_progress("security_group", "Creating security group")
+    sg_name = f"{name}-sg-{secrets.token_hex(4)}"
+    with span("security_group"):
+        security_group_id = await run_to_completion(run_blocking(
+            deployer.create_security_group,
+            name=sg_name,
+            # App port + SSH; behind a load balancer only it reaches the app
+            ports=[port, 22] if replicas == 1 else [22]
+        ))
+    print(f"   Security group: {security_group_id}")
+    
+    if replicas > 1:
+        return await _deploy_replicas(
+            deployer,
+            name=name,
+            region=region,
+            replicas=replicas,
+            instance_type=instance_type,
+            port=port,
+            health_check_path=health_check_path,
+            security_group_id=security_group_id,
+            user_data=user_data,
+            ami=ami,
+            deployment_info={
+                "name": name,
+                "type": "backend",
+                "port": port,
+                "security_group_id": security_group_id,
+                "instance_type": instance_type,
+                "region": region,
+                "app_type": app_type,
+                "repo_url": repo_url,
+                "commit": commit,
+                "image_kind": ami["kind"],
+                "health_check_path": health_check_path,
+            },
+            artifact=artifact,
+        )
+    
+    instance_id = None
+    try:
+        # Launch EC2 instance
+        print(f"\n☁️  Launching EC2 instance...")
+        report_progress("launch", "Launching EC2 instance")
+        with span("launch", instance_type=instance_type):
+            instance = await run_to_completion(run_blocking(
+                deployer.launch_instance,
+                name=name,
+                instance_type=instance_type,
+                security_group_id=security_group_id,
+                user_data=user_data,
+                ami_id=ami["ami_id"]
+            ))
+        
+        instance_id = instance['InstanceId']
+        print(f"   Instance ID: {instance_id}")
+        
+        # Wait for instance to be running and the app to answer
+        report_progress("readiness", f"Waiting for {instance_id} to serve traffic")
+        with span("wait"):
+            await deployer.wait_for_instance(
+                instance_id, port=port, health_path=health_check_path
+            )
+        
+        # A fixed address that redeploys move to each replacement instance
+        report_progress("elastic_ip", f"Attaching an Elastic IP to {instance_id}")
+        with span("elastic_ip"):
+            elastic_ip = await run_to_completion(run_blocking(deployer.allocate_address, name))
+            try:
+                await run_to_completion(run_blocking(
+                    deployer.associate_address, elastic_ip['allocation_id'], instance_id
+                ))
+            except BaseException:
+                await run_blocking(deployer.release_address, elastic_ip['allocation_id'])
+                raise
+    except BaseException as e:
+        # Also on cancellation (cancel_job), so nothing is left unrecorded
+        print(f"\n❌ Deploy failed ({str(e) or type(e).__name__}), removing what it created...")
+        report_progress("rollback", "Removing the instance and security group")
+        await _remove_deploy(deployer, region, [instance_id] if instance_id else [], security_group_id)
+        raise
     
-    # Wait for instance to be running
-    public_ip = await deployer.wait_for_instance(instance_id)
+    public_ip = elastic_ip['public_ip']
+    print(f"   Elastic IP: {public_ip}")
     
     # Save deployment info
     deployment_info = {
@@ -73,6 +290,7 @@ async def deploy_backend_to_ec2(
         "type": "backend",
         "instance_id": instance_id,
         "public_ip": public_ip,
+        "elastic_ip": elastic_ip,
         "port": port,
         "url": f"http://{public_ip}:{port}",
         "security_group_id": security_group_id,
@@ -80,10 +298,21 @@ async def deploy_backend_to_ec2(
         "region": region,
         "app_type": app_type,
         "status": "running",
-        "repo_url": repo_url
+        "repo_url": repo_url,
+        "commit": commit,
+        "ami_id": instance.get('ImageId'),
+        "image_kind": ami["kind"],
+        "health_check_path": health_check_path
     }
     
-    save_deployment(name, deployment_info)
+    if artifact:
+        deployment_info["artifact"] = {
+            "bucket": artifact["bucket"],
+            "key": artifact["key"],
+            "commit": artifact["commit"],
+        }
+    
+    replace_deployment(name, deployment_info)
     
     cost = deployer.estimate_cost(instance_type)
     
@@ -98,6 +327,137 @@ async def deploy_backend_to_ec2(
         "url": deployment_info["url"],
         "public_ip": public_ip,
         "port": port,
+        "readiness": deployer.last_readiness,
         "cost_per_month": cost,
         "deployment_info": deployment_info
-    }
\ No newline at end of file
+    }
+
+
+async def _deploy_replicas(
+    deployer: EC2Deployer,
+    name: str,
+    region: str,
+    replicas: int,
+    instance_type: str,
+    port: int,
+    health_check_path: str,
+    security_group_id: str,
+    user_data: str,
+    ami: Dict[str, Any],
+    deployment_info: Dict[str, Any],
+    artifact: Dict[str, Any] = None,
+) -> Dict[str, Any]:
+    """Launch replicas across zones and put them behind a new ALB
+    
+    If any step fails, the instances, load balancer, target group and
+    security groups created for the deploy are removed again.
+    """
+    
+    instance_ids: List[str] = []
+    load_balancer: Dict[str, Any] = {}
+    try:
+        subnets = await run_blocking(deployer.default_subnets)
+        
+        # Instances boot while the load balancer is provisioned; both run to
+        # completion so a failure in one doesn't orphan what the other made
+        async def launch():
+            return await asyncio.gather(
+                deployer.launch_across_zones(
+                    subnets,
+                    replicas,
+                    name=name,
+                    instance_type=instance_type,
+                    security_group_id=security_group_id,
+                    user_data=user_data,
+                    ami_id=ami["ami_id"],
+                ),
+                _create_load_balancer(
+                    deployer,
+                    name,
+                    region,
+                    subnets,
+                    security_group_id,
+                    port,
+                    health_check_path,
+                    created=load_balancer,
+                ),
+                return_exceptions=True,
+            )
+        
+        print(f"\n☁️  Launching {replicas} instances across {min(replicas, len(subnets))} zones...")
+        report_progress("launch", f"Launching {replicas} instances and a load balancer")
+        with span("launch", instance_type=instance_type, replicas=replicas):
+            launched, balancer_created = await run_to_completion(launch())
+        if not isinstance(launched, BaseException):
+            instances = launched
+            instance_ids = [instance['InstanceId'] for instance in instances]
+        for outcome in (launched, balancer_created):
+            if isinstance(outcome, BaseException):
+                raise outcome
+        
+        print(f"   Instances: {', '.join(instance_ids)}")
+        print(f"   Load balancer: {load_balancer['dns_name']}")
+        
+        report_progress("readiness", f"Waiting for {replicas} targets to pass health checks")
+        balancer = await run_blocking(LoadBalancerDeployer, region=region)
+        with span("wait", replicas=replicas):
+            deadline = time.time() + settings.instance_ready_timeout
+            public_ips = await asyncio.gather(*(
+                deployer.wait_for_running(instance_id, deadline) for instance_id in instance_ids
+            ))
+            await run_blocking(balancer.register_targets, load_balancer['target_group_arn'], instance_ids)
+            await balancer.wait_healthy(
+                load_balancer['target_group_arn'],
+                instance_ids,
+                timeout=max(int(deadline - time.time()), 60)
+            )
+    except BaseException as e:
+        # Also on cancellation (cancel_job), so nothing is left unrecorded
+        print(f"\n❌ Deploy failed ({str(e) or type(e).__name__}), removing what it created...")
+        report_progress("rollback", "Removing instances and load balancer")
+        await _remove_deploy(deployer, region, instance_ids, security_group_id, load_balancer)
+        raise
+    
+    url = f"http://{load_balancer['dns_name']}"
+    deployment_info.update({
+        "instance_id": instance_ids[0],
+        "instance_ids": instance_ids,
+        "instances": [
+            {
+                "instance_id": instance['InstanceId'],
+                "availability_zone": instance.get('Placement', {}).get('AvailabilityZone'),
+                "public_ip": public_ip,
+                "commit": deployment_info["commit"],
+            }
+            for instance, public_ip in zip(instances, public_ips)
+        ],
+        "replicas": replicas,
+        "load_balancer": load_balancer,
+        "url": url,
+        "status": "running",
+        "ami_id": instances[0].get('ImageId'),
+    })
+    if artifact:
+        deployment_info["artifact"] = {
+            "bucket": artifact["bucket"],
+            "key": artifact["key"],
+            "commit": artifact["commit"],
+        }
+    
+    replace_deployment(name, deployment_info)
+    
+    cost = deployer.estimate_cost(instance_type) * replicas + LoadBalancerDeployer.MONTHLY_COST
+    
+    print(f"\n✅ Backend deployment complete!")
+    print(f"   URL: {url}")
+    print(f"   Cost: ${cost:.2f}/month")
+    
+    return {
+        "success": True,
+        "message": f"✓ Backend '{name}' deployed on {replicas} instances behind a load balancer!",
+        "instance_ids": instance_ids,
+        "url": url,
+        "port": port,
+        "cost_per_month": round(cost, 2),
+        "deployment_info": deployment_info
+    }
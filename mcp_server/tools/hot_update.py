@@ -0,0 +1,240 @@
+"""In-place backend code updates over SSM Run Command"""
+import asyncio
+import re
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, Optional
+from ..deployers.ec2 import EC2Deployer
+from ..deployers.artifacts import ArtifactStore
+from ..deployers.ssm import SSMRunner
+from ..deployers.utils import resolve_commit, cleanup_temp_dir
+from ..models.deployment import load_deployment, update_deployment
+from .autoscaling import group_user_data
+from ..executors import run_blocking
+from ..jobs import report_progress
+from ..metrics import span
+
+# Longest a single instance may spend fetching, installing and restarting
+UPDATE_TIMEOUT = 900
+
+
+def _resolve_ref(repo_url: str, ref: str) -> Optional[str]:
+    """Commit SHA for a full SHA, a ref, or a branch or tag name"""
+
+    if re.fullmatch(r"[0-9a-f]{40}", ref):
+        return ref
+
+    for candidate in (ref, f"refs/heads/{ref}", f"refs/tags/{ref}"):
+        commit = resolve_commit(repo_url, candidate)
+        if commit:
+            return commit
+    return None
+
+
+async def hot_update_backend(name: str, ref: str = "HEAD") -> Dict[str, Any]:
+    """Update a running backend's code in place, without replacing instances
+
+    Over SSM Run Command, each instance checks out the new revision in its
+    existing git checkout, reinstalls dependencies only if the lockfile or
+    requirements changed, and restarts app.service. Deployments shipped as
+    artifacts get the revision's artifact (staged if needed) swapped in
+    instead. Replicas are updated one at a time; each instance's phases are
+    reported as job progress.
+
+    With an Auto Scaling group, its in-service instances are updated too,
+    and the launch template gets a version that boots the new revision
+    (warm pools are replaced by an instance refresh), so instances the group
+    launches later don't come up on the old code.
+    """
+
+    deployment = load_deployment(name)
+    if not deployment or deployment.get('type') != 'backend' or not deployment.get('instance_id'):
+        return {
+            "success": False,
+            "message": f"Backend '{name}' not found"
+        }
+
+    region = deployment['region']
+    app_type = deployment['app_type']
+    repo_url = deployment['repo_url']
+    instance_ids = deployment.get('instance_ids') or [deployment['instance_id']]
+    autoscaling = deployment.get('autoscaling')
+
+    deployer = await run_blocking(EC2Deployer, region=region)
+    if autoscaling:
+        group_ids = await run_blocking(deployer.group_instance_ids, autoscaling['group_name'])
+        instance_ids = instance_ids + [
+            instance_id for instance_id in group_ids if instance_id not in instance_ids
+        ]
+
+    print(f"\n⚡ Hot-updating backend '{name}' on {len(instance_ids)} instance(s)...")
+    report_progress("resolve", f"Resolving {ref} of {repo_url}")
+    commit = await run_blocking(_resolve_ref, repo_url, ref, pool="build")
+    if commit is None:
+        return {
+            "success": False,
+            "message": f"Could not resolve {ref} of {repo_url}"
+        }
+    print(f"   Revision: {(deployment.get('commit') or '?')[:12]} → {commit[:12]}")
+
+    runner = await run_blocking(SSMRunner, region=region)
+    online = await run_blocking(runner.managed_instances, instance_ids)
+    offline = [instance_id for instance_id in instance_ids if instance_id not in online]
+    if offline:
+        return {
+            "success": False,
+            "message": f"Not reachable over SSM: {', '.join(offline)}. Backends need an "
+                       f"instance profile with SSM access (INSTANCE_PROFILE_NAME) to be "
+                       f"updated in place; use redeploy_backend instead."
+        }
+
+    port = deployment['port']
+    health_path = deployment.get('health_check_path')
+
+    artifact = None
+    if deployment.get('artifact'):
+        # No git checkout on these instances: ship the revision's artifact
+        report_progress("artifact", "Preparing pre-built artifact")
+        store = await run_blocking(ArtifactStore, region=region)
+        work_dir = Path(tempfile.mkdtemp())
+        try:
+            with span("artifact"):
+                artifact = await store.build_and_stage(repo_url, commit, app_type, work_dir)
+        finally:
+            await run_blocking(cleanup_temp_dir, work_dir, pool="build")
+        script = deployer.generate_artifact_update_script(app_type, artifact["url"], port, health_path)
+    else:
+        script = deployer.generate_update_script(app_type, commit, port, health_path)
+
+    def relay(instance_id: str):
+        def on_output(line: str) -> None:
+            if line.startswith("::phase "):
+                phase = line.split(" ", 1)[1].strip()
+                print(f"   {instance_id}: {phase}")
+                report_progress(phase, f"{instance_id}: {phase.replace('_', ' ')}")
+        return on_output
+
+    report_progress("update", f"Updating {len(instance_ids)} instance(s) to {commit[:12]}")
+    with span("hot_update", instances=len(instance_ids)):
+        command_id = await run_blocking(
+            runner.send_script,
+            instance_ids,
+            script,
+            comment=f"aws-agent: update {name} to {commit[:12]}",
+            timeout_seconds=UPDATE_TIMEOUT,
+            # One at a time, so replicas behind a load balancer keep serving
+            max_concurrency=1
+        )
+        results = await asyncio.gather(*(
+            runner.wait(
+                command_id,
+                instance_id,
+                timeout=UPDATE_TIMEOUT * len(instance_ids),
+                on_output=relay(instance_id)
+            )
+            for instance_id in instance_ids
+        ), return_exceptions=True)
+
+    outcomes = {}
+    for instance_id, result in zip(instance_ids, results):
+        if isinstance(result, Exception):
+            outcomes[instance_id] = {"status": "Error", "error": str(result)}
+        else:
+            outcomes[instance_id] = {
+                "status": result['status'],
+                "stderr": result['stderr'][-2000:] if result['status'] != 'Success' else "",
+            }
+
+    failed = [i for i, outcome in outcomes.items() if outcome['status'] != 'Success']
+    if failed:
+        return {
+            "success": False,
+            "message": f"Update to {commit[:12]} failed on {', '.join(failed)}; "
+                       f"later instances were not touched",
+            "command_id": command_id,
+            "instances": outcomes
+        }
+
+    def record_update(info):
+        info['commit'] = commit
+        for instance in info.get('instances', []):
+            instance['commit'] = commit
+        # Every instance is on commit now, whatever a redeploy left behind
+        info.pop('rollout_incomplete', None)
+        if artifact:
+            info['artifact'] = {
+                "bucket": artifact["bucket"],
+                "key": artifact["key"],
+                "commit": artifact["commit"],
+            }
+
+    update_deployment(name, record_update)
+
+    result = {
+        "success": True,
+        "message": f"✓ Backend '{name}' updated in place to {commit[:12]}",
+        "commit": commit,
+        "command_id": command_id,
+        "instances": outcomes
+    }
+
+    # The running instances are updated (and recorded) at this point, so a
+    # failed template update is reported rather than failing the update
+    if autoscaling:
+        report_progress("autoscaling", f"Updating the launch template of {autoscaling['group_name']}")
+        try:
+            await _update_group_template(deployer, deployment, autoscaling, commit)
+        except Exception as e:
+            result["warning"] = (
+                f"Instances {autoscaling['group_name']} launches from now on will "
+                f"boot the old revision; updating its launch template failed: {e}"
+            )
+            print(f"⚠️  {result['warning']}")
+        else:
+            if autoscaling.get('warm_pool_size'):
+                # Warm instances booted the old revision before they stopped
+                try:
+                    result["instance_refresh_id"] = await run_blocking(
+                        deployer.start_instance_refresh,
+                        autoscaling['group_name']
+                    )
+                except Exception as e:
+                    result["warning"] = (
+                        f"Warm instances of {autoscaling['group_name']} are on the old "
+                        f"revision and the instance refresh to replace them failed: {e}"
+                    )
+                    print(f"⚠️  {result['warning']}")
+
+    print(f"\n✅ Backend '{name}' is on {commit[:12]}")
+
+    return result
+
+
+async def _update_group_template(
+    deployer: EC2Deployer,
+    deployment: Dict[str, Any],
+    autoscaling: Dict[str, Any],
+    commit: str,
+) -> None:
+    """Add a launch template version that boots commit"""
+
+    image_kind = deployment.get('image_kind', 'stock')
+    ami_id = None
+    if image_kind == 'app':
+        # The baked image holds the old revision; boot its runtime image instead
+        ami = await run_blocking(deployer.resolve_ami, deployment['app_type'])
+        image_kind, ami_id = ami['kind'], ami['ami_id']
+
+    await run_blocking(
+        deployer.update_launch_template,
+        autoscaling['launch_template_id'],
+        group_user_data(
+            deployer,
+            deployment,
+            autoscaling['group_name'],
+            autoscaling.get('warm_pool_size', 0),
+            image_kind=image_kind,
+            commit=commit,
+        ),
+        ami_id
+    )
@@ -0,0 +1,62 @@
+"""Background job tools"""
+from typing import Dict, Any
+from ..jobs import JOB_STATES, get_queue
+
+
+async def get_job(job_id: str) -> Dict[str, Any]:
+    """Get status, current phase and (once finished) result of a job"""
+    
+    job = get_queue().get(job_id)
+    
+    if not job:
+        return {
+            "success": False,
+            "message": f"Job '{job_id}' not found"
+        }
+    
+    return {
+        "success": True,
+        "job": job.to_dict()
+    }
+
+
+async def cancel_job(job_id: str) -> Dict[str, Any]:
+    """Cancel a queued or running job"""
+    
+    queue = get_queue()
+    job = queue.get(job_id)
+    
+    if not job:
+        return {
+            "success": False,
+            "message": f"Job '{job_id}' not found"
+        }
+    
+    if not queue.cancel(job_id):
+        return {
+            "success": False,
+            "message": f"Job '{job_id}' already {job.status}"
+        }
+    
+    return {
+        "success": True,
+        "message": f"✓ Cancellation requested for job '{job_id}'"
+    }
+
+
+async def list_jobs(status: str = None) -> Dict[str, Any]:
+    """List jobs known to this server, optionally only those in one state"""
+    
+    if status is not None and status not in JOB_STATES:
+        return {
+            "success": False,
+            "message": f"Unknown job status '{status}'. Supported: {', '.join(JOB_STATES)}"
+        }
+    
+    jobs = get_queue().list(status)
+    
+    return {
+        "success": True,
+        "count": len(jobs),
+        "jobs": [job.to_dict() for job in jobs]
+    }
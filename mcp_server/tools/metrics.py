@@ -0,0 +1,29 @@
+"""Phase timing and AWS API call metrics"""
+from typing import Dict, Any
+from ..metrics import metrics
+
+
+async def get_metrics(
+    format: str = "json",
+    include_spans: bool = False,
+    reset: bool = False,
+) -> Dict[str, Any]:
+    """Per-phase durations, bytes and API call counts since start (or last reset)"""
+    
+    if format == "prometheus":
+        result = {
+            "success": True,
+            "format": "prometheus",
+            "metrics": metrics.prometheus()
+        }
+    else:
+        result = {
+            "success": True,
+            "format": "json",
+            **metrics.snapshot(include_spans=include_spans)
+        }
+    
+    if reset:
+        metrics.reset()
+    
+    return result
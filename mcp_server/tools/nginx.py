@@ -0,0 +1,295 @@
+"""nginx reverse proxy for backend deployments"""
+import asyncio
+import secrets
+import time
+from typing import Any, Dict, List, Optional
+from ..deployers.ec2 import EC2Deployer
+from ..deployers.elb import LoadBalancerDeployer
+from ..deployers.nginx import PROXY_PORTS, install_script, normalize_routes, render_config
+from ..deployers.ssm import SSMRunner
+from ..models.deployment import load_deployment, update_deployment
+from .autoscaling import group_user_data
+from ..executors import run_blocking, run_to_completion
+from ..jobs import report_progress
+from ..metrics import span
+
+
+async def _route_load_balancer_through_nginx(
+    deployer: EC2Deployer,
+    name: str,
+    deployment: Dict[str, Any],
+    instance_ids: List[str],
+    config: str,
+) -> str:
+    """Send the load balancer's traffic to nginx on port 80; returns the new target group
+
+    A target group's port is fixed, so a new one on port 80 takes over the
+    listener (and the Auto Scaling group, if any) once every instance
+    passes its health check through nginx. The old one is then drained and
+    deleted. Nothing is opened to the world: port 80 is only admitted from
+    the load balancer's security group. Before the switch, the group's
+    launch template gets config, so instances it launches later run nginx.
+    """
+
+    load_balancer = deployment['load_balancer']
+    balancer = await run_blocking(LoadBalancerDeployer, region=deployer.region)
+
+    await run_blocking(
+        deployer.allow_from_group,
+        deployment['security_group_id'],
+        load_balancer['security_group_id'],
+        80
+    )
+
+    vpc_id = await run_blocking(deployer.default_vpc_id)
+    target_group_arn = await run_to_completion(run_blocking(
+        balancer.create_target_group,
+        name=LoadBalancerDeployer.resource_name(name, f"tg-{secrets.token_hex(2)}"),
+        vpc_id=vpc_id,
+        port=80,
+        health_path=deployment.get('health_check_path')
+    ))
+
+    report_progress("load_balancer", "Waiting for instances to pass health checks through nginx")
+    try:
+        await run_blocking(balancer.register_targets, target_group_arn, instance_ids)
+        await balancer.wait_healthy(target_group_arn, instance_ids, timeout=300)
+    except BaseException:
+        # Also on cancellation (cancel_job); the listener still uses the old group
+        await run_blocking(balancer.delete_target_group, target_group_arn)
+        raise
+
+    autoscaling = deployment.get('autoscaling')
+    if autoscaling:
+        # The group health-checks through the load balancer, so whatever it
+        # launches once it moves to port 80 must come up with nginx
+        await run_blocking(
+            deployer.update_launch_template,
+            autoscaling['launch_template_id'],
+            group_user_data(
+                deployer,
+                {**deployment, 'proxy': {'config': config}},
+                autoscaling['group_name'],
+                autoscaling.get('warm_pool_size', 0),
+                image_kind=deployment.get('image_kind', 'stock'),
+                commit=deployment.get('commit'),
+            )
+        )
+
+    # Once the listener moves, the switch finishes (and gets recorded) even
+    # if the job is cancelled
+    report_progress("load_balancer", "Switching the load balancer to nginx")
+    await run_to_completion(_switch_target_group(
+        deployer, balancer, deployment, target_group_arn
+    ))
+
+    return target_group_arn
+
+
+async def _switch_target_group(
+    deployer: EC2Deployer,
+    balancer: LoadBalancerDeployer,
+    deployment: Dict[str, Any],
+    target_group_arn: str,
+) -> None:
+    """Move the listener (and Auto Scaling group) to target_group_arn; drop the old group"""
+
+    load_balancer = deployment['load_balancer']
+    old_arn = load_balancer['target_group_arn']
+    await run_blocking(balancer.forward_listener, load_balancer['listener_arn'], target_group_arn)
+
+    autoscaling = deployment.get('autoscaling')
+    if autoscaling:
+        await run_blocking(
+            deployer.swap_target_group,
+            autoscaling['group_name'],
+            old_arn,
+            target_group_arn
+        )
+
+    registered = list(await run_blocking(balancer.target_health, old_arn))
+    if registered:
+        await run_blocking(balancer.deregister_targets, old_arn, registered)
+        await run_blocking(balancer.wait_deregistered, old_arn, registered)
+    await run_blocking(balancer.delete_target_group, old_arn)
+
+
+async def setup_nginx_proxy(
+    instance_name: str,
+    routes: Optional[List[Dict[str, Any]]] = None,
+) -> Dict[str, Any]:
+    """Put nginx in front of a backend's instances
+
+    The config is pushed with SSM Run Command to every instance, the
+    Auto Scaling group's in-service ones included, and kept in the
+    deployment record, so instances launched later for this backend
+    (redeploys, and the group through a new launch template version) get
+    it from their user data. A warm pool, booted without it, is replaced
+    by an instance refresh. On a single instance, once nginx answers, the
+    security group serves port 80 and the app port is closed to the
+    world. Behind a load balancer, the load balancer is moved over to
+    nginx instead.
+    """
+
+    deployment = load_deployment(instance_name)
+    if not deployment or deployment.get('type') != 'backend' or not deployment.get('instance_id'):
+        return {
+            "success": False,
+            "message": f"Backend '{instance_name}' not found"
+        }
+
+    try:
+        routes = normalize_routes(routes, deployment['port'])
+    except ValueError as e:
+        return {
+            "success": False,
+            "message": str(e)
+        }
+
+    config = render_config(routes)
+    instance_ids = deployment.get('instance_ids') or [deployment['instance_id']]
+    region = deployment['region']
+    load_balancer = deployment.get('load_balancer')
+    autoscaling = deployment.get('autoscaling')
+
+    deployer = await run_blocking(EC2Deployer, region=region)
+    if autoscaling:
+        group_ids = await run_blocking(deployer.group_instance_ids, autoscaling['group_name'])
+        instance_ids = instance_ids + [
+            instance_id for instance_id in group_ids if instance_id not in instance_ids
+        ]
+
+    print(f"\n🌐 Setting up nginx on {', '.join(instance_ids)}...")
+    for route in routes:
+        target = route['static_dir'] or f"127.0.0.1:{route['upstream_port']}"
+        cache = f" (cached {route['cache_seconds']}s)" if route['cache_seconds'] else ""
+        print(f"   {route['path']} → {target}{cache}")
+
+    runner = await run_blocking(SSMRunner, region=region)
+    online = await run_blocking(runner.managed_instances, instance_ids)
+    offline = [instance_id for instance_id in instance_ids if instance_id not in online]
+    if offline:
+        return {
+            "success": False,
+            "message": f"Not reachable over SSM: {', '.join(offline)}. Backends need "
+                       f"an instance profile with SSM access (INSTANCE_PROFILE_NAME) "
+                       f"to be configured in place.",
+            "config": config
+        }
+
+    report_progress("configure", f"Installing nginx config on {len(instance_ids)} instance(s)")
+    with span("nginx_configure", instances=len(instance_ids)):
+        command_id = await run_blocking(
+            runner.send_script,
+            instance_ids,
+            "set -e\n" + install_script(config),
+            comment=f"aws-agent: nginx for {instance_name}"
+        )
+        results = await asyncio.gather(*(
+            runner.wait(command_id, instance_id) for instance_id in instance_ids
+        ), return_exceptions=True)
+
+    errors = {}
+    for instance_id, result in zip(instance_ids, results):
+        if isinstance(result, Exception):
+            errors[instance_id] = str(result)
+        elif result['status'] != 'Success':
+            errors[instance_id] = f"{result['status']}: {result['stderr'][-2000:]}"
+
+    if errors:
+        return {
+            "success": False,
+            "message": f"nginx setup failed on {', '.join(errors)}",
+            "errors": errors,
+            "config": config
+        }
+
+    target_group_arn = None
+    public_ip = None
+
+    if load_balancer:
+        with span("load_balancer"):
+            try:
+                target_group_arn = await _route_load_balancer_through_nginx(
+                    deployer, instance_name, deployment, instance_ids, config
+                )
+            except TimeoutError as e:
+                return {
+                    "success": False,
+                    "message": f"nginx was configured but fails the load balancer's health "
+                               f"check: {e}. The load balancer still forwards to port "
+                               f"{deployment['port']}.",
+                    "config": config
+                }
+        ports = []
+    else:
+        # Open port 80, and close the app port only once nginx answers on 80
+        report_progress("security_group", "Opening port 80")
+        security_group_id = deployment['security_group_id']
+        public_ip = deployment.get('public_ip')
+        with span("security_group"):
+            await run_blocking(deployer.set_public_ports, security_group_id, open_ports=PROXY_PORTS)
+
+        if public_ip:
+            try:
+                await deployer.probe_app(public_ip, 80, time.time() + 60)
+            except TimeoutError as e:
+                return {
+                    "success": False,
+                    "message": f"nginx was configured but is not answering: {e}. "
+                               f"Port {deployment['port']} is still open.",
+                    "config": config
+                }
+
+        report_progress("security_group", f"Closing port {deployment['port']}")
+        await run_blocking(
+            deployer.set_public_ports,
+            security_group_id,
+            open_ports=[],
+            close_ports=[deployment['port']]
+        )
+        ports = PROXY_PORTS
+
+    proxy = {
+        "routes": routes,
+        # Ports open to the world; none behind a load balancer
+        "ports": ports,
+        "config": config,
+    }
+
+    def record_proxy(info):
+        info['proxy'] = proxy
+        if target_group_arn:
+            info['load_balancer']['target_group_arn'] = target_group_arn
+        elif public_ip:
+            info['url'] = f"http://{public_ip}"
+
+    updated = update_deployment(instance_name, record_proxy)
+
+    print(f"\n✅ nginx is serving {instance_name}")
+
+    result = {
+        "success": True,
+        "message": f"✓ nginx now fronts '{instance_name}' on port 80",
+        "url": updated.get('url') if (load_balancer or public_ip) else None,
+        "routes": routes,
+        "config": config
+    }
+
+    # The proxy is recorded at this point, so a failed refresh is reported
+    # rather than failing the setup
+    if autoscaling and autoscaling.get('warm_pool_size'):
+        report_progress("autoscaling", f"Refreshing {autoscaling['group_name']} to replace its warm pool")
+        try:
+            result["instance_refresh_id"] = await run_blocking(
+                deployer.start_instance_refresh,
+                autoscaling['group_name']
+            )
+        except Exception as e:
+            result["warning"] = (
+                f"Warm instances of {autoscaling['group_name']} lack nginx and the "
+                f"instance refresh to replace them failed: {e}"
+            )
+            print(f"⚠️  {result['warning']}")
+
+    return result
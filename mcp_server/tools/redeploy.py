@@ -0,0 +1,376 @@
+"""Zero-downtime redeploys of existing backend deployments"""
+import asyncio
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from ..deployers.ec2 import EC2Deployer
+from ..deployers.elb import LoadBalancerDeployer
+from ..deployers.artifacts import ArtifactStore
+from ..deployers.utils import resolve_commit, cleanup_temp_dir
+from ..models.deployment import load_deployment, update_deployment
+from ..config import settings
+from .autoscaling import group_user_data
+from ..executors import run_blocking, run_to_completion
+from ..jobs import report_progress
+from ..metrics import span
+
+
+async def _discard(what: str, func, *args) -> None:
+    """Best-effort cleanup after a failed step; reports instead of raising"""
+
+    try:
+        await run_blocking(func, *args)
+    except Exception as e:
+        print(f"⚠️  Could not remove {what}: {e}")
+
+
+def _outcome(e: BaseException) -> str:
+    """How a rollout step ended, for error messages"""
+
+    return "was cancelled" if isinstance(e, asyncio.CancelledError) else f"failed: {e}"
+
+
+async def _roll_target_group(
+    deployer: EC2Deployer,
+    deployment: Dict[str, Any],
+    launch_args: Dict[str, Any],
+    batch_size: int,
+    commit: str,
+) -> Dict[str, Any]:
+    """Replace instances behind the load balancer batch_size at a time
+
+    Each batch of replacements must pass the target group health check
+    before the instances it replaces are deregistered, drained and
+    terminated. A batch that fails to launch or never gets healthy is
+    terminated and the rollout stops, leaving the remaining old instances
+    serving; so does a cancellation (reported as "cancelled"). Every
+    instance records the commit it runs.
+    """
+
+    balancer = await run_blocking(LoadBalancerDeployer, region=deployer.region)
+    target_group_arn = deployment['load_balancer']['target_group_arn']
+    subnets = await run_blocking(deployer.default_subnets)
+
+    instances: List[Dict[str, Any]] = [
+        {"commit": deployment.get('commit'), **instance}
+        for instance in deployment.get('instances') or [
+            {"instance_id": instance_id} for instance_id in deployment['instance_ids']
+        ]
+    ]
+    old_ids = [instance['instance_id'] for instance in instances]
+    batches = (len(old_ids) + batch_size - 1) // batch_size
+
+    for number, start in enumerate(range(0, len(old_ids), batch_size), 1):
+        old_batch = old_ids[start:start + batch_size]
+        report_progress(
+            "batch",
+            f"Batch {number}/{batches}: replacing {', '.join(old_batch)}"
+        )
+
+        # Rotate the subnets so replacements keep the round-robin zone spread
+        offset = start % len(subnets)
+        with span("rollout_batch", size=len(old_batch)):
+            new_ids: List[str] = []
+            try:
+                launched = await run_to_completion(deployer.launch_across_zones(
+                    subnets[offset:] + subnets[:offset],
+                    len(old_batch),
+                    **launch_args
+                ))
+                new_ids = [instance['InstanceId'] for instance in launched]
+                print(f"   Batch {number}/{batches}: {', '.join(old_batch)} → {', '.join(new_ids)}")
+
+                deadline = time.time() + settings.instance_ready_timeout
+                public_ips = await asyncio.gather(*(
+                    deployer.wait_for_running(instance_id, deadline) for instance_id in new_ids
+                ))
+                await run_blocking(balancer.register_targets, target_group_arn, new_ids)
+                await balancer.wait_healthy(
+                    target_group_arn,
+                    new_ids,
+                    timeout=max(int(deadline - time.time()), 60)
+                )
+            except (Exception, asyncio.CancelledError) as e:
+                if new_ids:
+                    await _discard("targets", balancer.deregister_targets, target_group_arn, new_ids)
+                    await _discard(f"instances {', '.join(new_ids)}", deployer.terminate_instances, new_ids)
+                return {
+                    "instances": instances,
+                    "error": f"Batch {number}/{batches} {_outcome(e)}; rolled it back",
+                    "cancelled": isinstance(e, asyncio.CancelledError),
+                }
+
+            replacements = {
+                old_id: {
+                    "instance_id": instance['InstanceId'],
+                    "availability_zone": instance.get('Placement', {}).get('AvailabilityZone'),
+                    "public_ip": public_ip,
+                    "commit": commit,
+                }
+                for old_id, instance, public_ip in zip(old_batch, launched, public_ips)
+            }
+
+            try:
+                await run_blocking(balancer.deregister_targets, target_group_arn, old_batch)
+                await run_blocking(balancer.wait_deregistered, target_group_arn, old_batch)
+                await run_to_completion(run_blocking(deployer.terminate_instances, old_batch))
+            except (Exception, asyncio.CancelledError) as e:
+                # The replacements already serve, so they are kept (and
+                # recorded) alongside the old batch
+                return {
+                    "instances": instances + list(replacements.values()),
+                    "error": f"Batch {number}/{batches} is serving, but retiring "
+                             f"{', '.join(old_batch)} {_outcome(e)}",
+                    "cancelled": isinstance(e, asyncio.CancelledError),
+                }
+
+        instances = [
+            replacements.get(instance['instance_id'], instance)
+            for instance in instances
+        ]
+
+    return {"instances": instances}
+
+
+async def _swap_elastic_ip(
+    deployer: EC2Deployer,
+    name: str,
+    deployment: Dict[str, Any],
+    launch_args: Dict[str, Any],
+    drain_seconds: int,
+) -> Dict[str, Any]:
+    """Blue-green for a single instance: move its Elastic IP to a ready replacement
+
+    Deployments get their Elastic IP from deploy_backend_to_ec2; ones
+    recorded before that get it allocated here, on their first redeploy.
+    Cancelled before the swap, the replacement is removed; after it, the
+    old instance is terminated without waiting out the drain.
+    """
+
+    old_id = deployment['instance_id']
+    elastic_ip = deployment.get('elastic_ip')
+    allocated = elastic_ip is None
+    if allocated:
+        elastic_ip = await run_to_completion(run_blocking(deployer.allocate_address, name))
+        print(f"   Allocated Elastic IP {elastic_ip['public_ip']}")
+
+    # With nginx in front, the app port is closed to the outside
+    port = 80 if deployment.get('proxy') else deployment['port']
+    new_id = None
+    try:
+        report_progress("launch", "Launching replacement instance")
+        with span("launch"):
+            instance = (await run_to_completion(run_blocking(deployer.launch_instances, **launch_args)))[0]
+        new_id = instance['InstanceId']
+        print(f"   Replacement: {new_id}")
+
+        report_progress("readiness", f"Waiting for {new_id} to serve traffic")
+        with span("wait"):
+            await deployer.wait_for_instance(
+                new_id, port=port, health_path=deployment.get('health_check_path')
+            )
+
+        report_progress("swap", f"Moving {elastic_ip['public_ip']} to {new_id}")
+        with span("swap"):
+            await run_to_completion(run_blocking(
+                deployer.associate_address, elastic_ip['allocation_id'], new_id
+            ))
+    except (Exception, asyncio.CancelledError) as e:
+        if new_id:
+            await _discard(f"instance {new_id}", deployer.terminate_instances, [new_id])
+        if allocated:
+            await _discard(
+                f"Elastic IP {elastic_ip['public_ip']}",
+                deployer.release_address,
+                elastic_ip['allocation_id']
+            )
+        return {
+            "error": f"Replacement {new_id or 'instance'} {_outcome(e)}; rolled it back",
+            "cancelled": isinstance(e, asyncio.CancelledError),
+        }
+
+    rollout = {
+        "instance_id": new_id,
+        "elastic_ip": elastic_ip,
+    }
+
+    # In-flight requests on the old instance finish before it goes away
+    report_progress("drain", f"Draining {old_id} for {drain_seconds}s")
+    try:
+        await asyncio.sleep(drain_seconds)
+    except asyncio.CancelledError:
+        # The swap stands, so the old instance still goes
+        rollout["cancelled"] = True
+    try:
+        await run_to_completion(run_blocking(deployer.terminate_instances, [old_id]))
+    except Exception as e:
+        # The replacement already serves; the swap stands
+        rollout["warning"] = f"Could not terminate the old instance {old_id}: {e}"
+        print(f"⚠️  {rollout['warning']}")
+
+    return rollout
+
+
+async def redeploy_backend(
+    name: str,
+    batch_size: int = 1,
+    drain_seconds: int = 30,
+    use_golden_ami: bool = True,
+) -> Dict[str, Any]:
+    """Roll a backend onto the repository's current HEAD without downtime
+
+    Replacement instances reuse the deployment's security group, instance
+    type, nginx config and delivery mode (artifact or clone). Behind a load
+    balancer they replace the old ones batch_size at a time; a single
+    instance is swapped behind an Elastic IP. An Auto Scaling group, if
+    any, gets an instance refresh onto the same revision.
+    """
+
+    deployment = load_deployment(name)
+    if not deployment or deployment.get('type') != 'backend' or not deployment.get('instance_id'):
+        return {
+            "success": False,
+            "message": f"Backend '{name}' not found"
+        }
+
+    region = deployment['region']
+    app_type = deployment['app_type']
+    repo_url = deployment['repo_url']
+
+    print(f"\n🔄 Redeploying backend '{name}'...")
+    report_progress("resolve", f"Resolving HEAD of {repo_url}")
+    commit = await run_blocking(resolve_commit, repo_url, pool="build")
+    if commit is None:
+        return {
+            "success": False,
+            "message": f"Could not resolve HEAD of {repo_url}"
+        }
+    print(f"   Revision: {(deployment.get('commit') or '?')[:12]} → {commit[:12]}")
+
+    deployer = await run_blocking(EC2Deployer, region=region)
+    if use_golden_ami:
+        with span("image"):
+            ami = await run_blocking(deployer.resolve_ami, app_type, commit)
+    else:
+        ami = {"ami_id": None, "kind": "stock"}
+
+    artifact = None
+    if deployment.get('artifact') and ami["kind"] != "app":
+        report_progress("artifact", "Preparing pre-built artifact")
+        store = await run_blocking(ArtifactStore, region=region)
+        work_dir = Path(tempfile.mkdtemp())
+        try:
+            with span("artifact"):
+                artifact = await store.build_and_stage(repo_url, commit, app_type, work_dir)
+        finally:
+            await run_blocking(cleanup_temp_dir, work_dir, pool="build")
+
+    user_data = deployer.generate_user_data(
+        app_type,
+        repo_url,
+        deployment['port'],
+        provisioned=ami["kind"] != "stock",
+        app_baked=ami["kind"] == "app",
+        artifact_url=artifact["url"] if artifact else None,
+        proxy_config=deployment.get('proxy', {}).get('config'),
+        commit=commit,
+    )
+    launch_args = {
+        "name": name,
+        "instance_type": deployment['instance_type'],
+        "security_group_id": deployment['security_group_id'],
+        "user_data": user_data,
+        "ami_id": ami["ami_id"],
+    }
+
+    if deployment.get('load_balancer'):
+        rollout = await _roll_target_group(deployer, deployment, launch_args, batch_size, commit)
+    else:
+        rollout = await _swap_elastic_ip(deployer, name, deployment, launch_args, drain_seconds)
+
+    def record_rollout(info):
+        if 'instances' in rollout:
+            info['instances'] = rollout['instances']
+            info['instance_ids'] = [instance['instance_id'] for instance in rollout['instances']]
+            info['instance_id'] = info['instance_ids'][0]
+        if 'error' in rollout:
+            if any(instance.get('commit') == commit for instance in rollout.get('instances', [])):
+                # Some instances run the new revision, the rest the old one
+                info['rollout_incomplete'] = {
+                    "target_commit": commit,
+                    "target_ami_id": ami["ami_id"],
+                    "error": rollout['error'],
+                }
+            return
+        info.pop('rollout_incomplete', None)
+        if 'elastic_ip' in rollout:
+            public_ip = rollout['elastic_ip']['public_ip']
+            info['instance_id'] = rollout['instance_id']
+            info['elastic_ip'] = rollout['elastic_ip']
+            info['public_ip'] = public_ip
+            info['url'] = f"http://{public_ip}" if info.get('proxy') else f"http://{public_ip}:{info['port']}"
+        info['commit'] = commit
+        info['ami_id'] = ami["ami_id"] or deployer.AMIS.get(region)
+        info['image_kind'] = ami["kind"]
+        if artifact:
+            info['artifact'] = {
+                "bucket": artifact["bucket"],
+                "key": artifact["key"],
+                "commit": artifact["commit"],
+            }
+
+    updated = update_deployment(name, record_rollout)
+
+    if rollout.get('cancelled'):
+        # What the rollout got to is recorded; the job still ends cancelled
+        raise asyncio.CancelledError()
+
+    if 'error' in rollout:
+        return {
+            "success": False,
+            "message": rollout['error'],
+            "deployment_info": updated
+        }
+
+    # The instances are already rolled (and recorded) at this point, so a
+    # failed refresh is reported rather than failing the redeploy
+    refresh_id: Optional[str] = None
+    warnings = [rollout['warning']] if rollout.get('warning') else []
+    autoscaling = deployment.get('autoscaling')
+    if autoscaling:
+        refresh_user_data = group_user_data(
+            deployer,
+            deployment,
+            autoscaling['group_name'],
+            autoscaling.get('warm_pool_size', 0),
+            image_kind=ami["kind"],
+            commit=commit,
+        )
+        report_progress("autoscaling", f"Refreshing {autoscaling['group_name']}")
+        try:
+            refresh_id = await run_blocking(
+                deployer.refresh_autoscaling_group,
+                autoscaling['group_name'],
+                autoscaling['launch_template_id'],
+                refresh_user_data,
+                ami["ami_id"]
+            )
+        except Exception as e:
+            warnings.append(f"Instance refresh of {autoscaling['group_name']} failed: {e}")
+            print(f"⚠️  {warnings[-1]}")
+
+    print(f"\n✅ Backend '{name}' is on {commit[:12]}")
+
+    result = {
+        "success": True,
+        "message": f"✓ Backend '{name}' redeployed at {commit[:12]} without downtime",
+        "url": updated.get('url'),
+        "commit": commit,
+        "deployment_info": updated
+    }
+    if refresh_id:
+        result["instance_refresh_id"] = refresh_id
+    if warnings:
+        result["warning"] = "; ".join(warnings)
+    return result
@@ -1,10 +1,31 @@
 """S3 Frontend Deployment Tool"""
 import secrets
+import tempfile
+from pathlib import Path
 from typing import Dict, Any
-from ..deployers.s3 import S3Deployer
-from ..deployers.utils import clone_repo, cleanup_temp_dir
-from ..models.deployment import save_deployment, load_deployment
+from ..deployers.s3 import S3Deployer, MB
+from ..deployers.cache import ArtifactCache
+from ..deployers.compress import validate_encoding
+from ..deployers.cache_policy import CachePolicy
+from ..deployers.utils import clone_repo, cleanup_temp_dir, resolve_commit, head_commit
+from ..models.deployment import replace_deployment, load_deployment
 from ..config import settings
+from ..executors import run_blocking
+from ..jobs import report_progress
+from ..metrics import span
+
+
+def build_env(backend_url: str = None) -> str:
+    """Contents of the .env file injected into the build"""
+    
+    if not backend_url:
+        return ""
+    
+    return (
+        f"REACT_APP_API_URL={backend_url}\n"
+        f"VITE_API_URL={backend_url}\n"
+        f"NEXT_PUBLIC_API_URL={backend_url}\n"
+    )
 
 
 async def deploy_frontend_to_s3(
@@ -12,47 +33,135 @@ async def deploy_frontend_to_s3(
     name: str,
     build_command: str = "npm run build",
     region: str = None,
-    backend_url: str = None
+    backend_url: str = None,
+    sync: bool = False,
+    compression: str = None,
+    cache_control: Dict[str, str] = None
 ) -> Dict[str, Any]:
-    """Deploy frontend application to S3"""
+    """Deploy frontend application to S3
+
+    With sync=True, a redeploy reuses the bucket recorded for this
+    deployment and only uploads changed files (and deletes stale ones).
+    Without backend_url, a redeploy builds against the backend URL
+    recorded for the deployment (e.g. by connect_services).
+    compression ("gzip") pre-compresses text assets and uploads
+    them with a matching Content-Encoding. cache_control maps key globs
+    to Cache-Control values and takes precedence over the default policy
+    (immutable fingerprinted assets, no-cache HTML and service workers).
+    
+    Build output is cached by commit SHA, build command and injected
+    environment, so redeploying an unchanged commit skips clone, install
+    and build entirely.
+    """
     
     if region is None:
         region = settings.aws_default_region
     
+    validate_encoding(compression)
+    cache_policy = CachePolicy(cache_control)
+    
     print(f"\n🚀 Deploying frontend '{name}' to S3...")
     print(f"   Repository: {repo_url}")
     print(f"   Build command: {build_command}")
     
-    deployer = S3Deployer(region=region)
-    
-    # Clone repository
-    print(f"\n📦 Cloning repository...")
-    repo_path = clone_repo(repo_url)
-    
-    # If backend_url provided, create .env file for build
-    if backend_url:
-        print(f"\n🔗 Configuring backend URL: {backend_url}")
-        env_file = repo_path / ".env"
-        with open(env_file, 'w') as f:
-            f.write(f"REACT_APP_API_URL={backend_url}\n")
-            f.write(f"VITE_API_URL={backend_url}\n")
-            f.write(f"NEXT_PUBLIC_API_URL={backend_url}\n")
-    
-    # Build the application
-    build_dir = deployer.build_app(repo_path, build_command)
-    
-    # Create unique bucket name
-    bucket_name = f"{name}-{secrets.token_hex(6)}".lower()
-    print(f"\n☁️  Creating S3 bucket: {bucket_name}")
-    
-    deployer.create_bucket(bucket_name)
-    
-    # Upload files
-    print(f"\n📤 Uploading files...")
-    file_count = deployer.upload_directory(build_dir, bucket_name)
+    deployer = await run_blocking(S3Deployer, region=region)
+    
+    # A redeploy keeps building against the backend it was connected to
+    previous = load_deployment(name)
+    if previous and previous.get('type') != 'frontend':
+        previous = None
+    if backend_url is None and previous:
+        backend_url = previous.get('backend_url')
+    
+    build_cache = ArtifactCache(
+        settings.cache_dir / "builds",
+        settings.build_cache_max_mb * MB,
+    )
+    env_contents = build_env(backend_url)
+    
+    def build_key(commit: str) -> str:
+        return ArtifactCache.key_for(repo_url, commit, build_command, env_contents)
+    
+    commit = await run_blocking(resolve_commit, repo_url, pool="build")
+    work_dir = Path(tempfile.mkdtemp())
+    build_dir = work_dir / "build"
+    with span("build_cache") as cache_span:
+        build_cache_hit = bool(commit) and await run_blocking(
+            build_cache.restore, build_key(commit), build_dir, pool="build"
+        )
+        cache_span.set(hit=build_cache_hit)
+    
+    if build_cache_hit:
+        print(f"\n⚡ Build cache hit for {commit[:12]}, skipping clone and build")
+        report_progress("build", f"Build cache hit for {commit[:12]}")
+    else:
+        # Clone repository
+        print(f"\n📦 Cloning repository...")
+        report_progress("clone", "Cloning repository")
+        with span("clone", mode="shallow"):
+            repo_path = await run_blocking(
+                clone_repo, repo_url, work_dir / "repo", mode="shallow", pool="build"
+            )
+        
+        # If backend_url provided, create .env file for build
+        if backend_url:
+            print(f"\n🔗 Configuring backend URL: {backend_url}")
+            env_file = repo_path / ".env"
+            with open(env_file, 'w') as f:
+                f.write(env_contents)
+        
+        # Build the application
+        report_progress("build", f"Running {build_command}")
+        with span("build"):
+            build_dir = await deployer.build_app(repo_path, build_command)
+        
+        # Key on what was actually cloned, in case the branch moved
+        commit = head_commit(repo_path)
+        await run_blocking(build_cache.store, build_key(commit), build_dir, pool="build")
+    
+    # Reuse the previous bucket when syncing a redeploy
+    bucket_name = None
+    if (
+        sync
+        and previous
+        and previous.get('region') == region
+        and await run_blocking(deployer.bucket_exists, previous.get('bucket_name', ''))
+    ):
+        bucket_name = previous['bucket_name']
+        print(f"\n☁️  Reusing S3 bucket: {bucket_name}")
+        report_progress("upload", f"Syncing changed files to {bucket_name}")
+    
+    if bucket_name:
+        with span("upload", mode="sync") as upload_span:
+            file_count = await run_blocking(
+                deployer.sync_directory, build_dir, bucket_name, compression, cache_policy
+            )
+            upload_span.set(
+                files=deployer.last_upload_stats.get("files", 0),
+                bytes=deployer.last_upload_stats.get("bytes", 0),
+            )
+    else:
+        # Create unique bucket name
+        bucket_name = f"{name}-{secrets.token_hex(6)}".lower()
+        print(f"\n☁️  Creating S3 bucket: {bucket_name}")
+        
+        with span("bucket"):
+            await run_blocking(deployer.create_bucket, bucket_name)
+        
+        # Upload files
+        print(f"\n📤 Uploading files...")
+        report_progress("upload", f"Uploading files to {bucket_name}")
+        with span("upload", mode="full") as upload_span:
+            file_count = await run_blocking(
+                deployer.upload_directory, build_dir, bucket_name, compression, cache_policy
+            )
+            upload_span.set(
+                files=deployer.last_upload_stats.get("files", 0),
+                bytes=deployer.last_upload_stats.get("bytes", 0),
+            )
     
     # Clean up
-    cleanup_temp_dir(repo_path)
+    await run_blocking(cleanup_temp_dir, work_dir, pool="build")
     
     # Get website URL
     website_url = deployer.get_website_url(bucket_name)
@@ -67,13 +176,23 @@ async def deploy_frontend_to_s3(
         "file_count": file_count,
         "status": "deployed",
         "repo_url": repo_url,
+        "commit": commit,
         "build_command": build_command
     }
     
     if backend_url:
         deployment_info["backend_url"] = backend_url
     
-    save_deployment(name, deployment_info)
+    if compression:
+        deployment_info["compression"] = compression
+    
+    if cache_control:
+        deployment_info["cache_control"] = cache_control
+    
+    if previous and previous.get('bucket_name') == bucket_name:
+        deployment_info["created_at"] = previous.get("created_at")
+    
+    replace_deployment(name, deployment_info)
     
     cost = deployer.estimate_cost()
     
@@ -88,6 +207,10 @@ async def deploy_frontend_to_s3(
         "bucket_name": bucket_name,
         "url": website_url,
         "file_count": file_count,
+        "upload_stats": deployer.last_upload_stats,
+        "compression_stats": deployer.last_compression_stats,
+        "dependency_cache": deployer.last_dependency_cache,
+        "build_cache": {"hit": build_cache_hit, **build_cache.stats()},
         "cost_per_month": cost,
         "deployment_info": deployment_info
     }
\ No newline at end of file
@@ -1,7 +1,11 @@
 """Get deployment status"""
-from typing import Dict, Any
-from ..models.deployment import load_deployment
+import asyncio
+from collections import defaultdict
+from typing import Dict, Any, Optional
+from ..models.deployment import load_deployment, list_deployments
 from ..deployers.ec2 import EC2Deployer
+from ..deployers.s3 import S3Deployer
+from ..executors import run_blocking
 
 
 async def get_deployment_status(deployment_name: str) -> Dict[str, Any]:
@@ -22,10 +26,17 @@ async def get_deployment_status(deployment_name: str) -> Dict[str, Any]:
         instance_id = deployment.get('instance_id')
         region = deployment.get('region', 'us-east-1')
         
-        deployer = EC2Deployer(region=region)
         try:
-            instance_info = deployer.get_instance_info(instance_id)
+            deployer = await run_blocking(EC2Deployer, region=region)
+            instance_info = await run_blocking(deployer.get_instance_info, instance_id)
             deployment.update(instance_info)
+            if deployment.get('instance_ids'):
+                # Replicas behind a load balancer: report every instance
+                instances = await run_blocking(deployer.get_instances_info, deployment['instance_ids'])
+                deployment['instances'] = [
+                    instances.get(i, {'instance_id': i, 'state': 'not_found'})
+                    for i in deployment['instance_ids']
+                ]
         except Exception as e:
             deployment['status'] = 'error'
             deployment['error'] = str(e)
@@ -33,4 +44,107 @@ async def get_deployment_status(deployment_name: str) -> Dict[str, Any]:
     return {
         "success": True,
         "deployment": deployment
-    }
\ No newline at end of file
+    }
+
+async def _refresh_backends(region: str, deployments: Dict[str, Dict[str, Any]]) -> None:
+    """Refresh every backend in one region with batched describe calls
+    
+    Replica deployments contribute all of their instance_ids, so each entry
+    in 'instances' gets its own state; the top-level fields follow the
+    first running instance, or the first one that still exists.
+    """
+    
+    instance_ids = [
+        instance_id
+        for d in deployments.values()
+        for instance_id in (d.get('instance_ids') or [d.get('instance_id')])
+        if instance_id
+    ]
+    
+    try:
+        deployer = await run_blocking(EC2Deployer, region=region)
+        instances = await run_blocking(deployer.get_instances_info, instance_ids)
+    except Exception as e:
+        for deployment in deployments.values():
+            deployment['status'] = 'error'
+            deployment['error'] = str(e)
+        return
+    
+    for deployment in deployments.values():
+        for replica in deployment.get('instances') or []:
+            replica_info = instances.get(replica.get('instance_id'))
+            if replica_info:
+                replica['state'] = replica_info['state']
+                replica['public_ip'] = replica_info['public_ip']
+            else:
+                replica['state'] = 'not_found'
+        
+        own_ids = deployment.get('instance_ids') or [deployment.get('instance_id')]
+        found = [instances[instance_id] for instance_id in own_ids if instance_id in instances]
+        instance_info = next((info for info in found if info['state'] == 'running'), None)
+        instance_info = instance_info or next(iter(found), None)
+        if instance_info:
+            deployment.update(instance_info)
+        else:
+            deployment['state'] = 'not_found'
+
+
+async def _refresh_frontends(region: str, deployments: Dict[str, Dict[str, Any]]) -> None:
+    """Check every frontend bucket in one region concurrently"""
+    
+    try:
+        deployer = await run_blocking(S3Deployer, region=region)
+    except Exception as e:
+        for deployment in deployments.values():
+            deployment['status'] = 'error'
+            deployment['error'] = str(e)
+        return
+    
+    buckets = [d.get('bucket_name') for d in deployments.values()]
+    exists = await asyncio.gather(*(
+        run_blocking(deployer.bucket_exists, bucket) for bucket in buckets
+    ))
+    
+    for deployment, bucket_exists in zip(deployments.values(), exists):
+        deployment['bucket_exists'] = bucket_exists
+        deployment['state'] = 'available' if bucket_exists else 'not_found'
+
+
+async def get_all_deployment_status(deployment_type: Optional[str] = None) -> Dict[str, Any]:
+    """Get status of every deployment in one batched refresh
+    
+    Backends are grouped by region and refreshed with one paginated
+    describe_instances per region (IDs batched into filters); frontend
+    buckets are checked concurrently. Refreshing hundreds of deployments
+    costs a handful of API calls instead of one client and round trip each.
+    """
+    
+    filters = {'type': deployment_type} if deployment_type else {}
+    deployments = list_deployments(**filters)
+    
+    backends: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    frontends: Dict[str, Dict[str, Dict[str, Any]]] = defaultdict(dict)
+    
+    for name, deployment in deployments.items():
+        region = deployment.get('region', 'us-east-1')
+        if deployment.get('type') == 'backend':
+            backends[region][name] = deployment
+        elif deployment.get('type') == 'frontend':
+            frontends[region][name] = deployment
+    
+    await asyncio.gather(
+        *(_refresh_backends(region, group) for region, group in backends.items()),
+        *(_refresh_frontends(region, group) for region, group in frontends.items()),
+    )
+    
+    summary: Dict[str, int] = defaultdict(int)
+    for deployment in deployments.values():
+        summary[deployment.get('state') or deployment.get('status') or 'unknown'] += 1
+    
+    return {
+        "success": True,
+        "count": len(deployments),
+        "regions": sorted(set(backends) | set(frontends)),
+        "summary": dict(summary),
+        "deployments": deployments
+    }